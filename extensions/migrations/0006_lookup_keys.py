@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:27
+
+import re
+from django.db import migrations, models
+
+
+# Frozen copy of users.identifiers.normalize_phone as of this migration
+def normalize_phone(value):
+    if not isinstance(value, str):
+        return None
+    return re.sub(r'\D', '', value)[-9:] or None
+
+
+def populate_holder_phone_keys(apps, schema_editor):
+    SecurityKey = apps.get_model('extensions', 'SecurityKey')
+    for key in SecurityKey.objects.exclude(current_holder_phone__isnull=True).iterator():
+        SecurityKey.objects.filter(pk=key.pk).update(current_holder_phone_key=normalize_phone(key.current_holder_phone))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('extensions', '0005_securitykey_key_type'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='securitykey',
+            name='current_holder_phone_key',
+            field=models.CharField(blank=True, db_index=True, editable=False, help_text='Normalised current_holder_phone used for person lookups', max_length=9, null=True),
+        ),
+        migrations.RunPython(populate_holder_phone_keys, migrations.RunPython.noop),
+    ]
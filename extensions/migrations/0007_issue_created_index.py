@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('extensions', '0006_lookup_keys'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='reportedissue',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+    ]
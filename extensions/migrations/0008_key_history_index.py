@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('extensions', '0007_issue_created_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='keyhistory',
+            index=models.Index(fields=['key', 'timestamp'], name='keyhistory_key_time_idx'),
+        ),
+    ]
@@ -1,6 +1,7 @@
 # models.py
 from django.db import models
 from django.contrib.auth import get_user_model
+from users.identifiers import normalize_phone
 User = get_user_model()
 
 class PhoneExtension(models.Model):
@@ -42,7 +43,7 @@ class ReportedIssue(models.Model):
     description = models.TextField()
     priority = models.CharField(max_length=20, choices=PRIORITY_CHOICES, default='Medium')
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='Open')
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
 
 class SecurityKey(models.Model):
     STATUS_CHOICES = [
@@ -73,6 +74,15 @@ class SecurityKey(models.Model):
     current_holder_phone = models.CharField(max_length=20, blank=True, null=True)
     checkout_time = models.DateTimeField(blank=True, null=True)
     return_time = models.DateTimeField(blank=True, null=True)
+    current_holder_phone_key = models.CharField(max_length=9, blank=True, null=True, db_index=True, editable=False,
+                                                help_text='Normalised current_holder_phone used for person lookups')
+
+    def save(self, *args, **kwargs):
+        self.current_holder_phone_key = normalize_phone(self.current_holder_phone)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'current_holder_phone' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'current_holder_phone_key'}
+        super().save(*args, **kwargs)
 
 
 class KeyHistory(models.Model):
@@ -84,3 +94,7 @@ class KeyHistory(models.Model):
     timestamp = models.DateTimeField(auto_now_add=True)
     user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)  # Who performed the action
     notes = models.TextField(blank=True)
+
+    class Meta:
+        # A key's history newest first: the history endpoint and the list's latest events
+        indexes = [models.Index(fields=['key', 'timestamp'], name='keyhistory_key_time_idx')]
@@ -1,3 +1,4 @@
+from django.db.models import Count, Prefetch
 from rest_framework import serializers
 from .models import PhoneExtension, ReportedIssue, KeyHistory, SecurityKey
 
@@ -31,6 +32,28 @@ class SecurityKeySerializer(serializers.ModelSerializer):
     
     class Meta:
         model = SecurityKey
-        fields = '__all__'
+        exclude = ('current_holder_phone_key',)
         read_only_fields = ('checkout_time', 'return_time')
 
+class SecurityKeyListSerializer(SecurityKeySerializer):
+    """
+    A key with only its HISTORY_PREVIEW latest history events and the total number of
+    events; the full history is paged by SecurityKeyHistoryView. Serialise querysets
+    passed through with_recent_history() so the whole list takes a fixed number of queries.
+    """
+    HISTORY_PREVIEW = 5
+
+    history = serializers.SerializerMethodField()
+    history_count = serializers.IntegerField(read_only=True)
+
+    @classmethod
+    def with_recent_history(cls, queryset):
+        # A sliced Prefetch is fetched in one query using ROW_NUMBER() over each key's history
+        recent = KeyHistory.objects.order_by('-timestamp', '-id')[:cls.HISTORY_PREVIEW]
+        return queryset.annotate(history_count=Count('history')).prefetch_related(
+            Prefetch('history', queryset=recent, to_attr='recent_history')
+        )
+
+    def get_history(self, key):
+        return KeyHistorySerializer(key.recent_history, many=True).data
+
@@ -1,3 +1,85 @@
-from django.test import TestCase
+import re
+from datetime import timedelta
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from users.models import User
+from .models import PhoneExtension, SecurityKey, KeyHistory
+from .serializers import SecurityKeyListSerializer
 
-# Create your tests here.
+
+class SecurityKeyListTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='security', password='pw', role=User.Role.STAFF)
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('security-key-list')
+
+    def create_key(self, key_id, events):
+        key = SecurityKey.objects.create(key_id=key_id, location='Gym')
+        start = timezone.now() - timedelta(days=1)
+        for i in range(events):
+            entry = KeyHistory.objects.create(key=key, action='checkout' if i % 2 == 0 else 'return',
+                                              holder_name=f'Holder {i}', holder_type='staff', user=self.user)
+            # auto_now_add ignores a passed timestamp, so spread the events afterwards
+            KeyHistory.objects.filter(pk=entry.pk).update(timestamp=start + timedelta(minutes=i))
+        return key
+
+    def list_keys(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data['results'], len(queries)
+
+    def test_latest_history_and_count_per_key(self):
+        preview = SecurityKeyListSerializer.HISTORY_PREVIEW
+        busy = self.create_key('K-001', preview + 3)
+        self.create_key('K-002', 1)
+        self.create_key('K-003', 0)
+
+        keys, _ = self.list_keys()
+        self.assertEqual([key['key_id'] for key in keys], ['K-001', 'K-002', 'K-003'])
+        self.assertEqual([key['history_count'] for key in keys], [preview + 3, 1, 0])
+        self.assertEqual([len(key['history']) for key in keys], [preview, 1, 0])
+        latest = busy.history.order_by('-timestamp').values_list('holder_name', flat=True)[:preview]
+        self.assertEqual([event['holder_name'] for event in keys[0]['history']], list(latest))
+
+    def test_query_count_independent_of_keys(self):
+        self.create_key('K-001', 2)
+        _, few = self.list_keys()
+        for i in range(2, 12):
+            self.create_key(f'K-{i:03}', i)
+        keys, many = self.list_keys()
+        self.assertEqual(len(keys), 11)
+        self.assertEqual(few, many)
+
+    def test_full_history_paged(self):
+        key = self.create_key('K-001', 7)
+        response = self.client.get(reverse('key-history', args=[key.pk]), {'page_size': 4})
+        self.assertEqual(len(response.data['results']), 4)
+        rest = self.client.get(response.data['next'])
+        self.assertEqual(len(rest.data['results']), 3)
+        self.assertIsNone(rest.data['next'])
+
+
+class BareListPaginationTestCase(APITestCase):
+    def setUp(self):
+        user = User.objects.create_user(username='desk', password='pw', role=User.Role.RECEPTION)
+        self.client.force_authenticate(user=user)
+        PhoneExtension.objects.bulk_create(
+            PhoneExtension(name=f'Office {i}', number=str(100 + i), location='Main') for i in range(105)
+        )
+
+    def test_bare_list_is_one_page_with_link_to_rest(self):
+        response = self.client.get(reverse('phone-extension-list'), {'envelope': 'false'})
+        self.assertIsInstance(response.data, list)
+        self.assertEqual(len(response.data), 100)
+        self.assertEqual(response.data[0]['name'], 'Office 0')
+        next_url = re.fullmatch(r'<(.+)>; rel="next"', response['Link']).group(1)
+        self.assertIn('envelope=false', next_url)
+
+        rest = self.client.get(next_url)
+        self.assertEqual([extension['name'] for extension in rest.data], [f'Office {i}' for i in range(100, 105)])
+        self.assertNotIn('Link', rest)
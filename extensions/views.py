@@ -2,11 +2,13 @@ from rest_framework import generics, status
 from rest_framework.response import Response
 from django.db.models import Q
 from django.utils import timezone
+from users.pagination import KeysetPagination
 from .models import PhoneExtension, ReportedIssue, SecurityKey, KeyHistory
 from .serializers import (
     PhoneExtensionSerializer,
     ReportedIssueSerializer,
     SecurityKeySerializer,
+    SecurityKeyListSerializer,
     KeyCheckoutSerializer,
     KeyReturnSerializer,
     KeyHistorySerializer
@@ -16,6 +18,7 @@ from .serializers import (
 class PhoneExtensionListCreateView(generics.ListCreateAPIView):
     queryset = PhoneExtension.objects.all()
     serializer_class = PhoneExtensionSerializer
+    pagination_class = KeysetPagination.ordered_by('id')
 
 class PhoneExtensionDetailView(generics.RetrieveUpdateDestroyAPIView):
     queryset = PhoneExtension.objects.all()
@@ -25,6 +28,7 @@ class PhoneExtensionDetailView(generics.RetrieveUpdateDestroyAPIView):
 class ReportedIssueListCreateView(generics.ListCreateAPIView):
     queryset = ReportedIssue.objects.all()
     serializer_class = ReportedIssueSerializer
+    pagination_class = KeysetPagination.ordered_by('-created_at', '-id')
 
 class ReportedIssueDetailView(generics.RetrieveUpdateDestroyAPIView):
     queryset = ReportedIssue.objects.all()
@@ -51,9 +55,17 @@ class UpdateIssueStatusView(generics.UpdateAPIView):
 class SecurityKeyListView(generics.ListCreateAPIView):
     queryset = SecurityKey.objects.all()
     serializer_class = SecurityKeySerializer
+    pagination_class = KeysetPagination.ordered_by('key_id')
+
+    def get_serializer_class(self):
+        if self.request.method == 'GET':
+            return SecurityKeyListSerializer
+        return SecurityKeySerializer
 
     def get_queryset(self):
         queryset = super().get_queryset()
+        if self.request.method == 'GET':
+            queryset = SecurityKeyListSerializer.with_recent_history(queryset)
         search_query = self.request.query_params.get('search', '')
         if search_query:
             queryset = queryset.filter(
@@ -69,6 +81,7 @@ class SecurityKeyDetailView(generics.RetrieveUpdateDestroyAPIView):
 
 class SecurityKeyHistoryView(generics.ListAPIView):
     serializer_class = KeyHistorySerializer
+    pagination_class = KeysetPagination.ordered_by('-timestamp', '-id')
 
     def get_queryset(self):
         return KeyHistory.objects.filter(key_id=self.kwargs['pk']).order_by('-timestamp')
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import LostItem, FoundItem, PickupLog, SystemSettings, EmailLog
+from .models import LostItem, FoundItem, PickupLog, SystemSettings, EmailLog, PotentialMatch, MatchJob
 
 @admin.register(LostItem)
 class LostItemAdmin(admin.ModelAdmin):
@@ -18,6 +18,18 @@ class PickupLogAdmin(admin.ModelAdmin):
     list_display = ('item', 'picked_by_name', 'picked_by_member_id', 'pickup_date')
     search_fields = ('picked_by_name', 'picked_by_member_id')
 
+@admin.register(PotentialMatch)
+class PotentialMatchAdmin(admin.ModelAdmin):
+    list_display = ('lost_item', 'found_item', 'score', 'updated_at')
+    search_fields = ('lost_item__tracking_id', 'lost_item__item_name', 'found_item__item_name')
+    readonly_fields = ('updated_at',)
+
+@admin.register(MatchJob)
+class MatchJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'lost_item', 'found_item', 'status', 'attempts', 'updated_at')
+    list_filter = ('status',)
+    readonly_fields = ('created_at', 'updated_at')
+
 @admin.register(EmailLog)
 class EmailLogAdmin(admin.ModelAdmin):
     list_display = ('email_type', 'recipient', 'lost_item', 'sent_at', 'subject')
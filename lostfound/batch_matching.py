@@ -0,0 +1,413 @@
+"""
+Batch scoring engine for matching a whole lost backlog against a whole found backlog.
+
+The cheap parts of the score (shared tokens, colour and location keyword matches, time
+decay, presence of each field) are computed as NumPy array operations over blocks of
+lost items. Each text component then goes through increasingly tight upper bounds of
+SequenceMatcher.ratio() (string lengths, then character counts), and pairs whose best
+possible score can no longer reach the threshold are dropped after every step. The full
+ratio is only called where it can change the result: when a colour or location keyword
+match already scores at least as much as the bound, the component is known without it.
+Ratios are computed once per distinct pair of strings, so the repeated names and
+locations of a real backlog ("Phone", "Gym") cost a single call.
+Scores are identical to `score_features`.
+
+NumPy is optional; without it the engine falls back to scoring candidate pairs one by one.
+
+It does not make a 10k x 10k backlog finish in seconds at the task's 0.7 threshold: about
+2% of same-week pairs reach 0.7 and each needs its exact ratio, so that run took 561s on
+one core (25.7s at 0.9). See lostfound/benchmark_baselines/ and the API documentation.
+"""
+import zlib
+from collections import defaultdict
+from difflib import SequenceMatcher
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is an optional dependency
+    np = None
+
+from .models import MATCH_COLORS, MATCH_LOCATION_KEYWORDS
+from .matching import score_features
+
+SIGNATURE_WIDTH = 1024
+HISTOGRAM_WIDTH = 128
+BLOCK_SIZE = 128
+CHUNK_SIZE = 1 << 16
+# Memoised pair scores kept per field before the memo starts over; descriptions rarely repeat
+CACHE_LIMIT = 1 << 20
+DECAY_SECONDS = 14 * 24 * 3600
+# Float tolerance so rounding in the bounds never prunes a pair scoring exactly the threshold
+EPSILON = 1e-9
+
+
+def _bucket(token):
+    return zlib.crc32(token.encode('utf-8')) % SIGNATURE_WIDTH
+
+
+def _bitmask(values, vocabulary):
+    mask = 0
+    for value in values:
+        mask |= 1 << vocabulary.index(value)
+    return mask
+
+
+def _intern(values):
+    """Map each string to a small integer id; returns (ids array, distinct strings)"""
+    ids = {}
+    column = np.array([ids.setdefault(value, len(ids)) for value in values], dtype=np.int64)
+    return column, list(ids)
+
+
+def _histogram(values):
+    """Character counts per string, folded into HISTOGRAM_WIDTH buckets"""
+    counts = np.zeros((len(values), HISTOGRAM_WIDTH), dtype=np.int16)
+    for row, value in enumerate(values):
+        for char in value:
+            counts[row, ord(char) % HISTOGRAM_WIDTH] += 1
+    return counts
+
+
+class _FeatureMatrix:
+    """Column-oriented NumPy view of a list of item match features"""
+
+    def __init__(self, features):
+        self.features = features
+        self.name, self.names = _intern(f['name'] for f in features)
+        self.description, self.descriptions = _intern(f['description'] for f in features)
+        self.location, self.locations = _intern(f['location'] for f in features)
+        self.name_len = np.array([len(f['name']) for f in features], dtype=np.float64)
+        self.desc_len = np.array([len(f['description']) for f in features], dtype=np.float64)
+        self.loc_len = np.array([len(f['location']) for f in features], dtype=np.float64)
+        self.colors = np.array([_bitmask(f['colors'], MATCH_COLORS) for f in features], dtype=np.int64)
+        self.location_keywords = np.array(
+            [_bitmask(f['location_keywords'], MATCH_LOCATION_KEYWORDS) for f in features], dtype=np.int64
+        )
+        self.timestamp = np.array([f['timestamp'] for f in features], dtype=np.float64)
+        self.keyword_count = np.array([len(f['name_keywords']) for f in features], dtype=np.float64)
+        self.name_hist = _histogram(self.names)
+        self.desc_hist = _histogram(self.descriptions)
+        self.loc_hist = _histogram(self.locations)
+
+        # Hashed token counts; their products over-count shared tokens, never under-count
+        self.tokens = np.zeros((len(features), SIGNATURE_WIDTH), dtype=np.float32)
+        self.keywords = np.zeros((len(features), SIGNATURE_WIDTH), dtype=np.float32)
+        for row, f in enumerate(features):
+            for token in f['tokens']:
+                self.tokens[row, _bucket(token)] += 1
+            for keyword in f['name_keywords']:
+                self.keywords[row, _bucket(keyword)] += 1
+
+
+def _lcs_ratio(a, b):
+    """
+    Upper bound of SequenceMatcher(None, a, b).ratio() from the longest common subsequence.
+
+    The matching blocks SequenceMatcher finds form a common subsequence, so they never
+    cover more characters than the LCS. The LCS length uses the bit-parallel algorithm,
+    one big-integer step per character of the shorter string.
+    """
+    if not a or not b:
+        return 0.0
+    if len(b) > len(a):
+        a, b = b, a
+    masks = {}
+    for position, char in enumerate(a):
+        masks[char] = masks.get(char, 0) | (1 << position)
+    full = (1 << len(a)) - 1
+    row = full
+    for char in b:
+        matches = row & masks.get(char, 0)
+        row = ((row + matches) | (row - matches)) & full
+    common = len(a) - bin(row).count('1')
+    return 2.0 * common / (len(a) + len(b))
+
+
+def _name_floor(lost, found):
+    overlap = len(set(lost['name_keywords']).intersection(found['name_keywords']))
+    return min(1.0, overlap / max(len(lost['name_keywords']), len(found['name_keywords']), 1))
+
+
+def _description_floor(lost, found):
+    return 0.8 if set(lost['colors']).intersection(found['colors']) else 0.0
+
+
+def _location_floor(lost, found):
+    return 1.0 if set(lost['location_keywords']).intersection(found['location_keywords']) else 0.0
+
+
+class _FieldScore:
+    """
+    Score of one text field for a pair of match features: max(ratio, keyword floor).
+
+    `bound` replaces the ratio with its LCS upper bound; `exact` only calls the full
+    ratio when that bound exceeds the floor, otherwise the floor is already the score.
+    The LCS ratios are kept for the lifetime of the instance, one batch run.
+    """
+
+    def __init__(self, field, floor):
+        self.field = field
+        self.floor = floor
+        self.lcs = {}
+
+    def lcs_ratio(self, lost, found):
+        key = (lost[self.field], found[self.field])
+        ratio = self.lcs.get(key)
+        if ratio is None:
+            if len(self.lcs) >= CACHE_LIMIT:
+                self.lcs.clear()
+            ratio = self.lcs[key] = _lcs_ratio(*key)
+        return ratio
+
+    def bound(self, lost, found):
+        return max(self.lcs_ratio(lost, found), self.floor(lost, found))
+
+    def exact(self, lost, found):
+        floor = self.floor(lost, found)
+        if self.lcs_ratio(lost, found) <= floor:
+            return floor
+        return max(SequenceMatcher(None, lost[self.field], found[self.field]).ratio(), floor)
+
+
+FIELD_FLOORS = {
+    'name': _name_floor,
+    'description': _description_floor,
+    'location': _location_floor,
+}
+
+
+class _PairCache:
+    """
+    Per-field scores memoised on the pair of distinct string ids.
+
+    `compute(lost_index, found_index)` receives the index of one lost and one found item
+    carrying the strings and returns the component score.
+    """
+
+    def __init__(self, lost_ids, found_ids, found_distinct, compute):
+        self.lost_ids = lost_ids
+        self.found_ids = found_ids
+        self.width = len(found_distinct)
+        self.compute = compute
+        self.values = {}
+
+    def lookup(self, lost_rows, found_rows):
+        keys = self.lost_ids[lost_rows] * self.width + self.found_ids[found_rows]
+        distinct, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        values = np.empty(len(distinct), dtype=np.float64)
+        for position, key in enumerate(distinct.tolist()):
+            value = self.values.get(key)
+            if value is None:
+                if len(self.values) >= CACHE_LIMIT:
+                    self.values.clear()
+                value = self.values[key] = self.compute(lost_rows[first[position]], found_rows[first[position]])
+            values[position] = value
+        return values[inverse.reshape(-1)]
+
+
+def _length_bound(lost_len, found_len):
+    """Upper bound of SequenceMatcher.ratio() from the string lengths (real_quick_ratio)"""
+    total = lost_len + found_len
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(total > 0, 2.0 * np.minimum(lost_len, found_len) / total, 0.0)
+
+
+def _count_bound(lost_len, found_len, lost_hist, found_hist):
+    """
+    Upper bound of SequenceMatcher.ratio() from character counts (quick_ratio).
+
+    `lost_hist` and `found_hist` are (histogram table, row ids) pairs, gathered in chunks
+    so the per-pair histograms never all sit in memory at once. Folding characters into
+    buckets can only raise the count of common characters, so the result never falls
+    below the real ratio.
+    """
+    common = np.empty(len(lost_len), dtype=np.float64)
+    (lost_table, lost_ids), (found_table, found_ids) = lost_hist, found_hist
+    for start in range(0, len(common), CHUNK_SIZE):
+        chunk = slice(start, start + CHUNK_SIZE)
+        common[chunk] = np.minimum(lost_table[lost_ids[chunk]], found_table[found_ids[chunk]]).sum(axis=1)
+    total = lost_len + found_len
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(total > 0, 2.0 * common / total, 0.0)
+
+
+class _Component:
+    """
+    One weighted text component of the score for a set of (lost, found) pairs.
+
+    `value` is the component score when both sides have text. It starts as an upper
+    bound built from `floor` (the keyword part of the score, or a bound of it) and a
+    bound of the ratio, and is tightened until the exact score is filled in.
+    """
+
+    def __init__(self, lost_len, found_len, weight, partial, floor):
+        self.lost_len = lost_len
+        self.found_len = found_len
+        self.both = (lost_len > 0) & (found_len > 0)
+        self.one = (lost_len > 0) ^ (found_len > 0)
+        self.weight = weight
+        self.partial = partial
+        self.floor = floor
+        self.value = np.maximum(floor, _length_bound(lost_len, found_len))
+
+    def tighten(self, ratio_bound):
+        self.value = np.minimum(self.value, np.maximum(self.floor, ratio_bound))
+
+    def numerator(self):
+        return np.where(self.both, self.value * self.weight, np.where(self.one, self.partial, 0.0))
+
+    def denominator(self):
+        return np.where(self.both, self.weight, np.where(self.one, self.partial, 0.0))
+
+    def keep(self, mask):
+        for attr in ('lost_len', 'found_len', 'both', 'one', 'floor', 'value'):
+            setattr(self, attr, getattr(self, attr)[mask])
+
+
+def _score(time_score, name, description, location):
+    # Same terms, added in the same order, as score_features so the floats are identical
+    numerator = 0.3 + name.numerator() + description.numerator() + location.numerator() + time_score * 0.1
+    denominator = 0.3 + name.denominator() + description.denominator() + location.denominator() + 0.1
+    return np.minimum(1.0, numerator / denominator)
+
+
+def _score_cards(lost_items, found_items, threshold):
+    found_by_card = defaultdict(list)
+    for found_id, features in found_items:
+        if features['card_key']:
+            found_by_card[features['card_key']].append(found_id)
+
+    matches = []
+    if threshold > 1.0:
+        return matches
+    for lost_id, features in lost_items:
+        for found_id in found_by_card.get(features['card_key'], ()):
+            matches.append((lost_id, found_id, 1.0))
+    return matches
+
+
+def _score_items_python(lost_items, found_items, threshold, min_shared):
+    postings = defaultdict(list)
+    for index, (found_id, features) in enumerate(found_items):
+        for token in features['tokens']:
+            postings[token].append(index)
+
+    matches = []
+    for lost_id, lost_features in lost_items:
+        shared = defaultdict(int)
+        for token in lost_features['tokens']:
+            for index in postings.get(token, ()):
+                shared[index] += 1
+        for index, count in shared.items():
+            if count < min_shared:
+                continue
+            found_id, found_features = found_items[index]
+            components = score_features(lost_features, found_features, threshold)
+            if components is not None:
+                matches.append((lost_id, found_id, components['score']))
+    return matches
+
+
+def _score_block(lost, found, rows, caches, threshold, min_shared):
+    """Exact (lost index, found index, score) arrays for one block of lost rows"""
+    shared = lost.tokens[rows] @ found.tokens.T
+    lost_rows, found_rows = np.nonzero(shared >= min_shared)
+    shared_keywords = (lost.keywords[rows] @ found.keywords.T)[lost_rows, found_rows]
+    lost_rows = lost_rows + rows.start
+
+    time_diff = np.abs(lost.timestamp[lost_rows] - found.timestamp[found_rows])
+    time_score = np.maximum(0.0, 1 - time_diff / DECAY_SECONDS)
+    color_match = (lost.colors[lost_rows] & found.colors[found_rows]) != 0
+    location_match = (lost.location_keywords[lost_rows] & found.location_keywords[found_rows]) != 0
+    lost_keywords, found_keywords = lost.keyword_count[lost_rows], found.keyword_count[found_rows]
+    keyword_bound = np.minimum(1.0, np.minimum(shared_keywords, np.minimum(lost_keywords, found_keywords))
+                               / np.maximum(np.maximum(lost_keywords, found_keywords), 1))
+    components = {
+        'name': _Component(lost.name_len[lost_rows], found.name_len[found_rows], 0.25, 0.1, keyword_bound),
+        'description': _Component(lost.desc_len[lost_rows], found.desc_len[found_rows], 0.2, 0.05,
+                                  color_match * 0.8),
+        'location': _Component(lost.loc_len[lost_rows], found.loc_len[found_rows], 0.15, 0.05,
+                               location_match * 1.0),
+    }
+
+    def prune():
+        nonlocal lost_rows, found_rows, time_score
+        mask = _score(time_score, **components) >= threshold - EPSILON
+        lost_rows, found_rows, time_score = lost_rows[mask], found_rows[mask], time_score[mask]
+        for component in components.values():
+            component.keep(mask)
+
+    prune()
+
+    histograms = {
+        'name': (lost.name_hist, lost.name, found.name_hist, found.name),
+        'description': (lost.desc_hist, lost.description, found.desc_hist, found.description),
+        'location': (lost.loc_hist, lost.location, found.loc_hist, found.location),
+    }
+    for field, (lost_table, lost_ids, found_table, found_ids) in histograms.items():
+        component = components[field]
+        component.tighten(_count_bound(component.lost_len, component.found_len,
+                                       (lost_table, lost_ids[lost_rows]), (found_table, found_ids[found_rows])))
+        prune()
+
+    # Resolve the fields with fewest distinct strings first: LCS bound, then exact score
+    for field in ('location', 'name', 'description'):
+        for cache in caches[field]:
+            component = components[field]
+            both = np.nonzero(component.both)[0]
+            component.value[both] = cache.lookup(lost_rows[both], found_rows[both])
+            prune()
+
+    scores = _score(time_score, **components)
+    keep = scores >= threshold
+    return lost_rows[keep], found_rows[keep], scores[keep]
+
+
+def _score_items_numpy(lost_items, found_items, threshold, min_shared, block_size):
+    lost = _FeatureMatrix([features for _, features in lost_items])
+    found = _FeatureMatrix([features for _, features in found_items])
+
+    def pair_cache(field, score):
+        return _PairCache(getattr(lost, field), getattr(found, field), getattr(found, field + 's'),
+                          lambda i, j: score(lost.features[i], found.features[j]))
+
+    caches = {}
+    for field, floor in FIELD_FLOORS.items():
+        field_score = _FieldScore(field, floor)
+        caches[field] = (pair_cache(field, field_score.bound), pair_cache(field, field_score.exact))
+
+    matches = []
+    for start in range(0, len(lost_items), block_size):
+        rows = slice(start, min(start + block_size, len(lost_items)))
+        lost_rows, found_rows, scores = _score_block(lost, found, rows, caches, threshold, min_shared)
+        for lost_index, found_index, score in zip(lost_rows.tolist(), found_rows.tolist(), scores.tolist()):
+            lost_id, lost_features = lost_items[lost_index]
+            found_id, found_features = found_items[found_index]
+            # Hashed token counts may collide, confirm the shared tokens on the survivors
+            if min_shared and len(set(lost_features['tokens']).intersection(found_features['tokens'])) < min_shared:
+                continue
+            matches.append((lost_id, found_id, score))
+    return matches
+
+
+def batch_score(lost_items, found_items, threshold, min_shared=1, block_size=BLOCK_SIZE):
+    """
+    Score every lost item against every found item in one pass.
+
+    `lost_items` and `found_items` are sequences of (item_id, match_features) tuples.
+    Returns (lost_id, found_id, score) tuples for the pairs scoring at least
+    `threshold`, using the same candidate rule as the stored matches: items must share
+    `min_shared` index tokens, cards must carry the same card key.
+    """
+    lost_cards = [item for item in lost_items if item[1]['type'] == 'card']
+    found_cards = [item for item in found_items if item[1]['type'] == 'card']
+    lost_things = [item for item in lost_items if item[1]['type'] != 'card']
+    found_things = [item for item in found_items if item[1]['type'] != 'card']
+
+    matches = _score_cards(lost_cards, found_cards, threshold)
+    if lost_things and found_things:
+        if np is None:
+            matches.extend(_score_items_python(lost_things, found_things, threshold, min_shared))
+        else:
+            matches.extend(_score_items_numpy(lost_things, found_things, threshold, min_shared, block_size))
+    return matches
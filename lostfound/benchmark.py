@@ -0,0 +1,368 @@
+"""
+Benchmark and regression suite for the matching engine.
+
+Synthetic lost/found corpora, timings of per-pair scoring, whole-backlog matching and
+endpoint latency, and a check that every engine returns exactly the scores of
+`reference_score`. `run_benchmarks` returns everything as a JSON-ready dict so runs
+can be saved and compared against a baseline with `compare_results`.
+"""
+import platform
+import random
+import statistics
+import time
+import uuid
+from datetime import timedelta
+from difflib import SequenceMatcher
+from django.db import transaction
+from django.utils import timezone
+from .batch_matching import batch_score, np
+from .matching import calculate_match_score, get_match_reasons, score_features
+from .models import LostItem, FoundItem, build_match_features, defer_match_refresh
+from .parallel_matching import parallel_batch_score, usable_shards
+
+ITEM_NAMES = [
+    'iPhone 12', 'iPhone 13 Pro', 'Samsung Galaxy S21', 'Samsung Phone', 'Nokia Phone', 'Car Keys',
+    'House Keys', 'Key Ring', 'Wallet', 'Leather Wallet', 'Purse', 'Handbag', 'Backpack', 'Gym Bag',
+    'Water Bottle', 'Sunglasses', 'Reading Glasses', 'Swim Goggles', 'Tennis Racket', 'Squash Racket',
+    'Golf Umbrella', 'Umbrella', 'Wrist Watch', 'Smart Watch', 'Earphones', 'AirPods', 'Laptop',
+    'Laptop Charger', 'Phone Charger', 'Jacket', 'Track Suit Top', 'Towel', 'Cap', 'Hoodie', 'Book',
+    'Notebook', 'Tablet', 'Kindle', 'Necklace', 'Bracelet', 'Ring', 'Scarf', 'Lunch Box', 'Flask',
+]
+BRANDS = [
+    'Nike', 'Adidas', 'Puma', 'Apple', 'Samsung', 'Sony', 'Casio', 'Ray-Ban', 'Wilson', 'Head',
+    'Dunlop', 'Gucci', 'Zara', 'Lenovo', 'HP', 'Dell', 'JBL', 'Garmin', 'Fossil', 'Tupperware',
+]
+COLORS = ['black', 'white', 'red', 'blue', 'green', 'yellow', 'orange', 'purple', 'pink', 'brown', 'grey', 'silver', 'gold']
+MATERIALS = ['leather', 'plastic', 'metal', 'cotton', 'nylon', 'canvas', 'rubber', 'fabric', 'suede', 'denim']
+DETAILS = [
+    'scratched on the back', 'brand new', 'quite worn', 'with stickers', 'with a name tag', 'cracked screen',
+    'in a case', 'slightly torn', 'initials engraved', 'missing a strap', 'zip is broken', 'has a keychain',
+    'with charging cable', 'sticker of a flag', 'dented corner', 'faded logo', 'with two pens inside',
+    'rubber grip', 'small stain', 'reflective stripe', 'belongs to a junior member', 'left after training',
+    'found under a bench', 'left on a chair', 'with a blue lanyard', 'with receipts inside', 'pouch attached',
+]
+LOCATIONS = [
+    'Tennis Court 1', 'Tennis Court 4', 'Squash Court', 'Gym', 'Gym Changing Room', 'Swimming Pool',
+    'Pool Side', 'Main Restaurant', 'Restaurant Terrace', 'Lobby', 'Main Lobby', 'Parking Lot',
+    'Upper Parking', 'Clubhouse', 'Clubhouse Bar', 'Reception', 'Golf Course', 'Cricket Pavilion',
+    'Hockey Pitch', 'Kids Play Area', 'Ladies Changing Room', 'Mens Changing Room', 'Sauna', 'Snooker Room',
+    'Card Room', 'Library', 'Rugby Pitch', 'Football Pitch', 'Basketball Court', 'Main Gate',
+]
+
+
+def synthetic_reports(count, seed=0, days=14, card_share=0.1):
+    """
+    Generate `count` realistic lost/found report fields without touching the database.
+
+    Names mix a brand and an item, descriptions combine a colour, a material and a couple
+    of free-text details, locations come from the club's venues, report times spread over
+    the last `days` days and `card_share` of the reports are cards.
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+    reports = []
+    for _ in range(count):
+        reported = now - timedelta(seconds=rng.randint(0, days * 24 * 3600))
+        if rng.random() < card_share:
+            card = f"{rng.choice('ABCDEFGHJK')}{rng.randint(0, 9999):04d}"
+            reports.append({'type': 'card', 'name': None, 'description': None, 'location': None,
+                            'date_reported': reported, 'card_last_four': card})
+            continue
+        name = rng.choice(ITEM_NAMES)
+        if rng.random() < 0.5:
+            name = f"{rng.choice(BRANDS)} {name}"
+        description = ' '.join([rng.choice(COLORS), rng.choice(MATERIALS)] + rng.sample(DETAILS, rng.randint(1, 3)))
+        reports.append({'type': 'item', 'name': name, 'description': description, 'location': rng.choice(LOCATIONS),
+                        'date_reported': reported, 'card_last_four': None})
+    return reports
+
+
+def synthetic_items(count, seed=0, days=14, card_share=0.1):
+    """Synthetic reports (see `synthetic_reports`) as (item_id, match_features) tuples"""
+    return [
+        (item_id, build_match_features(report['type'], report['name'], report['description'], report['location'],
+                                       report['date_reported'], report['card_last_four']))
+        for item_id, report in enumerate(synthetic_reports(count, seed, days, card_share), start=1)
+    ]
+
+
+def synthetic_lost_item(report, **fields):
+    """Unsaved LostItem for a synthetic report"""
+    return LostItem(type=report['type'], item_name=report['name'], description=report['description'],
+                    place_lost=report['location'], date_reported=report['date_reported'],
+                    card_last_four=report['card_last_four'], **fields)
+
+
+def synthetic_found_item(report, **fields):
+    """Unsaved FoundItem for a synthetic report, available to be claimed"""
+    return FoundItem(type=report['type'], item_name=report['name'], description=report['description'],
+                     place_found=report['location'], date_reported=report['date_reported'],
+                     card_last_four=report['card_last_four'], status=FoundItem.FOUND, **fields)
+
+
+def reference_score(lost, found):
+    """
+    The matching rules applied literally to two feature dicts: every ratio is computed
+    and nothing is bounded or pruned. This is the oracle faster engines are checked
+    against, so keep it in step with the weights in `score_features`.
+    """
+    if lost['type'] != found['type']:
+        return 0.0
+    if lost['type'] == 'card':
+        return 1.0 if lost['card_key'] and lost['card_key'] == found['card_key'] else 0.0
+
+    scores = [0.3]
+    total_weight = 0.3
+
+    if lost['name'] and found['name']:
+        keyword_overlap = len(set(lost['name_keywords']).intersection(found['name_keywords']))
+        keyword_score = min(1.0, keyword_overlap / max(len(lost['name_keywords']), len(found['name_keywords']), 1))
+        scores.append(max(SequenceMatcher(None, lost['name'], found['name']).ratio(), keyword_score) * 0.25)
+        total_weight += 0.25
+    elif lost['name'] or found['name']:
+        scores.append(0.1)
+        total_weight += 0.1
+
+    if lost['description'] and found['description']:
+        color_match = 1.0 if set(lost['colors']).intersection(found['colors']) else 0.0
+        scores.append(max(SequenceMatcher(None, lost['description'], found['description']).ratio(), color_match * 0.8) * 0.2)
+        total_weight += 0.2
+    elif lost['description'] or found['description']:
+        scores.append(0.05)
+        total_weight += 0.05
+
+    if lost['location'] and found['location']:
+        keyword_match = 1.0 if set(lost['location_keywords']).intersection(found['location_keywords']) else 0.0
+        scores.append(max(SequenceMatcher(None, lost['location'], found['location']).ratio(), keyword_match) * 0.15)
+        total_weight += 0.15
+    elif lost['location'] or found['location']:
+        scores.append(0.05)
+        total_weight += 0.05
+
+    time_score = max(0, 1 - abs(lost['timestamp'] - found['timestamp']) / (14 * 24 * 3600))
+    scores.append(time_score * 0.1)
+    total_weight += 0.1
+    return min(1.0, sum(scores) / total_weight)
+
+
+def _candidate_feature_pairs(lost_items, found_items, min_shared):
+    """Feature pairs the engines score: cards with any card, items sharing `min_shared` tokens"""
+    for lost_id, lost in lost_items:
+        lost_tokens = set(lost['tokens'])
+        for found_id, found in found_items:
+            if lost['type'] == 'item' and len(lost_tokens.intersection(found['tokens'])) < min_shared:
+                continue
+            yield lost_id, lost, found_id, found
+
+
+def reference_matches(lost_items, found_items, threshold, min_shared=1):
+    """Every (lost_id, found_id, score) at or above `threshold`, scored pair by pair with `reference_score`"""
+    matches = set()
+    for lost_id, lost, found_id, found in _candidate_feature_pairs(lost_items, found_items, min_shared):
+        score = reference_score(lost, found)
+        if score >= threshold:
+            matches.add((lost_id, found_id, score))
+    return matches
+
+
+def _score_features_matches(lost_items, found_items, threshold, min_shared):
+    matches = set()
+    for lost_id, lost, found_id, found in _candidate_feature_pairs(lost_items, found_items, min_shared):
+        components = score_features(lost, found, threshold)
+        if components is not None and components['score'] >= threshold:
+            matches.add((lost_id, found_id, components['score']))
+    return matches
+
+
+def check_engines(lost_items, found_items, threshold, min_shared=1, shards=1):
+    """
+    Compare every matching engine with `reference_matches` on the same backlog.
+
+    Returns {engine: {'matches', 'unexpected', 'missing', 'ok'}}; an engine is ok only
+    when it returns exactly the reference pairs with exactly the reference scores.
+    """
+    engines = {
+        'score_features': lambda: _score_features_matches(lost_items, found_items, threshold, min_shared),
+        'batch_score': lambda: set(batch_score(lost_items, found_items, threshold, min_shared)),
+    }
+    if shards > 1:
+        engines['parallel_batch_score'] = lambda: set(
+            parallel_batch_score(lost_items, found_items, threshold, min_shared, shards)
+        )
+
+    expected = reference_matches(lost_items, found_items, threshold, min_shared)
+    checks = {}
+    for engine, run in engines.items():
+        actual = run()
+        checks[engine] = {
+            'matches': len(actual),
+            'unexpected': len(actual - expected),
+            'missing': len(expected - actual),
+            'ok': actual == expected,
+        }
+    return checks
+
+
+def timed(func, *args, **kwargs):
+    """Run func once and return (result, elapsed_seconds)"""
+    started = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+def latency_summary(samples):
+    """Request count and median / p95 / max latency in milliseconds, plus total seconds"""
+    ordered = sorted(samples)
+    return {
+        'requests': len(ordered),
+        'median_ms': round(statistics.median(ordered) * 1000, 3),
+        'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 3),
+        'max_ms': round(ordered[-1] * 1000, 3),
+        'seconds': sum(ordered),
+    }
+
+
+def bench_pair_scoring(lost_reports, found_reports, pairs, seed=0):
+    """
+    Time `calculate_match_score`, `get_match_reasons` and `reference_score` on `pairs`
+    random lost/found pairs of unsaved items with their match features already built,
+    as they are when loaded from the database.
+    """
+    rng = random.Random(seed)
+    lost_items = [synthetic_lost_item(report) for report in lost_reports]
+    found_items = [synthetic_found_item(report) for report in found_reports]
+    for item in lost_items + found_items:
+        item.match_features = item.build_match_features()
+    sample = [(rng.choice(lost_items), rng.choice(found_items)) for _ in range(pairs)]
+
+    results = {}
+    for name, func in (
+        ('calculate_match_score', calculate_match_score),
+        ('get_match_reasons', get_match_reasons),
+        ('reference_score', lambda lost, found: reference_score(lost.match_features, found.match_features)),
+    ):
+        _, elapsed = timed(lambda: [func(lost, found) for lost, found in sample])
+        results[name] = {'pairs': pairs, 'seconds': elapsed, 'per_pair_us': round(elapsed / max(pairs, 1) * 1e6, 3)}
+    return results
+
+
+def bench_backlog(lost_items, found_items, threshold, min_shared=1, shards=1):
+    """Time matching a whole lost backlog against a whole found backlog with the nightly engine"""
+    shards = usable_shards(shards, len(lost_items))
+    matches, elapsed = timed(parallel_batch_score, lost_items, found_items, threshold, min_shared, shards)
+    pairs = len(lost_items) * len(found_items)
+    return {
+        'lost': len(lost_items),
+        'found': len(found_items),
+        'shards': shards,
+        'matches': len(matches),
+        'seconds': elapsed,
+        'pairs_per_second': round(pairs / max(elapsed, 1e-9)),
+    }
+
+
+class _Rollback(Exception):
+    pass
+
+
+def bench_database(lost_reports, found_reports, requests=20):
+    """
+    Time the endpoints and the nightly task against synthetic items in the database.
+
+    The items, their index entries and stored matches are created inside a transaction
+    that is always rolled back, so this is safe to run against a development database.
+    Endpoint latency is measured through the DRF test client with a staff user, the
+    same way the API tests call the views.
+    """
+    from django.contrib.auth import get_user_model
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+    from .matching import candidate_pairs, store_matches
+    from .tasks import check_for_potential_matches
+
+    results = {}
+    try:
+        with transaction.atomic():
+            with defer_match_refresh():
+                lost_items = [synthetic_lost_item(report) for report in lost_reports]
+                found_items = [synthetic_found_item(report) for report in found_reports]
+                for item in lost_items + found_items:
+                    item.save()
+            pairs = candidate_pairs(LostItem.objects.filter(status=LostItem.PENDING),
+                                    FoundItem.objects.filter(status=FoundItem.FOUND))
+            _, elapsed = timed(lambda: store_matches(pairs, batch_size=1000))
+            results['store_matches'] = {'pairs': len(pairs), 'seconds': elapsed}
+
+            _, elapsed = timed(check_for_potential_matches)
+            results['nightly_task'] = {'lost': len(lost_items), 'found': len(found_items), 'seconds': elapsed}
+
+            user = get_user_model().objects.create_user(username=f'benchmark-{uuid.uuid4().hex[:8]}', is_staff=True)
+            client = APIClient()
+            client.force_authenticate(user=user)
+            for name, url in (
+                ('generate_matches', reverse('found-generate-matches')),
+                ('lost_list', reverse('lost-list')),
+                ('found_list', reverse('found-list')),
+            ):
+                samples = []
+                for _ in range(requests):
+                    response, elapsed = timed(client.get, url)
+                    if response.status_code != 200:
+                        raise RuntimeError(f'{url} returned {response.status_code}')
+                    samples.append(elapsed)
+                results[name] = latency_summary(samples)
+            raise _Rollback
+    except _Rollback:
+        pass
+    return results
+
+
+def run_benchmarks(lost=2000, found=2000, threshold=0.7, days=7, min_shared=1, shards=1, seed=0,
+                   pairs=2000, db_items=200, requests=20, verify=200):
+    """
+    Run the whole matching benchmark suite and return its results as a JSON-ready dict.
+
+    `db_items` lost and found items are used for the database-backed timings (0 skips
+    them) and the first `verify` lost items of the backlog are checked against the
+    reference scorer (0 skips the check).
+    """
+    lost_reports = synthetic_reports(lost, seed=seed, days=days)
+    found_reports = synthetic_reports(found, seed=seed + 1, days=days)
+    lost_items = synthetic_items(lost, seed=seed, days=days)
+    found_items = synthetic_items(found, seed=seed + 1, days=days)
+
+    results = {
+        'created_at': timezone.now().isoformat(),
+        'python': platform.python_version(),
+        'engine': 'numpy' if np is not None else 'pure python',
+        'config': {
+            'lost': lost, 'found': found, 'threshold': threshold, 'days': days, 'min_shared': min_shared,
+            'shards': shards, 'seed': seed, 'pairs': pairs, 'db_items': db_items, 'requests': requests,
+            'verify': verify,
+        },
+        'timings': {},
+        'checks': {},
+    }
+    if pairs:
+        results['timings'].update(bench_pair_scoring(lost_reports, found_reports, pairs, seed))
+    results['timings']['backlog'] = bench_backlog(lost_items, found_items, threshold, min_shared, shards)
+    if db_items:
+        results['timings'].update(bench_database(lost_reports[:db_items], found_reports[:db_items], requests))
+    if verify:
+        results['checks'] = check_engines(lost_items[:verify], found_items, threshold, min_shared, shards)
+    return results
+
+
+def compare_results(results, baseline):
+    """
+    Compare two `run_benchmarks` results timing by timing.
+
+    Returns (name, baseline_seconds, seconds, ratio) rows for the timings both runs
+    recorded; a ratio below 1 means the new run was faster.
+    """
+    rows = []
+    for name, timing in results['timings'].items():
+        before = baseline.get('timings', {}).get(name)
+        if before and before.get('seconds'):
+            rows.append((name, before['seconds'], timing['seconds'], timing['seconds'] / before['seconds']))
+    return rows
@@ -2,13 +2,15 @@
 from django.core.mail import EmailMultiAlternatives
 from django.conf import settings
 from ..models import SystemSettings, EmailLog
+from ..settings_registry import ACKNOWLEDGMENT_EMAIL_TEMPLATE, MATCH_NOTIFICATION_EMAIL_TEMPLATE
 
 def send_report_acknowledgment(lost_item):
     """
     Send a customizable acknowledgment email with tracking ID and item details.
     """
     # Check if emails are enabled
-    if SystemSettings.get_setting('email_notifications_enabled', 'true').lower() != 'true':
+    config = SystemSettings.snapshot()
+    if not config.email_notifications_enabled:
         return False, "Email notifications disabled"
 
     # Check limits
@@ -16,35 +18,15 @@ def send_report_acknowledgment(lost_item):
     if not can_send:
         return False, reason
 
-    subject = SystemSettings.get_setting('acknowledgment_email_subject', 'Lost Item Report Confirmation - Parklands Sports Club')
+    subject = config.acknowledgment_email_subject
     from_email = settings.DEFAULT_FROM_EMAIL
     to_email = [lost_item.reporter_email]
 
     # Get template and replace placeholders
-    template = SystemSettings.get_setting('acknowledgment_email_template', '')
+    template = config.acknowledgment_email_template
     if not template:
         # Fallback to default
-        template = """Hello {owner_name},
-
-Thank you for reporting your lost item at Parklands Sports Club.
-Your report has been received and is being processed.
-
-Tracking ID: {tracking_id}
-
-Report Details:
-- Item Name: {item_name}
-- Description: {description}
-- Place Lost: {place_lost}
-- Reporter Member ID: {reporter_member_id}
-- Reporter Phone: {reporter_phone}
-- Reporter Email: {reporter_email}
-
-Please keep this ID safe for future reference.
-If you find a match, please visit the club reception.
-
-Best regards,
-Parklands Sports Club
-Powered by PSC ICT"""
+        template = ACKNOWLEDGMENT_EMAIL_TEMPLATE
 
     # Replace placeholders
     text_content = template.format(
@@ -96,7 +78,8 @@ def send_match_notification(lost_item, matches):
     Send a customizable email if there are potential matches for a reported lost item.
     """
     # Check if emails are enabled
-    if SystemSettings.get_setting('email_notifications_enabled', 'true').lower() != 'true':
+    config = SystemSettings.snapshot()
+    if not config.email_notifications_enabled:
         return False, "Email notifications disabled"
 
     # Check limits
@@ -104,7 +87,7 @@ def send_match_notification(lost_item, matches):
     if not can_send:
         return False, reason
 
-    subject = SystemSettings.get_setting('match_notification_email_subject', 'Potential Match Found - Parklands Sports Club')
+    subject = config.match_notification_email_subject
     from_email = settings.DEFAULT_FROM_EMAIL
     to_email = [lost_item.reporter_email]
 
@@ -118,20 +101,10 @@ def send_match_notification(lost_item, matches):
             match_details += f"  Reasons: {', '.join(match['match_reasons'])}\n"
 
     # Get template and replace placeholders
-    template = SystemSettings.get_setting('match_notification_email_template', '')
+    template = config.match_notification_email_template
     if not template:
         # Fallback to default
-        template = """Hello {owner_name},
-
-We have found {match_count} potential match(es) for your lost item (Tracking ID: {tracking_id}).
-
-{match_details}
-
-Please log in to our system or visit the club reception to review matches.
-
-Best regards,
-Parklands Sports Club
-Powered by PSC ICT"""
+        template = MATCH_NOTIFICATION_EMAIL_TEMPLATE
 
     # Replace placeholders
     text_content = template.format(
@@ -0,0 +1,227 @@
+"""
+Background follow-up work for newly reported lost and found items.
+
+Creating an item only commits the item and a queued MatchJob row. Once the transaction
+commits, the job runs on a worker thread: it prints the receipt, rescores the item's
+stored matches and emails the owners of any matches. The job row is the durable part:
+each side effect is recorded on it as soon as it is done so retries skip it, and jobs
+left queued or stuck running after a restart are picked up again by the JobSweeper
+thread the web server starts (see myproject/wsgi.py), or by the `run_match_jobs`
+management command where no server is running.
+"""
+import logging
+import threading
+from datetime import timedelta
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from .models import LostItem, MatchJob, SystemSettings
+from .matching import open_matches, refresh_potential_matches
+from .serializers import LostItemSerializer, FoundItemSerializer
+from .PackagePrinter import PackagePrinter
+from lostfound.email.lost_match import send_report_acknowledgment, send_match_notification
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 3
+
+
+def enqueue_match_job(item):
+    """Record a job for a new lost or found item and start it once the item is committed"""
+    field = 'lost_item' if isinstance(item, LostItem) else 'found_item'
+    job = MatchJob.objects.create(**{field: item})
+    transaction.on_commit(lambda: start_match_job(job.pk))
+    return job
+
+
+def start_match_job(job_id):
+    threading.Thread(target=_run_in_thread, args=(job_id,), daemon=True).start()
+
+
+def _run_in_thread(job_id):
+    try:
+        run_match_job(job_id)
+    finally:
+        connection.close()
+
+
+def _claim(job_id, statuses, **filters):
+    """Atomically move a job to running; returns the job, or None if another runner has it"""
+    job = MatchJob.objects.filter(pk=job_id, status__in=statuses, **filters).first()
+    if job is None or job.attempts >= MAX_ATTEMPTS:
+        return None
+    claimed = MatchJob.objects.filter(pk=job_id, status=job.status, attempts=job.attempts, **filters).update(
+        status=MatchJob.RUNNING, attempts=job.attempts + 1, updated_at=timezone.now()
+    )
+    if not claimed:
+        return None
+    job.refresh_from_db()
+    return job
+
+
+def run_match_job(job_id, statuses=(MatchJob.QUEUED,), **filters):
+    """Run one job if it can be claimed; returns the job or None"""
+    job = _claim(job_id, statuses, **filters)
+    if job is None:
+        return None
+
+    try:
+        if job.lost_item_id:
+            result = _process_lost_item(job)
+        else:
+            result = _process_found_item(job)
+    except Exception as e:
+        logger.exception(f"Match job {job.pk} failed on attempt {job.attempts}")
+        job.status = MatchJob.FAILED if job.attempts >= MAX_ATTEMPTS else MatchJob.QUEUED
+        job.error = str(e)
+        job.save(update_fields=['status', 'error', 'updated_at'])
+        return job
+
+    job.status = MatchJob.DONE
+    job.result = result
+    job.error = ''
+    job.save(update_fields=['status', 'result', 'error', 'updated_at'])
+    return job
+
+
+def run_pending_jobs(stale_after=timedelta(minutes=10)):
+    """Run queued jobs and jobs whose runner died; returns the jobs that ran"""
+    cutoff = timezone.now() - stale_after
+    ran = []
+    for status, filters in ((MatchJob.QUEUED, {}), (MatchJob.RUNNING, {'updated_at__lt': cutoff})):
+        job_ids = MatchJob.objects.filter(status=status, attempts__lt=MAX_ATTEMPTS, **filters).values_list('pk', flat=True)
+        for job_id in list(job_ids):
+            # The filters are checked again when claiming, so a job a live runner just took is skipped
+            job = run_match_job(job_id, statuses=(status,), **filters)
+            if job is not None:
+                ran.append(job)
+    return ran
+
+
+class JobSweeper(threading.Thread):
+    """Runs `run_pending_jobs` every `interval` seconds, starting with a sweep right away"""
+
+    def __init__(self, interval):
+        super().__init__(name='match-job-sweeper', daemon=True)
+        self.interval = interval
+        self.stopping = threading.Event()
+
+    def run(self):
+        try:
+            while True:
+                try:
+                    run_pending_jobs()
+                except Exception:
+                    logger.exception("Match job sweep failed")
+                if self.stopping.wait(self.interval):
+                    return
+        finally:
+            connection.close()
+
+    def stop(self, timeout=None):
+        self.stopping.set()
+        self.join(timeout)
+
+
+_sweeper = None
+_sweeper_lock = threading.Lock()
+
+
+def start_job_sweeper(interval=None):
+    """Start this process's JobSweeper unless one is running or MATCH_JOB_SWEEP_SECONDS is 0"""
+    global _sweeper
+    interval = interval if interval is not None else getattr(settings, 'MATCH_JOB_SWEEP_SECONDS', 60)
+    if not interval:
+        return None
+    with _sweeper_lock:
+        if _sweeper is None or not _sweeper.is_alive():
+            _sweeper = JobSweeper(interval)
+            _sweeper.start()
+        return _sweeper
+
+
+def _record_progress(job, **steps):
+    """Save finished side effects on the job at once, so a retry after a later failure skips them"""
+    job.progress.update(steps)
+    job.save(update_fields=['progress', 'updated_at'])
+
+
+def _print_once(job, print_receipt):
+    if 'printed' not in job.progress:
+        _record_progress(job, printed=bool(print_receipt()))
+    return job.progress['printed']
+
+
+def _notify_once(job, item, match_data, notified_key):
+    """Send one match email unless an earlier attempt already sent it for this counterpart"""
+    notified = job.progress.get('notified', [])
+    if notified_key in notified:
+        return
+    send_match_notification(item, [match_data])
+    _record_progress(job, notified=notified + [notified_key])
+
+
+def _process_lost_item(job):
+    lost_item = job.lost_item
+    config = SystemSettings.snapshot()
+    printed = False
+    if config.auto_print_lost_receipt:
+        printed = _print_once(job, lambda: PackagePrinter().print_lost_receipt(lost_item))
+
+    refresh_potential_matches(lost_item)
+
+    potential_matches = open_matches().filter(
+        lost_item=lost_item,
+        score__gte=config.lost_match_threshold,
+        found_item__date_reported__gte=timezone.now() - timezone.timedelta(days=config.match_days_back)
+    )
+
+    lost_data = LostItemSerializer(lost_item).data
+    matches = []
+    for match in potential_matches:
+        match_data = {
+            'lost_item': lost_data,
+            'found_item': FoundItemSerializer(match.found_item).data,
+            'match_score': match.match_score,
+            'match_reasons': match.reasons
+        }
+        matches.append(match_data)
+        if lost_item.reporter_email:
+            logger.info(f"Sending match notification for lost item {lost_item.tracking_id} to {lost_item.reporter_email}")
+            _notify_once(job, lost_item, match_data, match.found_item_id)
+
+    if lost_item.reporter_email and not job.progress.get('ack_sent'):
+        send_report_acknowledgment(lost_item)
+        _record_progress(job, ack_sent=True)
+
+    recipients = [lost_item.reporter_email] if matches and lost_item.reporter_email else []
+    return {'printed': printed, 'matches': matches, 'recipients': recipients}
+
+
+def _process_found_item(job):
+    found_item = job.found_item
+    printed = _print_once(job, lambda: PackagePrinter().print_found_receipt(found_item))
+
+    refresh_potential_matches(found_item)
+
+    similarity_threshold = SystemSettings.snapshot().found_match_threshold
+    potential_matches = open_matches().filter(found_item=found_item, score__gte=similarity_threshold)
+
+    found_data = FoundItemSerializer(found_item).data
+    matches = []
+    recipients = []
+    for match in potential_matches:
+        lost_item = match.lost_item
+        match_data = {
+            'lost_item': LostItemSerializer(lost_item).data,
+            'found_item': found_data,
+            'match_score': match.match_score,
+            'match_reasons': match.reasons,
+            'sent_to': lost_item.reporter_email
+        }
+        if lost_item.reporter_email:
+            _notify_once(job, lost_item, match_data, match.lost_item_id)
+            recipients.append(lost_item.reporter_email)
+        matches.append(match_data)
+
+    return {'printed': printed, 'matches': matches, 'recipients': sorted(set(recipients))}
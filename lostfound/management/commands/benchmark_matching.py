@@ -0,0 +1,74 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_test_environment, teardown_test_environment
+from lostfound.benchmark import compare_results, run_benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the matching engine on synthetic lost/found backlogs: per-pair scoring, '
+        'whole-backlog matching, the nightly task and endpoint latency, plus a check that '
+        'every engine returns the reference scores'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lost', type=int, default=2000, help='Number of synthetic lost items')
+        parser.add_argument('--found', type=int, default=2000, help='Number of synthetic found items')
+        parser.add_argument('--threshold', type=float, default=0.7, help='Match threshold (task default 0.7)')
+        parser.add_argument('--days', type=int, default=7, help='Days the report times spread over')
+        parser.add_argument('--min-shared', type=int, default=1, help='Shared index tokens required per pair')
+        parser.add_argument('--shards', type=int, default=1, help='Worker processes to split the lost items across')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--pairs', type=int, default=2000, help='Random pairs timed one by one (0 to skip)')
+        parser.add_argument('--db-items', type=int, default=200,
+                            help='Lost and found items written for the task and endpoint timings, '
+                                 'inside a transaction that is rolled back (0 to skip)')
+        parser.add_argument('--requests', type=int, default=20, help='Requests timed per endpoint')
+        parser.add_argument('--verify', type=int, default=200,
+                            help='Check every engine against the reference scores on the first N lost items (0 to skip)')
+        parser.add_argument('--output', help='Write the results to this JSON file')
+        parser.add_argument('--baseline', help='Compare the timings with a JSON file written by --output')
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['baseline']:
+            try:
+                with open(options['baseline']) as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Cannot read baseline {options['baseline']}: {e}")
+
+        # Lets the DRF test client through ALLOWED_HOSTS and keeps emails in memory
+        setup_test_environment()
+        try:
+            results = run_benchmarks(
+                lost=options['lost'], found=options['found'], threshold=options['threshold'],
+                days=options['days'], min_shared=options['min_shared'], shards=options['shards'],
+                seed=options['seed'], pairs=options['pairs'], db_items=options['db_items'],
+                requests=options['requests'], verify=options['verify'],
+            )
+        finally:
+            teardown_test_environment()
+
+        self.stdout.write(f"Engine: {results['engine']} (Python {results['python']})")
+        for name, timing in results['timings'].items():
+            details = ', '.join(f'{key}={value}' for key, value in timing.items() if key != 'seconds')
+            self.stdout.write(f"{name:>22}: {timing['seconds']:.3f}s ({details})")
+
+        for engine, check in results['checks'].items():
+            message = (f"{engine}: {check['matches']} matches, "
+                       f"{check['unexpected']} unexpected, {check['missing']} missing")
+            self.stdout.write(self.style.SUCCESS(message) if check['ok'] else self.style.ERROR(message))
+
+        if baseline is not None:
+            self.stdout.write(f"Against {options['baseline']}:")
+            for name, before, after, ratio in compare_results(results, baseline):
+                self.stdout.write(f"{name:>22}: {before:.3f}s -> {after:.3f}s (x{ratio:.2f})")
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+        if not all(check['ok'] for check in results['checks'].values()):
+            raise CommandError('An engine returned scores that differ from the reference scores')
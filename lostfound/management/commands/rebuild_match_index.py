@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from lostfound.models import LostItem, FoundItem, MatchToken, PotentialMatch
+from lostfound.matching import candidate_pairs, store_matches
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the match token index and the stored potential matches for open lost/found items'
+
+    def handle(self, *args, **options):
+        MatchToken.objects.all().delete()
+
+        tokens = []
+        for item in LostItem.objects.filter(type=LostItem.ITEM).iterator():
+            tokens.extend(MatchToken(token=token, lost_item=item) for token in item.get_match_tokens())
+        for item in FoundItem.objects.filter(type=FoundItem.ITEM).iterator():
+            tokens.extend(MatchToken(token=token, found_item=item) for token in item.get_match_tokens())
+        MatchToken.objects.bulk_create(tokens, batch_size=1000)
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Indexed {len(tokens)} match tokens')
+        )
+
+        PotentialMatch.objects.all().delete()
+        pairs = candidate_pairs(
+            LostItem.objects.filter(status=LostItem.PENDING),
+            FoundItem.objects.filter(status=FoundItem.FOUND)
+        )
+        matches = store_matches(pairs, batch_size=1000)
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Stored {len(matches)} potential matches from {len(pairs)} candidate pairs')
+        )
@@ -0,0 +1,19 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from lostfound.jobs import run_pending_jobs
+from lostfound.models import MatchJob
+
+
+class Command(BaseCommand):
+    help = 'Run queued match jobs and jobs left running by a worker that stopped'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stale-minutes', type=int, default=10,
+                            help='Treat running jobs not updated for this long as abandoned')
+
+    def handle(self, *args, **options):
+        jobs = run_pending_jobs(stale_after=timedelta(minutes=options['stale_minutes']))
+        failed = [job for job in jobs if job.status != MatchJob.DONE]
+        self.stdout.write(
+            self.style.SUCCESS(f'Ran {len(jobs)} match jobs ({len(failed)} failed or requeued)')
+        )
@@ -0,0 +1,473 @@
+import heapq
+from collections import Counter, defaultdict
+from difflib import SequenceMatcher
+from django.db import connection, transaction
+from django.db.models import Count, QuerySet
+from .models import LostItem, FoundItem, MatchToken, PotentialMatch, SystemSettings
+
+
+# Float tolerance so rounding in an upper bound never rejects a pair scoring exactly the threshold
+SCORE_BOUND_TOLERANCE = 1e-9
+
+
+def calculate_match_score(lost_item, found_item, threshold=None):
+    """
+    Calculate similarity score between lost and found items with improved algorithm.
+
+    With a `threshold`, returns 0.0 as soon as the pair provably cannot reach it.
+    """
+    components = calculate_match_components(lost_item, found_item, threshold)
+    return 0.0 if components is None else components['score']
+
+
+def calculate_match_components(lost_item, found_item, threshold=None):
+    """
+    Calculate the match score together with its weighted components.
+
+    Returns a dict with the final `score` and the `name_score`, `description_score`,
+    `location_score` and `time_score` sub-scores (None when a component was not used),
+    or None when a `threshold` is given and the pair scores below it.
+    """
+    return score_features(lost_item.get_match_features(), found_item.get_match_features(), threshold)
+
+
+def _reaches(score, threshold):
+    return threshold is None or score >= threshold
+
+
+def score_features(lost, found, threshold=None):
+    """
+    Score a pair from their precomputed match features (see `build_match_features`).
+
+    Per pair this is a few set intersections plus at most three SequenceMatcher calls.
+    Components are resolved cheapest first: type, time decay and keyword sets, then the
+    real_quick_ratio and quick_ratio bounds of each text field, then the full ratios.
+    A full ratio is skipped when its quick_ratio bound cannot beat the keyword score.
+    With a `threshold`, None is returned as soon as the best score still possible
+    falls below it.
+    """
+    components = {
+        'score': 0.0,
+        'name_score': None,
+        'description_score': None,
+        'location_score': None,
+        'time_score': None,
+    }
+
+    # If types do not match, stop immediately (no score)
+    if lost['type'] != found['type']:
+        return components if _reaches(0.0, threshold) else None
+
+    # Special handling for card type items - only the card number counts
+    if lost['type'] == 'card':
+        if lost['card_key'] and lost['card_key'] == found['card_key']:
+            components['score'] = 1.0
+        return components if _reaches(components['score'], threshold) else None
+
+    # Regular item matching logic. Each text field is [component, weight, lost text,
+    # found text, keyword score, best possible combined score]; a field present on one
+    # side only earns fixed partial credit instead.
+    terms = {}
+    total_weight = 0
+
+    # Type match bonus (only reached if same type)
+    terms['type'] = 0.3
+    total_weight += 0.3
+
+    fields = []
+    for component, weight, partial, lost_text, found_text in (
+        ('name_score', 0.25, 0.1, lost['name'], found['name']),
+        ('description_score', 0.2, 0.05, lost['description'], found['description']),
+        ('location_score', 0.15, 0.05, lost['location'], found['location']),
+    ):
+        if lost_text and found_text:
+            fields.append([component, weight, lost_text, found_text, 0.0, 1.0])
+            total_weight += weight
+        elif lost_text or found_text:
+            terms[component] = partial
+            total_weight += partial
+
+    # Time difference score
+    time_diff = abs(lost['timestamp'] - found['timestamp'])
+    time_score = max(0, 1 - (time_diff / (14 * 24 * 3600)))  # Decay after 14 days
+    components['time_score'] = time_score
+    terms['time'] = time_score * 0.1
+    total_weight += 0.1
+
+    def cannot_reach():
+        if threshold is None:
+            return False
+        best = sum(terms.values()) + sum(field[1] * field[5] for field in fields if field[0] not in terms)
+        return best / total_weight < threshold - SCORE_BOUND_TOLERANCE
+
+    if cannot_reach():
+        return None
+
+    # Keyword scores: name keyword overlap, shared colours, shared club location keywords
+    for field in fields:
+        if field[0] == 'name_score':
+            lost_keywords = lost['name_keywords']
+            found_keywords = found['name_keywords']
+            keyword_overlap = len(set(lost_keywords).intersection(found_keywords))
+            field[4] = min(1.0, keyword_overlap / max(len(lost_keywords), len(found_keywords), 1))
+        elif field[0] == 'description_score':
+            color_match = 1.0 if set(lost['colors']).intersection(found['colors']) else 0.0
+            field[4] = color_match * 0.8
+        else:
+            location_keyword_match = 1.0 if set(lost['location_keywords']).intersection(found['location_keywords']) else 0.0
+            field[4] = location_keyword_match
+
+    # Upper bounds of the ratios: lengths only, then character counts. Without a
+    # threshold they only pay off where a keyword score might beat the ratio.
+    matchers = {field[0]: SequenceMatcher(None, field[2], field[3]) for field in fields}
+    for bound in ('real_quick_ratio', 'quick_ratio'):
+        for field in fields:
+            if threshold is not None or (bound == 'quick_ratio' and field[4] > 0):
+                field[5] = max(field[4], getattr(matchers[field[0]], bound)())
+        if cannot_reach():
+            return None
+
+    # Full ratios, shortest strings first
+    for field in sorted(fields, key=lambda field: len(field[2]) + len(field[3])):
+        component, weight = field[0], field[1]
+        if field[5] <= field[4]:
+            # quick_ratio already proves the keyword score wins
+            combined_score = field[4]
+        else:
+            combined_score = max(matchers[component].ratio(), field[4])
+        components[component] = combined_score
+        terms[component] = combined_score * weight
+        if cannot_reach():
+            return None
+
+    # Normalize score based on available data, summing the terms in a fixed order
+    scores = [terms[key] for key in ('type', 'name_score', 'description_score', 'location_score', 'time') if key in terms]
+    if total_weight > 0:
+        final_score = sum(scores) / total_weight
+        components['score'] = min(1.0, final_score)
+    return components if _reaches(components['score'], threshold) else None
+
+
+def calculate_card_match_score(lost_item, found_item):
+    """Simplified matching algorithm for card type items - only compares card numbers."""
+    lost_card = lost_item.get_match_features()['card_key']
+    found_card = found_item.get_match_features()['card_key']
+    return 1.0 if lost_card and lost_card == found_card else 0.0
+
+
+def get_match_reasons(lost_item, found_item):
+    """Return human-readable reasons for a match with improved explanations."""
+    lost = lost_item.get_match_features()
+    found = found_item.get_match_features()
+    reasons = []
+
+    if lost['type'] != found['type']:
+        return ["Different item types (no valid match)"]
+
+    reasons.append(f"Matching type: {lost['type']}")
+
+    # Special handling for card type items
+    if lost['type'] == 'card':
+        return get_card_match_reasons(lost_item, found_item)
+
+    # Name matching reasons
+    if lost['name'] and found['name']:
+        name_ratio = SequenceMatcher(None, lost['name'], found['name']).ratio()
+        if name_ratio > 0.6:
+            reasons.append(f"Similar item names ({name_ratio:.0%} match)")
+        elif name_ratio > 0.3:
+            reasons.append(f"Some name similarity ({name_ratio:.0%} match)")
+
+        # Check for keyword matches
+        common_keywords = set(lost['name_keywords']).intersection(found['name_keywords'])
+        if common_keywords:
+            reasons.append(f"Common keywords: {', '.join(list(common_keywords)[:3])}")
+
+    # Description matching reasons
+    if lost['description'] and found['description']:
+        desc_ratio = SequenceMatcher(None, lost['description'], found['description']).ratio()
+        if desc_ratio > 0.5:
+            reasons.append(f"Similar descriptions ({desc_ratio:.0%} match)")
+        elif desc_ratio > 0.2:
+            reasons.append(f"Some description similarity ({desc_ratio:.0%} match)")
+
+        common_colors = set(lost['colors']).intersection(found['colors'])
+        if common_colors:
+            reasons.append(f"Matching colors: {', '.join(common_colors)}")
+
+    # Location matching reasons
+    if lost['location'] and found['location']:
+        loc_ratio = SequenceMatcher(None, lost['location'], found['location']).ratio()
+        if loc_ratio > 0.6:
+            reasons.append(f"Similar locations ({loc_ratio:.0%} match)")
+        elif loc_ratio > 0.3:
+            reasons.append(f"Some location similarity ({loc_ratio:.0%} match)")
+
+        common_loc_keywords = set(lost['location_keywords']).intersection(found['location_keywords'])
+        if common_loc_keywords:
+            reasons.append(f"Location context: {', '.join(common_loc_keywords)}")
+
+    # Time-based reasons with better granularity
+    time_diff = abs(lost['timestamp'] - found['timestamp'])
+    if time_diff < 2 * 3600:  # Within 2 hours
+        minutes = int(time_diff / 60)
+        reasons.append(f"Reported within {minutes} minute{'s' if minutes != 1 else ''} of each other")
+    elif time_diff < 24 * 3600:  # Within 24 hours
+        hours = int(time_diff / 3600)
+        reasons.append(f"Reported within {hours} hour{'s' if hours != 1 else ''} of each other")
+    elif time_diff < 7 * 24 * 3600:  # Within a week
+        days = int(time_diff / (24 * 3600))
+        reasons.append(f"Reported within {days} day{'s' if days != 1 else ''} of each other")
+    elif time_diff < 14 * 24 * 3600:  # Within two weeks
+        reasons.append("Reported within 2 weeks of each other")
+
+    # If no specific reasons found but items match, add a generic reason
+    if len(reasons) <= 1:  # Only the type matching reason
+        reasons.append("Potential match based on available information")
+
+    return reasons
+
+
+def get_card_match_reasons(lost_item, found_item):
+    """Simplified match reasons for card type items - only card number comparison."""
+    reasons = []
+    reasons.append("Matching type: card")
+
+    # Card number matching - only factor for cards
+    lost_card = lost_item.get_match_features()['card_key']
+    found_card = found_item.get_match_features()['card_key']
+
+    if lost_card and found_card:
+        if lost_card == found_card:
+            reasons.append(f"Exact card number match: {lost_card.lower()}")
+        else:
+            reasons.append("Different card numbers")
+    else:
+        reasons.append("Missing card number information")
+
+    return reasons
+
+
+def get_min_shared_tokens():
+    return SystemSettings.snapshot().match_min_shared_tokens
+
+
+def _item_filter(field, items):
+    """Filter kwargs selecting the given items, as a subquery when passed a queryset"""
+    if isinstance(items, QuerySet):
+        return {f'{field}__in': items.values('pk')}
+    return {f'{field}_id__in': [item.pk for item in items]}
+
+
+def _token_map(field, items):
+    """Map item id -> set of indexed tokens for the given lost or found items"""
+    tokens = defaultdict(set)
+    rows = MatchToken.objects.filter(**_item_filter(field, items)).values_list(f'{field}_id', 'token')
+    for item_id, token in rows:
+        tokens[item_id].add(token)
+    return tokens
+
+
+def candidate_found_items(lost_item, found_items, min_shared=None):
+    """Return the found items sharing enough indexed tokens with a lost item"""
+    return _candidates(lost_item, found_items, 'found_item', min_shared)
+
+
+def candidate_lost_items(found_item, lost_items, min_shared=None):
+    """Return the lost items sharing enough indexed tokens with a found item"""
+    return _candidates(found_item, lost_items, 'lost_item', min_shared)
+
+
+def _candidates(item, counterparts, field, min_shared):
+    if item.type == item.CARD:
+        # Cards only ever match on the exact card number, a single indexed lookup
+        if not item.card_key:
+            return []
+        if isinstance(counterparts, QuerySet):
+            return list(counterparts.filter(type=item.CARD, card_key=item.card_key))
+        return [other for other in counterparts if other.type == item.CARD and other.card_key == item.card_key]
+
+    tokens = item.get_match_tokens()
+    if not tokens:
+        return []
+    if min_shared is None:
+        min_shared = get_min_shared_tokens()
+
+    shared = (
+        MatchToken.objects.filter(token__in=tokens, **_item_filter(field, counterparts))
+        .values(f'{field}_id')
+        .annotate(shared=Count('token', distinct=True))
+        .filter(shared__gte=min_shared)
+        .values_list(f'{field}_id', flat=True)
+    )
+    model = LostItem if field == 'lost_item' else FoundItem
+    return list(model.objects.filter(pk__in=list(shared), type=item.type))
+
+
+def candidate_pairs(lost_items, found_items, min_shared=None):
+    """
+    Return the (lost_item, found_item) pairs worth scoring.
+
+    Item pairs must share at least `min_shared` indexed tokens, so the work grows with
+    the number of real candidates rather than with |lost| x |found|. Card pairs are
+    only paired with found cards carrying the same card key.
+    """
+    if min_shared is None:
+        min_shared = get_min_shared_tokens()
+
+    if isinstance(lost_items, QuerySet):
+        lost_tokens = _token_map('lost_item', lost_items.filter(type=LostItem.ITEM))
+    else:
+        lost_tokens = _token_map('lost_item', [lost for lost in lost_items if lost.type == LostItem.ITEM])
+    if isinstance(found_items, QuerySet):
+        found_tokens = _token_map('found_item', found_items.filter(type=FoundItem.ITEM))
+    else:
+        found_tokens = _token_map('found_item', [found for found in found_items if found.type == FoundItem.ITEM])
+
+    lost_items = list(lost_items)
+    found_items = list(found_items)
+    found_by_id = {found.pk: found for found in found_items}
+
+    postings = defaultdict(list)
+    for found_id, tokens in found_tokens.items():
+        for token in tokens:
+            postings[token].append(found_id)
+
+    found_cards = defaultdict(list)
+    for found in found_items:
+        if found.type == FoundItem.CARD and found.card_key:
+            found_cards[found.card_key].append(found)
+
+    pairs = []
+    for lost in lost_items:
+        if lost.type == LostItem.CARD:
+            pairs.extend((lost, found) for found in found_cards.get(lost.card_key, ()))
+            continue
+
+        shared = Counter()
+        for token in lost_tokens.get(lost.pk, ()):
+            shared.update(postings.get(token, ()))
+        pairs.extend(
+            (lost, found_by_id[found_id])
+            for found_id, count in shared.items()
+            if count >= min_shared
+        )
+    return pairs
+
+
+# Every reader of the stored matches filters them by one of these settings
+STORED_MATCH_THRESHOLD_SETTINGS = (
+    'lost_match_threshold', 'found_match_threshold', 'generate_match_threshold', 'print_match_threshold',
+)
+
+# Columns rewritten when a stored pair is scored again
+MATCH_SCORE_FIELDS = [
+    'score', 'name_score', 'description_score', 'location_score', 'time_score', 'reasons', 'updated_at',
+]
+
+
+def stored_match_threshold():
+    """
+    Lowest score worth storing: pairs below every reader's threshold would never be read.
+    After lowering one of STORED_MATCH_THRESHOLD_SETTINGS, run `rebuild_match_index` to
+    store the pairs that now qualify.
+    """
+    config = SystemSettings.snapshot()
+    return min(config[key] for key in STORED_MATCH_THRESHOLD_SETTINGS)
+
+
+def build_potential_match(lost_item, found_item, threshold=None):
+    """
+    Score a pair and return an unsaved PotentialMatch carrying its components and reasons,
+    or None when it scores below `threshold`
+    """
+    components = calculate_match_components(lost_item, found_item, threshold)
+    if components is None:
+        return None
+    return PotentialMatch(
+        lost_item=lost_item,
+        found_item=found_item,
+        reasons=get_match_reasons(lost_item, found_item) if components['score'] > 0 else [],
+        **components
+    )
+
+
+def refresh_potential_matches(item):
+    """
+    Recompute the stored matches of a single lost or found item.
+
+    Only pairs involving `item` are touched: its old rows are dropped and, while the item
+    is still open (pending lost / available found), its candidates are rescored and those
+    reaching stored_match_threshold() are stored.
+    """
+    with transaction.atomic():
+        if isinstance(item, LostItem):
+            PotentialMatch.objects.filter(lost_item=item).delete()
+            if item.status != LostItem.PENDING:
+                return []
+            counterparts = FoundItem.objects.filter(status=FoundItem.FOUND)
+            pairs = [(item, found) for found in candidate_found_items(item, counterparts)]
+        else:
+            PotentialMatch.objects.filter(found_item=item).delete()
+            if item.status != FoundItem.FOUND:
+                return []
+            counterparts = LostItem.objects.filter(status=LostItem.PENDING)
+            pairs = [(lost, item) for lost in candidate_lost_items(item, counterparts)]
+
+        return store_matches(pairs)
+
+
+def store_matches(pairs, batch_size=None):
+    """
+    Score candidate (lost, found) pairs and save those reaching stored_match_threshold().
+
+    A pair that is already stored, e.g. by a concurrent refresh of the other item, has its
+    scores overwritten instead of failing on the (lost_item, found_item) unique constraint.
+    """
+    threshold = stored_match_threshold()
+    matches = (build_potential_match(lost, found, threshold) for lost, found in pairs)
+    # MySQL upserts on any unique key and rejects an explicit conflict target
+    unique_fields = ['lost_item', 'found_item'] if connection.features.supports_update_conflicts_with_target else None
+    return PotentialMatch.objects.bulk_create(
+        [match for match in matches if match is not None],
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=unique_fields,
+        update_fields=MATCH_SCORE_FIELDS,
+    )
+
+
+def open_matches():
+    """Stored matches whose lost item is still pending and whose found item is still available"""
+    return PotentialMatch.objects.filter(
+        lost_item__status=LostItem.PENDING,
+        found_item__status=FoundItem.FOUND,
+    ).select_related('lost_item', 'found_item').order_by('-score')
+
+
+def select_top_matches(matches, limit=None, per_lost_item=None):
+    """
+    Pick the best stored matches with bounded heaps instead of sorting them all.
+
+    `matches` is an iterable of (match_id, lost_item_id, found_item_id, score) rows in any
+    order. At most `per_lost_item` rows are kept for each lost item, then at most `limit`
+    overall. Memory stays proportional to what is kept, not to the rows streamed through.
+    Returns the kept rows best first, ties broken by item ids.
+    """
+    def key(row):
+        return (row[3], -row[1], -row[2])
+
+    if per_lost_item is not None:
+        heaps = defaultdict(list)
+        for row in matches:
+            heap = heaps[row[1]]
+            entry = (key(row), row)
+            if len(heap) < per_lost_item:
+                heapq.heappush(heap, entry)
+            elif entry > heap[0]:
+                heapq.heapreplace(heap, entry)
+        matches = (row for heap in heaps.values() for _, row in heap)
+
+    if limit is not None:
+        return heapq.nlargest(limit, matches, key=key)
+    return sorted(matches, key=key, reverse=True)
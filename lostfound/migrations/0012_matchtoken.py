@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:39
+
+import re
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Frozen copy of lostfound.models.tokenize_for_matching as of this migration
+MATCH_TOKEN_RE = re.compile(r'[a-z0-9]+')
+MATCH_STOP_WORDS = {
+    'a', 'an', 'and', 'at', 'by', 'for', 'from', 'in', 'is', 'it', 'my',
+    'near', 'of', 'on', 'or', 'the', 'to', 'with', 'found', 'lost',
+}
+
+
+def tokenize_for_matching(*values):
+    tokens = set()
+    for value in values:
+        if not isinstance(value, str):
+            continue
+        for token in MATCH_TOKEN_RE.findall(value.lower()):
+            if len(token) > 1 and token not in MATCH_STOP_WORDS:
+                tokens.add(token[:50])
+    return tokens
+
+
+def index_existing_items(apps, schema_editor):
+    """Build match tokens for the items reported before the index existed"""
+    LostItem = apps.get_model('lostfound', 'LostItem')
+    FoundItem = apps.get_model('lostfound', 'FoundItem')
+    MatchToken = apps.get_model('lostfound', 'MatchToken')
+
+    tokens = []
+    for item in LostItem.objects.filter(type='item').iterator():
+        for token in tokenize_for_matching(item.item_name, item.description, item.place_lost):
+            tokens.append(MatchToken(token=token, lost_item_id=item.pk))
+    for item in FoundItem.objects.filter(type='item').iterator():
+        for token in tokenize_for_matching(item.item_name, item.description, item.place_found):
+            tokens.append(MatchToken(token=token, found_item_id=item.pk))
+    MatchToken.objects.bulk_create(tokens, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lostfound', '0011_alter_founditem_card_last_four_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MatchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(db_index=True, max_length=50)),
+                ('found_item', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='match_tokens', to='lostfound.founditem')),
+                ('lost_item', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='match_tokens', to='lostfound.lostitem')),
+            ],
+        ),
+        migrations.RunPython(index_existing_items, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# The table is created empty. Existing items are scored by running
+# `manage.py rebuild_match_index` after migrating; see api_documentation.md.
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lostfound', '0012_matchtoken'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PotentialMatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(db_index=True)),
+                ('name_score', models.FloatField(blank=True, null=True)),
+                ('description_score', models.FloatField(blank=True, null=True)),
+                ('location_score', models.FloatField(blank=True, null=True)),
+                ('time_score', models.FloatField(blank=True, null=True)),
+                ('reasons', models.JSONField(blank=True, default=list)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('found_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='potential_matches', to='lostfound.founditem')),
+                ('lost_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='potential_matches', to='lostfound.lostitem')),
+            ],
+            options={
+                'ordering': ['-score'],
+                'unique_together': {('lost_item', 'found_item')},
+            },
+        ),
+    ]
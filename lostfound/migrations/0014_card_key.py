@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:41
+
+from django.db import migrations, models
+
+
+# Frozen copy of lostfound.models.normalize_card_number as of this migration
+def normalize_card_number(value):
+    if not isinstance(value, str):
+        return None
+    return value.strip().upper() or None
+
+
+def populate_card_keys(apps, schema_editor):
+    for model_name in ('LostItem', 'FoundItem'):
+        model = apps.get_model('lostfound', model_name)
+        for item in model.objects.exclude(card_last_four__isnull=True).iterator():
+            model.objects.filter(pk=item.pk).update(card_key=normalize_card_number(item.card_last_four))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lostfound', '0013_potentialmatch'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='founditem',
+            name='card_key',
+            field=models.CharField(blank=True, db_index=True, editable=False, help_text='Normalised card_last_four used for exact card lookups', max_length=6, null=True),
+        ),
+        migrations.AddField(
+            model_name='lostitem',
+            name='card_key',
+            field=models.CharField(blank=True, db_index=True, editable=False, help_text='Normalised card_last_four used for exact card lookups', max_length=6, null=True),
+        ),
+        migrations.RunPython(populate_card_keys, migrations.RunPython.noop),
+    ]
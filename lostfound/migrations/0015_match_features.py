@@ -0,0 +1,91 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:42
+
+import re
+from django.db import migrations, models
+
+
+# Frozen copies of lostfound.models.build_match_features and its helpers as of this migration
+MATCH_TOKEN_RE = re.compile(r'[a-z0-9]+')
+MATCH_STOP_WORDS = {
+    'a', 'an', 'and', 'at', 'by', 'for', 'from', 'in', 'is', 'it', 'my',
+    'near', 'of', 'on', 'or', 'the', 'to', 'with', 'found', 'lost',
+}
+
+
+def tokenize_for_matching(*values):
+    tokens = set()
+    for value in values:
+        if not isinstance(value, str):
+            continue
+        for token in MATCH_TOKEN_RE.findall(value.lower()):
+            if len(token) > 1 and token not in MATCH_STOP_WORDS:
+                tokens.add(token[:50])
+    return tokens
+
+
+def normalize_card_number(value):
+    if not isinstance(value, str):
+        return None
+    return value.strip().upper() or None
+
+
+MATCH_COLORS = ['black', 'white', 'red', 'blue', 'green', 'yellow', 'orange', 'purple', 'pink', 'brown', 'gray', 'grey']
+MATCH_LOCATION_KEYWORDS = ['tennis', 'court', 'gym', 'pool', 'restaurant', 'lobby', 'parking', 'clubhouse']
+
+
+def _normalize_text(value):
+    return value.lower().strip() if isinstance(value, str) else ""
+
+
+def build_match_features(item_type, name, description, location, date_reported, card_last_four=None):
+    name = _normalize_text(name)
+    description = _normalize_text(description)
+    location = _normalize_text(location)
+    return {
+        'type': item_type,
+        'card_key': normalize_card_number(card_last_four),
+        'name': name,
+        'name_keywords': sorted(set(name.split())),
+        'description': description,
+        'colors': [color for color in MATCH_COLORS if color in description],
+        'location': location,
+        'location_keywords': [keyword for keyword in MATCH_LOCATION_KEYWORDS if keyword in location],
+        'tokens': sorted(tokenize_for_matching(name, description, location)) if item_type == 'item' else [],
+        'timestamp': date_reported.timestamp() if date_reported else 0.0,
+    }
+
+
+def populate_match_features(apps, schema_editor):
+    for model_name, location_field in (('LostItem', 'place_lost'), ('FoundItem', 'place_found')):
+        model = apps.get_model('lostfound', model_name)
+        for item in model.objects.iterator():
+            features = build_match_features(
+                item.type,
+                item.item_name,
+                item.description,
+                getattr(item, location_field),
+                item.date_reported,
+                item.card_last_four,
+            )
+            model.objects.filter(pk=item.pk).update(match_features=features)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lostfound', '0014_card_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='founditem',
+            name='match_features',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Normalised name, keywords, colours, location keywords and timestamp used by the matcher'),
+        ),
+        migrations.AddField(
+            model_name='lostitem',
+            name='match_features',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Normalised name, keywords, colours, location keywords and timestamp used by the matcher'),
+        ),
+        migrations.RunPython(populate_match_features, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:27
+
+import re
+from django.db import migrations, models
+
+
+# Frozen copy of users.identifiers.normalize_phone as of this migration
+def normalize_phone(value):
+    if not isinstance(value, str):
+        return None
+    return re.sub(r'\D', '', value)[-9:] or None
+
+
+# Frozen copy of users.identifiers.normalize_member_id as of this migration
+def normalize_member_id(value):
+    if not isinstance(value, str):
+        return None
+    return re.sub(r'\s', '', value).upper() or None
+
+
+def populate_lookup_keys(apps, schema_editor):
+    LostItem = apps.get_model('lostfound', 'LostItem')
+    items = LostItem.objects.exclude(reporter_phone__isnull=True, reporter_member_id__isnull=True)
+    for item in items.iterator():
+        LostItem.objects.filter(pk=item.pk).update(
+            reporter_phone_key=normalize_phone(item.reporter_phone),
+            reporter_member_key=normalize_member_id(item.reporter_member_id),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lostfound', '0016_matchjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lostitem',
+            name='reporter_member_key',
+            field=models.CharField(blank=True, db_index=True, editable=False, help_text='Normalised reporter_member_id used for person lookups', max_length=20, null=True),
+        ),
+        migrations.AddField(
+            model_name='lostitem',
+            name='reporter_phone_key',
+            field=models.CharField(blank=True, db_index=True, editable=False, help_text='Normalised reporter_phone used for person lookups', max_length=9, null=True),
+        ),
+        migrations.RunPython(populate_lookup_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lostfound', '0018_hot_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='matchjob',
+            name='progress',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
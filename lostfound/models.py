@@ -1,9 +1,90 @@
-from django.db import models
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+from django.db import connection, models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.utils import timezone
 from django.contrib.auth import get_user_model
+import re
 import uuid
+from users.identifiers import normalize_member_id, normalize_phone
+from .settings_registry import SettingsSnapshot
 User = get_user_model()
 
+MATCH_TOKEN_RE = re.compile(r'[a-z0-9]+')
+MATCH_STOP_WORDS = {
+    'a', 'an', 'and', 'at', 'by', 'for', 'from', 'in', 'is', 'it', 'my',
+    'near', 'of', 'on', 'or', 'the', 'to', 'with', 'found', 'lost',
+}
+
+
+def tokenize_for_matching(*values):
+    """Return the set of normalised match tokens found in the given text values"""
+    tokens = set()
+    for value in values:
+        if not isinstance(value, str):
+            continue
+        for token in MATCH_TOKEN_RE.findall(value.lower()):
+            if len(token) > 1 and token not in MATCH_STOP_WORDS:
+                tokens.add(token[:50])
+    return tokens
+
+
+def normalize_card_number(value):
+    """Card number as compared by the matcher, or None when there is nothing to compare"""
+    if not isinstance(value, str):
+        return None
+    return value.strip().upper() or None
+
+
+MATCH_COLORS = ['black', 'white', 'red', 'blue', 'green', 'yellow', 'orange', 'purple', 'pink', 'brown', 'gray', 'grey']
+MATCH_LOCATION_KEYWORDS = ['tennis', 'court', 'gym', 'pool', 'restaurant', 'lobby', 'parking', 'clubhouse']
+
+
+def _normalize_text(value):
+    return value.lower().strip() if isinstance(value, str) else ""
+
+
+def build_match_features(item_type, name, description, location, date_reported, card_last_four=None):
+    """
+    Precompute everything the matcher needs from one lost or found item.
+
+    The result is JSON-serialisable so it can be stored on the item and shipped to
+    worker processes; sets are kept as sorted lists.
+    """
+    name = _normalize_text(name)
+    description = _normalize_text(description)
+    location = _normalize_text(location)
+    return {
+        'type': item_type,
+        'card_key': normalize_card_number(card_last_four),
+        'name': name,
+        'name_keywords': sorted(set(name.split())),
+        'description': description,
+        'colors': [color for color in MATCH_COLORS if color in description],
+        'location': location,
+        'location_keywords': [keyword for keyword in MATCH_LOCATION_KEYWORDS if keyword in location],
+        'tokens': sorted(tokenize_for_matching(name, description, location)) if item_type == 'item' else [],
+        'timestamp': date_reported.timestamp() if date_reported else 0.0,
+    }
+
+
+_match_refresh_deferred = ContextVar('match_refresh_deferred', default=False)
+
+
+@contextmanager
+def defer_match_refresh():
+    """Save lost/found items without rescoring their stored matches; the caller refreshes them later"""
+    token = _match_refresh_deferred.set(True)
+    try:
+        yield
+    finally:
+        _match_refresh_deferred.reset(token)
+
+
 class BaseItem(models.Model):
     CARD = 'card'
     ITEM = 'item'
@@ -26,9 +107,58 @@ class BaseItem(models.Model):
     owner_name = models.CharField(max_length=100, blank=True, null=True)
     date_reported = models.DateTimeField(default=timezone.now)
     last_updated = models.DateTimeField(auto_now=True)
-    
+    card_key = models.CharField(max_length=6, blank=True, null=True, db_index=True, editable=False,
+                                help_text='Normalised card_last_four used for exact card lookups')
+    match_features = models.JSONField(default=dict, blank=True, editable=False,
+                                      help_text='Normalised name, keywords, colours, location keywords and timestamp used by the matcher')
+
+    # Fields whose text feeds the match token index (set on subclasses)
+    MATCH_INDEX_FIELDS = ()
+    # Fields that change the stored potential matches of an item when edited
+    MATCH_SCORE_FIELDS = ('type', 'status', 'card_last_four', 'date_reported')
+
     class Meta:
         abstract = True
+        indexes = [
+            # Open items reported within the matching window, and date-range reports
+            models.Index(fields=['status', 'date_reported'], name='%(class)s_status_date_idx'),
+            models.Index(fields=['date_reported'], name='%(class)s_date_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.card_key = normalize_card_number(self.card_last_four)
+        self.match_features = self.build_match_features()
+        update_fields = kwargs.get('update_fields')
+        changed = set(update_fields) if update_fields is not None else None
+        if changed is not None and changed & {*self.MATCH_SCORE_FIELDS, *self.MATCH_INDEX_FIELDS}:
+            kwargs['update_fields'] = changed | {'card_key', 'match_features'}
+        super().save(*args, **kwargs)
+        if changed is None or changed & {'type', *self.MATCH_INDEX_FIELDS}:
+            MatchToken.index_item(self)
+        if _match_refresh_deferred.get():
+            return
+        if changed is None or changed & {*self.MATCH_SCORE_FIELDS, *self.MATCH_INDEX_FIELDS}:
+            from .matching import refresh_potential_matches
+            refresh_potential_matches(self)
+
+    def build_match_features(self):
+        name_field, description_field, location_field = self.MATCH_INDEX_FIELDS
+        return build_match_features(
+            self.type,
+            getattr(self, name_field),
+            getattr(self, description_field),
+            getattr(self, location_field),
+            self.date_reported,
+            self.card_last_four,
+        )
+
+    def get_match_features(self):
+        """Stored match features, built on the fly for items that have not been saved yet"""
+        return self.match_features or self.build_match_features()
+
+    def get_match_tokens(self):
+        """Tokens used for candidate retrieval; card items are matched on card number instead"""
+        return set(self.get_match_features()['tokens'])
 
 class LostItem(BaseItem):
     item_name = models.CharField(max_length=100, blank=True, null=True)
@@ -41,10 +171,26 @@ class LostItem(BaseItem):
     reported_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='lost_items')
     tracking_id = models.CharField(max_length=50, unique=True, blank=True, null=True)
     photo = models.ImageField(upload_to="lost_items/photos/", blank=True, null=True)
+    reporter_phone_key = models.CharField(max_length=9, blank=True, null=True, db_index=True, editable=False,
+                                          help_text='Normalised reporter_phone used for person lookups')
+    reporter_member_key = models.CharField(max_length=20, blank=True, null=True, db_index=True, editable=False,
+                                           help_text='Normalised reporter_member_id used for person lookups')
+
+    MATCH_INDEX_FIELDS = ('item_name', 'description', 'place_lost')
 
     def save(self, *args, **kwargs):
         if not self.tracking_id:
             self.tracking_id = f"LI-{uuid.uuid4().hex[:8].upper()}"
+        self.reporter_phone_key = normalize_phone(self.reporter_phone)
+        self.reporter_member_key = normalize_member_id(self.reporter_member_id)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            if 'reporter_phone' in update_fields:
+                update_fields.add('reporter_phone_key')
+            if 'reporter_member_id' in update_fields:
+                update_fields.add('reporter_member_key')
+            kwargs['update_fields'] = update_fields
         super().save(*args, **kwargs)
 
 
@@ -63,19 +209,107 @@ class FoundItem(BaseItem):
     reported_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='found_items')
     photo = models.ImageField(upload_to="found_items/photos/", blank=True, null=True) 
 
+    MATCH_INDEX_FIELDS = ('item_name', 'description', 'place_found')
+
     def __str__(self):
         if self.type == self.CARD:
             return f"Found Card ({self.card_last_four})"
         return f"Found {self.item_name}"
 
 
+class MatchToken(models.Model):
+    """Inverted index entry linking a match token to the lost or found item it appears in"""
+    token = models.CharField(max_length=50, db_index=True)
+    lost_item = models.ForeignKey(LostItem, on_delete=models.CASCADE, null=True, blank=True, related_name='match_tokens')
+    found_item = models.ForeignKey(FoundItem, on_delete=models.CASCADE, null=True, blank=True, related_name='match_tokens')
+
+    def __str__(self):
+        return f"{self.token} -> {self.lost_item_id or self.found_item_id}"
+
+    @classmethod
+    def index_item(cls, item):
+        """Replace the index entries of a lost or found item with its current tokens"""
+        item_field = 'lost_item' if isinstance(item, LostItem) else 'found_item'
+        cls.objects.filter(**{item_field: item}).delete()
+        cls.objects.bulk_create([
+            cls(token=token, **{item_field: item})
+            for token in item.get_match_tokens()
+        ])
+
+
+class PotentialMatch(models.Model):
+    """Stored score and explanation for a lost/found pair, kept current as items change"""
+    lost_item = models.ForeignKey(LostItem, on_delete=models.CASCADE, related_name='potential_matches')
+    found_item = models.ForeignKey(FoundItem, on_delete=models.CASCADE, related_name='potential_matches')
+    score = models.FloatField(db_index=True)
+    name_score = models.FloatField(blank=True, null=True)
+    description_score = models.FloatField(blank=True, null=True)
+    location_score = models.FloatField(blank=True, null=True)
+    time_score = models.FloatField(blank=True, null=True)
+    reasons = models.JSONField(default=list, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('lost_item', 'found_item')
+        ordering = ['-score']
+
+    def __str__(self):
+        return f"{self.lost_item} <-> {self.found_item} ({self.score:.0%})"
+
+    @property
+    def match_score(self):
+        """Score as a percentage, the form used in API responses and emails"""
+        return round(self.score * 100, 2)
+
+
+class MatchJob(models.Model):
+    """
+    Durable record of the follow-up work for a newly reported item.
+
+    Printing the receipt, matching and emailing run in the background once the item is
+    committed; `result` then holds the matches found so clients can poll the job.
+    `progress` records the side effects already done (receipt printed, emails sent), so
+    a retried attempt does not print or email twice.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    lost_item = models.ForeignKey(LostItem, on_delete=models.CASCADE, null=True, blank=True, related_name='match_jobs')
+    found_item = models.ForeignKey(FoundItem, on_delete=models.CASCADE, null=True, blank=True, related_name='match_jobs')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED, db_index=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    result = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True, default='')
+    progress = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['created_at']
+
+    def __str__(self):
+        return f"Match job {self.pk} ({self.status}) for {self.lost_item or self.found_item}"
+
+    @property
+    def item(self):
+        return self.lost_item or self.found_item
+
 
 class PickupLog(models.Model):
     item = models.ForeignKey(FoundItem, on_delete=models.CASCADE, related_name='pickup_logs')
     picked_by_member_id = models.CharField(max_length=20)
     picked_by_name = models.CharField(max_length=100)
     picked_by_phone = models.CharField(max_length=20)
-    pickup_date = models.DateTimeField(default=timezone.now)
+    pickup_date = models.DateTimeField(default=timezone.now, db_index=True)
     verified_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
 
     def __str__(self):
@@ -92,7 +326,7 @@ class EmailLog(models.Model):
     email_type = models.CharField(max_length=20, choices=EMAIL_TYPES)
     recipient = models.EmailField()
     lost_item = models.ForeignKey(LostItem, on_delete=models.CASCADE, null=True, blank=True)
-    sent_at = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(default=timezone.now, db_index=True)
     subject = models.CharField(max_length=255)
 
     def __str__(self):
@@ -104,12 +338,13 @@ class EmailLog(models.Model):
         from django.utils import timezone
         from datetime import timedelta
 
-        max_per_day = int(SystemSettings.get_setting('max_auto_emails_per_day', 50))
-        max_per_item = int(SystemSettings.get_setting('max_auto_emails_per_item', 3))
+        config = SystemSettings.snapshot()
+        max_per_day = config.max_auto_emails_per_day
+        max_per_item = config.max_auto_emails_per_item
 
-        # Check daily limit
-        today = timezone.now().date()
-        daily_count = cls.objects.filter(sent_at__date=today).count()
+        # Check daily limit; a range on sent_at, unlike sent_at__date, can use its index
+        day_start = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+        daily_count = cls.objects.filter(sent_at__gte=day_start, sent_at__lt=day_start + timedelta(days=1)).count()
         if daily_count >= max_per_day:
             return False, "Daily email limit reached"
 
@@ -122,6 +357,64 @@ class EmailLog(models.Model):
         return True, "OK"
 
 
+class _SettingsCache:
+    """
+    Process-local copy of every SystemSettings row.
+
+    All rows are loaded in one query, together with a version stamp (row count and
+    latest updated_at). Saves and deletes made through the ORM in this process drop
+    the copy straight away via signals. Changes made by other processes (Waitress
+    workers, Celery, management commands) are picked up by comparing the stamp with
+    the database, at most once every SYSTEM_SETTINGS_CACHE_SECONDS. Inside a
+    transaction the stamp is checked on every read, since a rollback sends no signal.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = None
+        self.version = None
+        self.checked_at = 0.0
+        self.snapshot = None
+
+    def invalidate(self):
+        with self.lock:
+            self.values = None
+            self.snapshot = None
+
+    def current_version(self):
+        stamp = SystemSettings.objects.aggregate(count=models.Count('pk'), updated=models.Max('updated_at'))
+        return stamp['count'], stamp['updated']
+
+    def get_values(self):
+        now = time.monotonic()
+        interval = getattr(settings, 'SYSTEM_SETTINGS_CACHE_SECONDS', 5)
+        with self.lock:
+            values = self.values
+            if values is not None:
+                if now - self.checked_at < interval and not connection.in_atomic_block:
+                    return values
+                if self.current_version() == self.version:
+                    self.checked_at = now
+                    return values
+
+            rows = list(SystemSettings.objects.values_list('key', 'value', 'updated_at'))
+            self.values = {key: value for key, value, _ in rows}
+            self.snapshot = None
+            self.version = (len(rows), max((updated for _, _, updated in rows), default=None))
+            self.checked_at = now
+            return self.values
+
+    def get_snapshot(self):
+        values = self.get_values()
+        with self.lock:
+            if self.snapshot is None or self.snapshot[0] is not values:
+                self.snapshot = (values, SettingsSnapshot(values))
+            return self.snapshot[1]
+
+
+_settings_cache = _SettingsCache()
+
+
 class SystemSettings(models.Model):
     """Model for configurable system settings"""
     key = models.CharField(max_length=100, unique=True)
@@ -134,11 +427,23 @@ class SystemSettings(models.Model):
 
     @classmethod
     def get_setting(cls, key, default=None):
-        """Get a setting value by key"""
-        try:
-            return cls.objects.get(key=key).value
-        except cls.DoesNotExist:
-            return default
+        """Get a setting value by key, served from the process-local settings cache"""
+        return _settings_cache.get_values().get(key, default)
+
+    @classmethod
+    def snapshot(cls):
+        """
+        Every setting parsed to its registry type, as an immutable SettingsSnapshot.
+
+        Take one at the start of a request or task and read settings from it, e.g.
+        `SystemSettings.snapshot().match_days_back`.
+        """
+        return _settings_cache.get_snapshot()
+
+    @classmethod
+    def invalidate_cache(cls):
+        """Drop this process's cached settings so the next read reloads them"""
+        _settings_cache.invalidate()
 
     @classmethod
     def set_setting(cls, key, value, description=""):
@@ -151,4 +456,10 @@ class SystemSettings(models.Model):
             setting.value = value
             setting.description = description
             setting.save()
+        cls.invalidate_cache()
         return setting
+
+
+@receiver([post_save, post_delete], sender=SystemSettings)
+def invalidate_settings_cache(sender, **kwargs):
+    _settings_cache.invalidate()
@@ -0,0 +1,76 @@
+"""
+Sharded batch matching over a process pool, for the nightly match task.
+
+The lost backlog is dealt round-robin into shards, and each worker process scores its
+shard against the whole found backlog with `batch_score`. Workers only ever receive
+plain (item_id, match_features) tuples: the found backlog once, when the worker starts,
+and one shard of the lost backlog per job. Nothing from Django is imported at module
+level so spawned workers can load this module before Django is set up.
+"""
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Per-worker state, set by _init_worker
+_found_items = None
+_threshold = None
+_min_shared = None
+
+
+def _init_worker(found_items, threshold, min_shared):
+    global _found_items, _threshold, _min_shared
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+    _found_items, _threshold, _min_shared = found_items, threshold, min_shared
+
+
+def _score_shard(lost_items):
+    from .batch_matching import batch_score
+    return batch_score(lost_items, _found_items, _threshold, _min_shared)
+
+
+def rank_matches(matches):
+    """Order (lost_id, found_id, score) tuples best first, ties by item ids"""
+    return sorted(matches, key=lambda match: (-match[2], match[0], match[1]))
+
+
+def usable_shards(shards, lost_count):
+    """
+    Number of shards parallel_batch_score will actually use for `lost_count` lost items:
+    at most one per item, and one when running inside a daemonic process (a prefork
+    Celery worker cannot start children).
+    """
+    shards = max(1, min(shards, lost_count))
+    if shards > 1 and multiprocessing.current_process().daemon:
+        logger.warning(
+            f"Daemonic process cannot start match workers, scoring {lost_count} lost items in-process; "
+            f"run the Celery worker with --pool=solo or --pool=threads for {shards} shards"
+        )
+        return 1
+    return shards
+
+
+def parallel_batch_score(lost_items, found_items, threshold, min_shared=1, shards=1):
+    """
+    Score the lost backlog against the found backlog across `shards` worker processes.
+
+    Takes and returns the same tuples as `batch_score`, merged and ranked best first.
+    Uses usable_shards(shards, len(lost_items)) processes; with a single shard everything
+    is scored in this process instead.
+    """
+    from .batch_matching import batch_score
+
+    shards = usable_shards(shards, len(lost_items))
+    if shards == 1:
+        return rank_matches(batch_score(lost_items, found_items, threshold, min_shared))
+
+    chunks = [lost_items[shard::shards] for shard in range(shards)]
+    with ProcessPoolExecutor(
+        max_workers=shards, initializer=_init_worker, initargs=(found_items, threshold, min_shared)
+    ) as executor:
+        results = list(executor.map(_score_shard, chunks))
+    return rank_matches([match for shard_matches in results for match in shard_matches])
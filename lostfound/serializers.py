@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import LostItem, FoundItem, PickupLog, SystemSettings
+from .models import LostItem, FoundItem, PickupLog, SystemSettings, MatchJob
 import re
 
 class DailyCountSerializer(serializers.Serializer):
@@ -9,7 +9,7 @@ class DailyCountSerializer(serializers.Serializer):
 class LostItemSerializer(serializers.ModelSerializer):
     class Meta:
         model = LostItem
-        fields = '__all__'
+        exclude = ('match_features', 'reporter_phone_key', 'reporter_member_key')
         read_only_fields = ('date_reported', 'last_updated', 'status', 'reported_by', 'tracking_id')
 
     def validate_reporter_email(self, value):
@@ -38,7 +38,7 @@ class LostItemSerializer(serializers.ModelSerializer):
 class FoundItemSerializer(serializers.ModelSerializer):
     class Meta:
         model = FoundItem
-        fields = '__all__'
+        exclude = ('match_features',)
         read_only_fields = ('date_reported', 'last_updated', 'reported_by')
 
     def validate_card_last_four(self, value):
@@ -90,3 +90,9 @@ class SystemSettingsSerializer(serializers.ModelSerializer):
         model = SystemSettings
         fields = '__all__'
         read_only_fields = ('updated_at',)
+
+class MatchJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = MatchJob
+        fields = ['id', 'status', 'attempts', 'result', 'error', 'progress', 'created_at', 'updated_at', 'lost_item', 'found_item']
+        read_only_fields = fields
@@ -0,0 +1,196 @@
+"""
+Known SystemSettings keys with their type, default and validation.
+
+SETTINGS is the single list of configurable keys: `create_default_settings` seeds the
+database from it, `SystemSettings.snapshot()` parses stored values with it and the bulk
+settings endpoint validates changes against it. Values are still stored as strings.
+"""
+import logging
+from types import MappingProxyType
+
+logger = logging.getLogger(__name__)
+
+TRUE_VALUES = {'true', '1', 'yes', 'on'}
+FALSE_VALUES = {'false', '0', 'no', 'off'}
+
+
+def between(low, high):
+    def validate(value):
+        if not low <= value <= high:
+            raise ValueError(f"must be between {low} and {high}")
+    return validate
+
+
+def at_least(low):
+    def validate(value):
+        if value < low:
+            raise ValueError(f"must be at least {low}")
+    return validate
+
+
+def to_raw(value):
+    """String to store for a value sent by a client, either typed JSON or a string"""
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return str(value)
+
+
+class Setting:
+    """One configurable key: how its stored string is parsed, checked and defaulted"""
+
+    def __init__(self, key, type, default, description, validator=None):
+        self.key = key
+        self.type = type
+        self.default = default
+        self.description = description
+        self.validator = validator
+
+    def parse(self, raw):
+        """Typed value of a stored string; raises ValueError when it is not valid"""
+        if self.type is bool:
+            text = str(raw).strip().lower()
+            if text in TRUE_VALUES:
+                return True
+            if text in FALSE_VALUES:
+                return False
+            raise ValueError("must be true or false")
+        try:
+            value = self.type(raw.strip() if self.type is not str else raw)
+        except (TypeError, ValueError, AttributeError):
+            raise ValueError(f"must be a valid {self.type.__name__}")
+        if self.validator is not None:
+            self.validator(value)
+        return value
+
+    @property
+    def type_name(self):
+        return self.type.__name__
+
+
+ACKNOWLEDGMENT_EMAIL_TEMPLATE = '''Hello {owner_name},
+
+Thank you for reporting your lost item at Parklands Sports Club.
+Your report has been received and is being processed.
+
+Tracking ID: {tracking_id}
+
+Report Details:
+- Item Name: {item_name}
+- Description: {description}
+- Place Lost: {place_lost}
+- Reporter Member ID: {reporter_member_id}
+- Reporter Phone: {reporter_phone}
+- Reporter Email: {reporter_email}
+
+Please keep this ID safe for future reference.
+If you find a match, please visit the club reception.
+
+Best regards,
+Parklands Sports Club
+Powered by PSC ICT'''
+
+MATCH_NOTIFICATION_EMAIL_TEMPLATE = '''Hello {owner_name},
+
+We have found {match_count} potential match(es) for your lost item (Tracking ID: {tracking_id}).
+
+{match_details}
+
+Please log in to our system or visit the club reception to review matches.
+
+Best regards,
+Parklands Sports Club
+Powered by PSC ICT'''
+
+SETTINGS = [
+    Setting('lost_match_threshold', float, '0.4',
+            'Similarity threshold for lost item matches (0.0-1.0) - Lower for better matching', between(0.0, 1.0)),
+    Setting('found_match_threshold', float, '0.35',
+            'Similarity threshold for found item matches (0.0-1.0) - Lower for better matching', between(0.0, 1.0)),
+    Setting('match_days_back', int, '14',
+            'Number of days to look back for potential matches - Extended window', at_least(0)),
+    Setting('task_match_threshold', float, '0.5',
+            'Similarity threshold for background task matches (0.0-1.0)', between(0.0, 1.0)),
+    Setting('task_match_days_back', int, '14',
+            'Number of days back for background matching tasks - Extended window', at_least(0)),
+    Setting('task_match_shards', int, '1',
+            'Number of worker processes the background matching task splits the lost items across. '
+            'No effect under a prefork Celery worker, whose daemonic processes cannot start children: '
+            'run the worker with --pool=solo or --pool=threads to use it', at_least(1)),
+    Setting('generate_match_threshold', float, '0.3',
+            'Similarity threshold for manual match generation (0.0-1.0) - Lower for comprehensive results',
+            between(0.0, 1.0)),
+    Setting('print_match_threshold', float, '0.4',
+            'Similarity threshold for printing match receipts (0.0-1.0)', between(0.0, 1.0)),
+    Setting('match_min_shared_tokens', int, '1',
+            'Minimum number of shared name/description/location words before two items are scored as a possible match',
+            at_least(1)),
+    Setting('auto_print_lost_receipt', bool, 'true',
+            'Automatically print receipts when lost items are reported (true/false)'),
+    Setting('auto_print_found_receipt', bool, 'true',
+            'Automatically print receipts when found items are reported (true/false)'),
+    Setting('email_notifications_enabled', bool, 'true',
+            'Enable email notifications for matches (true/false)'),
+    Setting('max_image_size_mb', int, '5',
+            'Maximum image file size in MB for uploads', at_least(1)),
+    Setting('acknowledgment_email_subject', str, 'Lost Item Report Confirmation - Parklands Sports Club',
+            'Subject line for lost item acknowledgment emails'),
+    Setting('acknowledgment_email_template', str, ACKNOWLEDGMENT_EMAIL_TEMPLATE,
+            'Template for lost item acknowledgment emails (supports placeholders)'),
+    Setting('match_notification_email_subject', str, 'Potential Match Found - Parklands Sports Club',
+            'Subject line for match notification emails'),
+    Setting('match_notification_email_template', str, MATCH_NOTIFICATION_EMAIL_TEMPLATE,
+            'Template for match notification emails (supports placeholders)'),
+    Setting('max_auto_emails_per_day', int, '50',
+            'Maximum number of auto-sent emails per day', at_least(0)),
+    Setting('max_auto_emails_per_item', int, '3',
+            'Maximum number of auto-sent emails per lost item', at_least(0)),
+]
+
+REGISTRY = {setting.key: setting for setting in SETTINGS}
+
+
+class SettingsSnapshot:
+    """
+    Immutable view of every setting, parsed once.
+
+    Known keys are read as attributes (`snapshot.match_days_back`) or items and come back
+    typed; a missing or unparseable stored value falls back to the registry default.
+    Keys outside the registry are kept as their stored strings.
+    """
+    __slots__ = ('_values',)
+
+    def __init__(self, raw_values):
+        values = {key: raw for key, raw in raw_values.items() if key not in REGISTRY}
+        for key, setting in REGISTRY.items():
+            raw = raw_values.get(key)
+            if raw is not None:
+                try:
+                    values[key] = setting.parse(raw)
+                    continue
+                except ValueError as e:
+                    logger.warning(f"Invalid value {raw!r} for setting {key} ({e}), using default {setting.default!r}")
+            values[key] = setting.parse(setting.default)
+        object.__setattr__(self, '_values', MappingProxyType(values))
+
+    def __getattr__(self, key):
+        if key == '_values':
+            raise AttributeError(key)
+        try:
+            return self._values[key]
+        except KeyError:
+            raise AttributeError(key) from None
+
+    def __setattr__(self, key, value):
+        raise AttributeError("SettingsSnapshot is immutable")
+
+    def __getitem__(self, key):
+        return self._values[key]
+
+    def __contains__(self, key):
+        return key in self._values
+
+    def get(self, key, default=None):
+        return self._values.get(key, default)
+
+    def as_dict(self):
+        return dict(self._values)
@@ -1,11 +1,26 @@
-from django.test import TestCase
+from io import StringIO
+from unittest import mock
+from difflib import SequenceMatcher
+from django.core.management import call_command
+from django.db import connection
+import time
+from django.test import TestCase, TransactionTestCase
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from datetime import timedelta
-from .models import LostItem, FoundItem, SystemSettings
+from django.urls import reverse
+from .models import LostItem, FoundItem, SystemSettings, MatchToken, PotentialMatch, MatchJob
+from .matching import (
+    STORED_MATCH_THRESHOLD_SETTINGS, candidate_pairs, candidate_found_items, refresh_potential_matches,
+    score_features, select_top_matches, store_matches,
+)
+from .batch_matching import batch_score, _score_items_python
+from .benchmark import synthetic_items, check_engines, compare_results, reference_score, run_benchmarks
+from .parallel_matching import parallel_batch_score, rank_matches, usable_shards
+from .jobs import JobSweeper, run_match_job, run_pending_jobs
 from .serializers import LostItemSerializer, FoundItemSerializer, SystemSettingsSerializer
 from .views import calculate_match_score, get_match_reasons
-from rest_framework.test import APITestCase
+from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
 
 User = get_user_model()
@@ -285,6 +300,446 @@ class MatchingAlgorithmTestCase(TestCase):
         self.assertGreater(score, 0.1, f"Should handle missing data gracefully, got {score}")
         self.assertGreater(len(reasons), 0, "Should still provide reasons even with missing data")
 
+    def test_match_features_precomputed(self):
+        """Test that match features are built once at save time and reused by the scorer"""
+        lost_item = LostItem.objects.create(
+            type='item',
+            item_name='Black Gym Bag',
+            description='Black and red gym bag',
+            place_lost='Gym Lobby',
+            reported_by=self.user
+        )
+        found_item = FoundItem.objects.create(
+            type='item',
+            item_name='Gym Bag',
+            description='Red bag',
+            place_found='Lobby',
+            reported_by=self.user
+        )
+
+        features = LostItem.objects.get(pk=lost_item.pk).match_features
+        self.assertEqual(features['name'], 'black gym bag')
+        self.assertEqual(features['name_keywords'], ['bag', 'black', 'gym'])
+        self.assertEqual(features['colors'], ['black', 'red'])
+        self.assertEqual(features['location_keywords'], ['gym', 'lobby'])
+        self.assertAlmostEqual(features['timestamp'], lost_item.date_reported.timestamp())
+
+        with self.assertNumQueries(0):
+            score = calculate_match_score(lost_item, found_item)
+        self.assertGreater(score, 0.5)
+
+    def test_threshold_stops_early(self):
+        """Test that a pair which cannot reach the threshold never pays for a full ratio"""
+        lost_item = LostItem.objects.create(
+            type='item',
+            item_name='Tennis Racket',
+            description='Wilson racket with a blue grip',
+            place_lost='Tennis Court 2',
+            reported_by=self.user
+        )
+        found_item = FoundItem.objects.create(
+            type='item',
+            item_name='Reading Glasses',
+            description='Glasses in a brown case',
+            place_found='Library',
+            reported_by=self.user,
+            date_reported=timezone.now() - timedelta(days=20)
+        )
+        score = calculate_match_score(lost_item, found_item)
+
+        with mock.patch.object(SequenceMatcher, 'ratio', autospec=True) as ratio:
+            self.assertEqual(calculate_match_score(lost_item, found_item, threshold=0.7), 0.0)
+        ratio.assert_not_called()
+        self.assertEqual(calculate_match_score(lost_item, found_item, threshold=score), score)
+
+    def test_threshold_scores_unchanged(self):
+        """Test that a threshold only drops pairs below it and never changes a score"""
+        lost = synthetic_items(40, seed=7)
+        found = synthetic_items(40, seed=8)
+        for _, lost_features in lost:
+            for _, found_features in found:
+                components = score_features(lost_features, found_features)
+                for threshold in (0.5, 0.7, 0.9):
+                    bounded = score_features(lost_features, found_features, threshold)
+                    if components['score'] >= threshold:
+                        self.assertEqual(bounded, components)
+                    else:
+                        self.assertIsNone(bounded)
+
+
+class MatchIndexTestCase(TestCase):
+    """Test cases for the match token index and candidate retrieval"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+
+    def test_tokens_indexed_on_save(self):
+        lost_item = LostItem.objects.create(
+            type='item',
+            item_name='Black Wallet',
+            description='Leather wallet lost at the gym',
+            place_lost='Gym',
+            reported_by=self.user
+        )
+        tokens = set(MatchToken.objects.filter(lost_item=lost_item).values_list('token', flat=True))
+        self.assertEqual(tokens, {'black', 'wallet', 'leather', 'gym'})
+
+        lost_item.item_name = 'Brown Wallet'
+        lost_item.save()
+        tokens = set(MatchToken.objects.filter(lost_item=lost_item).values_list('token', flat=True))
+        self.assertIn('brown', tokens)
+        self.assertNotIn('black', tokens)
+
+    def test_cards_not_indexed(self):
+        lost_item = LostItem.objects.create(type='card', card_last_four='K123D', reported_by=self.user)
+        self.assertFalse(MatchToken.objects.filter(lost_item=lost_item).exists())
+
+    def test_candidate_pairs_require_shared_tokens(self):
+        lost_item = LostItem.objects.create(
+            type='item', item_name='Swim Goggles', place_lost='Pool', reported_by=self.user
+        )
+        related = FoundItem.objects.create(
+            type='item', item_name='Goggles', place_found='Pool Area', reported_by=self.user
+        )
+        unrelated = FoundItem.objects.create(
+            type='item', item_name='Tennis Racket', place_found='Court 2', reported_by=self.user
+        )
+
+        pairs = candidate_pairs(LostItem.objects.all(), FoundItem.objects.all())
+        self.assertEqual(pairs, [(lost_item, related)])
+        self.assertEqual(candidate_found_items(lost_item, FoundItem.objects.all()), [related])
+        self.assertEqual(candidate_pairs(LostItem.objects.all(), FoundItem.objects.all(), min_shared=3), [])
+        self.assertNotIn(unrelated, candidate_found_items(lost_item, FoundItem.objects.all()))
+
+    def test_card_candidates_use_card_key(self):
+        lost_item = LostItem.objects.create(type='card', card_last_four=' k123d ', reported_by=self.user)
+        same_card = FoundItem.objects.create(type='card', status='found', card_last_four='K123D', reported_by=self.user)
+        FoundItem.objects.create(type='card', status='found', card_last_four='K999D', reported_by=self.user)
+        self.assertEqual(lost_item.card_key, 'K123D')
+
+        with self.assertNumQueries(1):
+            candidates = candidate_found_items(lost_item, FoundItem.objects.filter(status='found'))
+        self.assertEqual(candidates, [same_card])
+        self.assertEqual(
+            candidate_pairs(LostItem.objects.all(), FoundItem.objects.all()),
+            [(lost_item, same_card)]
+        )
+        self.assertTrue(PotentialMatch.objects.filter(lost_item=lost_item, found_item=same_card, score=1.0).exists())
+
+
+class PotentialMatchTestCase(TestCase):
+    """Test cases for the stored potential matches"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.lost_item = LostItem.objects.create(
+            type='item',
+            item_name='Black Wallet',
+            description='Black leather wallet',
+            place_lost='Restaurant',
+            reported_by=self.user
+        )
+        self.found_item = FoundItem.objects.create(
+            type='item',
+            status='found',
+            item_name='Leather Wallet',
+            description='Black wallet found at restaurant',
+            place_found='Restaurant Area',
+            reported_by=self.user
+        )
+
+    def test_match_stored_on_create(self):
+        match = PotentialMatch.objects.get(lost_item=self.lost_item, found_item=self.found_item)
+        self.assertAlmostEqual(match.score, calculate_match_score(self.lost_item, self.found_item))
+        self.assertEqual(match.reasons, get_match_reasons(self.lost_item, self.found_item))
+        self.assertIsNotNone(match.name_score)
+        self.assertIsNotNone(match.time_score)
+
+    def test_match_updated_on_edit(self):
+        self.lost_item.item_name = 'Tennis Racket'
+        self.lost_item.description = 'Blue racket'
+        self.lost_item.place_lost = 'Court 3'
+        self.lost_item.save()
+        self.assertFalse(PotentialMatch.objects.filter(lost_item=self.lost_item).exists())
+
+    def test_match_removed_on_status_change(self):
+        self.found_item.status = 'claimed'
+        self.found_item.save()
+        self.assertFalse(PotentialMatch.objects.exists())
+
+    def test_only_pairs_reaching_lowest_threshold_stored(self):
+        score = PotentialMatch.objects.get().score
+        for key in STORED_MATCH_THRESHOLD_SETTINGS:
+            SystemSettings.set_setting(key, str(min(score + 0.05, 1.0)))
+        SystemSettings.set_setting('print_match_threshold', str(score - 0.05))
+        refresh_potential_matches(self.lost_item)
+        self.assertEqual(PotentialMatch.objects.get().score, score)
+
+        SystemSettings.set_setting('print_match_threshold', str(min(score + 0.05, 1.0)))
+        refresh_potential_matches(self.found_item)
+        self.assertFalse(PotentialMatch.objects.exists())
+
+        # Lowering a threshold again takes a rebuild
+        SystemSettings.set_setting('generate_match_threshold', '0.1')
+        call_command('rebuild_match_index', stdout=StringIO())
+        self.assertEqual(PotentialMatch.objects.get().score, score)
+
+    def test_store_matches_overwrites_existing_pair(self):
+        PotentialMatch.objects.update(score=0.01, reasons=[])
+        store_matches([(self.lost_item, self.found_item)])
+        match = PotentialMatch.objects.get()
+        self.assertGreater(match.score, 0.01)
+        self.assertTrue(match.reasons)
+
+    def test_generate_matches_reads_stored_matches(self):
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        with self.assertNumQueries(3):
+            response = client.get(reverse('found-generate-matches'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(len(response.data['matches']), 1)
+        self.assertEqual(response.data['matches'][0]['lost_item_id'], self.lost_item.id)
+
+    def test_generate_matches_skips_rows_deleted_after_ranking(self):
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        with mock.patch.object(PotentialMatch.objects, 'in_bulk', return_value={}):
+            response = client.get(reverse('found-generate-matches'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['matches'], [])
+
+    def test_generate_matches_top_k(self):
+        second_lost = LostItem.objects.create(
+            type='item', item_name='Brown Wallet', description='Brown leather wallet',
+            place_lost='Restaurant', reported_by=self.user
+        )
+        FoundItem.objects.create(
+            type='item', status='found', item_name='Wallet', description='Leather wallet',
+            place_found='Restaurant', reported_by=self.user
+        )
+        SystemSettings.set_setting('generate_match_threshold', '0.1')
+        stored = list(PotentialMatch.objects.order_by('-score'))
+        self.assertEqual(len(stored), 4)
+
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        response = client.get(reverse('found-generate-matches'), {'per_lost_item': 1})
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual({m['lost_item_id'] for m in response.data['matches']}, {self.lost_item.id, second_lost.id})
+
+        response = client.get(reverse('found-generate-matches'), {'limit': 3, 'page_size': 2})
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual([m['match_score'] for m in response.data['matches']], [m.match_score for m in stored[:2]])
+        self.assertIsNotNone(response.data['next'])
+
+        response = client.get(reverse('found-generate-matches'), {'limit': 0})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_select_top_matches(self):
+        rows = [(1, 1, 1, 0.5), (2, 1, 2, 0.9), (3, 1, 3, 0.7), (4, 2, 1, 0.8), (5, 2, 2, 0.6)]
+        self.assertEqual(select_top_matches(rows), sorted(rows, key=lambda row: -row[3]))
+        self.assertEqual(select_top_matches(rows, limit=2), [rows[1], rows[3]])
+        self.assertEqual(select_top_matches(rows, per_lost_item=1), [rows[1], rows[3]])
+        self.assertEqual(select_top_matches(rows, limit=3, per_lost_item=2), [rows[1], rows[3], rows[2]])
+
+
+@mock.patch('lostfound.jobs.send_match_notification')
+@mock.patch('lostfound.jobs.PackagePrinter')
+class MatchJobTestCase(TestCase):
+    """Test cases for the background work started when an item is reported"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='staff', password='testpass', is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.lost_item = LostItem.objects.create(
+            type='item',
+            item_name='Black Wallet',
+            description='Black leather wallet',
+            place_lost='Restaurant',
+            reporter_email='owner@example.com',
+            reported_by=self.user
+        )
+
+    def report_found_item(self):
+        with mock.patch('lostfound.jobs.start_match_job') as start:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(reverse('found-list'), {
+                    'type': 'item',
+                    'item_name': 'Leather Wallet',
+                    'description': 'Black wallet found at restaurant',
+                    'place_found': 'Restaurant Area',
+                }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        start.assert_called_once_with(MatchJob.objects.get(pk=response.data['job_id']).pk)
+        return response
+
+    def test_create_only_queues_job(self, printer, notify):
+        response = self.report_found_item()
+        job = MatchJob.objects.get(pk=response.data['job_id'])
+        self.assertEqual(job.status, MatchJob.QUEUED)
+        self.assertEqual(job.found_item_id, response.data['id'])
+        self.assertFalse(PotentialMatch.objects.exists())
+        printer.assert_not_called()
+        notify.assert_not_called()
+
+    def test_job_matches_and_notifies(self, printer, notify):
+        printer.return_value.print_found_receipt.return_value = True
+        job_id = self.report_found_item().data['job_id']
+
+        job = run_match_job(job_id)
+        self.assertEqual(job.status, MatchJob.DONE)
+        self.assertEqual(job.attempts, 1)
+        self.assertTrue(job.result['printed'])
+        self.assertEqual(job.result['recipients'], ['owner@example.com'])
+        self.assertEqual(len(job.result['matches']), 1)
+        self.assertTrue(PotentialMatch.objects.filter(lost_item=self.lost_item, found_item=job.found_item).exists())
+        notify.assert_called_once()
+        self.assertIsNone(run_match_job(job_id))
+
+        response = self.client.get(reverse('matchjob-detail', args=[job_id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], MatchJob.DONE)
+
+    def test_failed_job_is_retried(self, printer, notify):
+        printer.return_value.print_found_receipt.side_effect = RuntimeError('printer offline')
+        job_id = self.report_found_item().data['job_id']
+
+        job = run_match_job(job_id)
+        self.assertEqual(job.status, MatchJob.QUEUED)
+        self.assertEqual(job.error, 'printer offline')
+
+        printer.return_value.print_found_receipt.side_effect = None
+        printer.return_value.print_found_receipt.return_value = True
+        self.assertEqual([job.status for job in run_pending_jobs()], [MatchJob.DONE])
+
+        MatchJob.objects.filter(pk=job_id).update(status=MatchJob.RUNNING)
+        self.assertEqual(run_pending_jobs(), [])
+        self.assertEqual(len(run_pending_jobs(stale_after=timedelta(0))), 1)
+
+    def test_retry_skips_finished_side_effects(self, printer, notify):
+        printer.return_value.print_found_receipt.return_value = True
+        LostItem.objects.create(
+            type='item', item_name='Leather Wallet', description='Black wallet lost at restaurant',
+            place_lost='Restaurant', reporter_email='second@example.com', reported_by=self.user
+        )
+        # The first email goes out, the second fails and fails the attempt
+        notify.side_effect = [None, RuntimeError('mail server down')]
+        job_id = self.report_found_item().data['job_id']
+
+        job = run_match_job(job_id)
+        self.assertEqual(job.status, MatchJob.QUEUED)
+        self.assertEqual(job.progress['printed'], True)
+        self.assertEqual(len(job.progress['notified']), 1)
+        first_recipient = notify.call_args_list[0].args[0]
+
+        notify.side_effect = None
+        job = run_match_job(job_id)
+        self.assertEqual(job.status, MatchJob.DONE)
+        printer.return_value.print_found_receipt.assert_called_once()
+        self.assertEqual(notify.call_count, 3)
+        retried = notify.call_args_list[2].args[0]
+        self.assertNotEqual(retried, first_recipient)
+        self.assertEqual(sorted(job.progress['notified']), sorted([first_recipient.pk, retried.pk]))
+        self.assertEqual(job.result['recipients'], ['owner@example.com', 'second@example.com'])
+
+
+@mock.patch('lostfound.jobs.send_match_notification')
+@mock.patch('lostfound.jobs.PackagePrinter')
+class JobSweeperTestCase(TransactionTestCase):
+    """The sweeper thread reruns requeued jobs without anyone running a command"""
+
+    def test_requeued_job_rerun(self, printer, notify):
+        printer.return_value.print_found_receipt.return_value = True
+        found_item = FoundItem.objects.create(
+            type='item', item_name='Umbrella', description='Blue umbrella', place_found='Lobby'
+        )
+        # As left by a first attempt that failed
+        job = MatchJob.objects.create(found_item=found_item, attempts=1, error='printer offline')
+
+        sweeper = JobSweeper(interval=0.05)
+        sweeper.start()
+        try:
+            deadline = time.monotonic() + 10
+            while time.monotonic() < deadline:
+                job.refresh_from_db()
+                if job.status == MatchJob.DONE:
+                    break
+                time.sleep(0.05)
+        finally:
+            sweeper.stop(timeout=5)
+        self.assertEqual((job.status, job.attempts), (MatchJob.DONE, 2))
+        self.assertFalse(sweeper.is_alive())
+
+
+class BatchMatchingTestCase(TestCase):
+    """Test cases for the batch scoring engine used by the nightly task"""
+
+    def expected_matches(self, lost, found, threshold):
+        expected = set()
+        for lost_id, lost_features in lost:
+            for found_id, found_features in found:
+                if lost_features['type'] == 'item' and not set(lost_features['tokens']) & set(found_features['tokens']):
+                    continue
+                score = score_features(lost_features, found_features)['score']
+                if score >= threshold:
+                    expected.add((lost_id, found_id, score))
+        return expected
+
+    def test_batch_scores_match_pairwise_scores(self):
+        lost = synthetic_items(150, seed=1, days=7)
+        found = synthetic_items(150, seed=2, days=7)
+        for threshold in (0.5, 0.7, 0.9):
+            self.assertEqual(set(batch_score(lost, found, threshold)), self.expected_matches(lost, found, threshold))
+
+    def test_sharded_scores_match_single_process(self):
+        lost = synthetic_items(120, seed=5, days=7)
+        found = synthetic_items(120, seed=6, days=7)
+        expected = rank_matches(batch_score(lost, found, 0.7))
+        self.assertEqual(parallel_batch_score(lost, found, 0.7, shards=3), expected)
+        self.assertEqual([match[2] for match in expected], sorted((match[2] for match in expected), reverse=True))
+
+    def test_usable_shards(self):
+        self.assertEqual(usable_shards(4, 10), 4)
+        self.assertEqual(usable_shards(4, 2), 2)
+        self.assertEqual(usable_shards(4, 0), 1)
+        with mock.patch('multiprocessing.current_process') as current_process:
+            current_process.return_value.daemon = True
+            with self.assertLogs('lostfound.parallel_matching', 'WARNING'):
+                self.assertEqual(usable_shards(4, 10), 1)
+
+    def test_python_fallback_matches_pairwise_scores(self):
+        lost = [item for item in synthetic_items(60, seed=3) if item[1]['type'] == 'item']
+        found = [item for item in synthetic_items(60, seed=4) if item[1]['type'] == 'item']
+        self.assertEqual(set(_score_items_python(lost, found, 0.7, 1)), self.expected_matches(lost, found, 0.7))
+
+    def test_engines_return_reference_scores(self):
+        lost = synthetic_items(80, seed=7, days=7)
+        found = synthetic_items(80, seed=8, days=7)
+        for lost_id, lost_features in lost[:20]:
+            for found_id, found_features in found:
+                self.assertEqual(score_features(lost_features, found_features)['score'],
+                                 reference_score(lost_features, found_features))
+        checks = check_engines(lost, found, 0.6, shards=2)
+        self.assertEqual(set(checks), {'score_features', 'batch_score', 'parallel_batch_score'})
+        self.assertTrue(all(check['ok'] for check in checks.values()), checks)
+
+    def test_benchmark_suite_rolls_back(self):
+        results = run_benchmarks(lost=40, found=40, pairs=20, db_items=15, requests=2, verify=10)
+        self.assertEqual(
+            set(results['timings']),
+            {'calculate_match_score', 'get_match_reasons', 'reference_score', 'backlog', 'store_matches',
+             'nightly_task', 'generate_matches', 'lost_list', 'found_list'}
+        )
+        self.assertEqual(results['timings']['generate_matches']['requests'], 2)
+        self.assertTrue(all(check['ok'] for check in results['checks'].values()))
+        self.assertFalse(LostItem.objects.exists())
+        self.assertFalse(PotentialMatch.objects.exists())
+        self.assertEqual(
+            [row[0] for row in compare_results(results, results)], list(results['timings'])
+        )
+
 
 class LostFoundTestCase(TestCase):
     def setUp(self):
@@ -319,6 +774,132 @@ class LostFoundTestCase(TestCase):
         self.assertEqual(setting.description, 'Test description')
 
 
+@mock.patch('lostfound.models.connection', mock.Mock(in_atomic_block=False))
+class SystemSettingsCacheTestCase(TestCase):
+    """Test cases for the process-local settings cache (reads outside a transaction)"""
+
+    def setUp(self):
+        SystemSettings.set_setting('match_days_back', '7')
+        SystemSettings.set_setting('lost_match_threshold', '0.6')
+
+    def test_reads_served_from_cache(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(SystemSettings.get_setting('match_days_back'), '7')
+        with self.assertNumQueries(0):
+            self.assertEqual(SystemSettings.get_setting('lost_match_threshold'), '0.6')
+            self.assertEqual(SystemSettings.get_setting('missing', 'default'), 'default')
+
+    def test_changes_invalidate_cache(self):
+        SystemSettings.get_setting('match_days_back')
+        setting = SystemSettings.objects.get(key='match_days_back')
+        setting.value = '14'
+        setting.save()
+        self.assertEqual(SystemSettings.get_setting('match_days_back'), '14')
+        setting.delete()
+        self.assertIsNone(SystemSettings.get_setting('match_days_back'))
+        SystemSettings.set_setting('match_days_back', '3')
+        self.assertEqual(SystemSettings.get_setting('match_days_back'), '3')
+
+    def test_changes_from_other_processes_seen_after_interval(self):
+        SystemSettings.get_setting('match_days_back')
+        # A queryset update sends no signals, like a write from another process
+        SystemSettings.objects.filter(key='match_days_back').update(
+            value='30', updated_at=timezone.now() + timedelta(seconds=1)
+        )
+        with self.assertNumQueries(0):
+            self.assertEqual(SystemSettings.get_setting('match_days_back'), '7')
+        with self.settings(SYSTEM_SETTINGS_CACHE_SECONDS=0):
+            self.assertEqual(SystemSettings.get_setting('match_days_back'), '30')
+
+    def test_snapshot_is_typed_and_immutable(self):
+        SystemSettings.set_setting('auto_print_lost_receipt', 'False')
+        SystemSettings.set_setting('print_match_threshold', 'not a number')
+        SystemSettings.set_setting('custom_key', 'custom')
+        config = SystemSettings.snapshot()
+        self.assertEqual(config.match_days_back, 7)
+        self.assertEqual(config.lost_match_threshold, 0.6)
+        self.assertIs(config.auto_print_lost_receipt, False)
+        self.assertEqual(config.print_match_threshold, 0.4)
+        self.assertEqual(config.task_match_shards, 1)
+        self.assertEqual(config['custom_key'], 'custom')
+        with self.assertRaises(AttributeError):
+            config.match_days_back = 1
+        with self.assertNumQueries(0):
+            self.assertIs(SystemSettings.snapshot(), config)
+
+    def test_bulk_settings_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(user=User.objects.create_user(username='staff', password='pw', is_staff=True))
+        url = reverse('settings-bulk')
+
+        response = client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        by_key = {setting['key']: setting for setting in response.data['settings']}
+        self.assertEqual(by_key['match_days_back']['value'], 7)
+        self.assertEqual(by_key['match_days_back']['type'], 'int')
+        self.assertEqual(by_key['email_notifications_enabled']['value'], True)
+
+        response = client.put(url, [{'match_days_back': 3}], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = client.put(url, {'settings': {'match_days_back': 3, 'lost_match_threshold': 2}}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('lost_match_threshold', response.data['errors'])
+        self.assertEqual(SystemSettings.snapshot().match_days_back, 7)
+
+        response = client.put(url, {'settings': {
+            'match_days_back': 3, 'email_notifications_enabled': False, 'custom_key': 'x'
+        }}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        config = SystemSettings.snapshot()
+        self.assertEqual(config.match_days_back, 3)
+        self.assertIs(config.email_notifications_enabled, False)
+        self.assertEqual(SystemSettings.get_setting('email_notifications_enabled'), 'false')
+        self.assertEqual(config['custom_key'], 'x')
+
+
+class HotQueryIndexTestCase(TestCase):
+    """The list, report and rate-limit filters on status and dates must not scan whole tables"""
+
+    def assertUsesIndex(self, queryset):
+        table = queryset.model._meta.db_table
+        if connection.vendor == 'sqlite':
+            # 'SCAN table' without 'USING INDEX' reads every row
+            plan = queryset.explain()
+            self.assertNotRegex(plan, rf'\bSCAN {table}\b(?! USING)', f"Full table scan: {queryset.query}")
+        elif connection.vendor == 'mysql':
+            plan = queryset.explain(format='json')
+            self.assertNotIn('"access_type": "ALL"', plan, f"Full table scan: {queryset.query}")
+        else:
+            self.skipTest(f"No plan check for {connection.vendor}")
+
+    def test_hot_filters_use_indexes(self):
+        from myapp.models import Package
+        from users.models import EventLog
+        from .models import EmailLog, PickupLog
+
+        now = timezone.now()
+        week_ago = now - timedelta(days=7)
+        day_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        lost_item = LostItem.objects.create(type=LostItem.CARD, card_last_four='1234')
+
+        querysets = [
+            LostItem.objects.filter(status=LostItem.PENDING, date_reported__gte=week_ago),
+            FoundItem.objects.filter(status=FoundItem.FOUND, date_reported__gte=week_ago),
+            FoundItem.objects.filter(date_reported__range=(week_ago, now)),
+            Package.objects.filter(status=Package.PENDING).order_by('-created_at'),
+            Package.objects.filter(status=Package.PICKED, picked_at__gte=week_ago),
+            Package.objects.filter(picked_at__gte=day_start, picked_at__lt=day_start + timedelta(days=1)),
+            EventLog.objects.filter(timestamp__gte=week_ago),
+            PickupLog.objects.filter(pickup_date__gte=week_ago),
+            EmailLog.objects.filter(sent_at__gte=day_start, sent_at__lt=day_start + timedelta(days=1)),
+            EmailLog.objects.filter(lost_item=lost_item),
+        ]
+        for queryset in querysets:
+            with self.subTest(query=str(queryset.query)):
+                self.assertUsesIndex(queryset)
+
+
 class APITestCase(APITestCase):
     def setUp(self):
         self.user = User.objects.create_user(username='testuser', password='testpass')
@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import LostItemViewSet, FoundItemViewSet, PickupLogViewSet, SystemSettingsViewSet, ItemStatsViewSet
+from .views import LostItemViewSet, FoundItemViewSet, PickupLogViewSet, SystemSettingsViewSet, ItemStatsViewSet, MatchJobViewSet
 
 
 router = DefaultRouter()
@@ -8,6 +8,7 @@ router.register(r'lost', LostItemViewSet, basename='lost')
 router.register(r'found', FoundItemViewSet, basename='found')
 router.register(r'pickuplogs', PickupLogViewSet, basename='pickuplog')
 router.register(r'settings', SystemSettingsViewSet, basename='settings')
+router.register(r'jobs', MatchJobViewSet, basename='matchjob')
 
 urlpatterns = [
     path('', include(router.urls)),
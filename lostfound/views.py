@@ -1,26 +1,27 @@
 import uuid
-import threading
 from rest_framework import viewsets, status, serializers
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.pagination import PageNumberPagination
+from django.db import transaction
 from django.db.models import Q, Count
 from django.contrib.auth import get_user_model
 from django.conf import settings
 import logging
 
 logger = logging.getLogger(__name__)
-from .models import LostItem, FoundItem, PickupLog, SystemSettings
+from .models import LostItem, FoundItem, PickupLog, SystemSettings, PotentialMatch, MatchJob, defer_match_refresh
 from .serializers import (
     LostItemSerializer,
     FoundItemSerializer,
     PickupLogSerializer,
     ItemStatsSerializer,
     WeeklyReportSerializer,
-    SystemSettingsSerializer
+    SystemSettingsSerializer,
+    MatchJobSerializer
 )
 from .permissions import IsStaffOrReadOnly
-from difflib import SequenceMatcher
 from datetime import timedelta, datetime
 from django.utils import timezone
 from django.http import HttpResponse
@@ -30,11 +31,33 @@ from io import BytesIO
 from .PackagePrinter import PackagePrinter
 from collections import defaultdict
 from django.db.models.functions import TruncDay
-from lostfound.email.lost_match import send_report_acknowledgment, send_match_notification
+from .matching import calculate_match_score, get_match_reasons, open_matches, select_top_matches
+from .jobs import enqueue_match_job
+from .settings_registry import SETTINGS, REGISTRY as SETTINGS_REGISTRY, to_raw as setting_to_raw
+from users.pagination import KeysetPagination
 
 
 
 User = get_user_model()
+
+
+class MatchPagination(PageNumberPagination):
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+
+def _positive_int_param(request, name):
+    """Optional positive integer query parameter; raises ValueError when malformed"""
+    value = request.query_params.get(name)
+    if value in (None, ''):
+        return None
+    value = int(value)
+    if value < 1:
+        raise ValueError(name)
+    return value
+
+
 class ReportMixin:
     @action(detail=False, methods=['get'])
     def weekly_report(self, request):
@@ -79,307 +102,30 @@ class ReportMixin:
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-def safe_lower(value):
-    """Lowercase safely, handle None as empty string."""
-    return value.lower().strip() if isinstance(value, str) else ""
-
-
-def calculate_match_score(lost_item, found_item):
-    """Calculate similarity score between lost and found items with improved algorithm."""
-
-    # If types do not match, stop immediately (no score)
-    if lost_item.type != found_item.type:
-        return 0.0
-
-    # Special handling for card type items
-    if lost_item.type == 'card':
-        return calculate_card_match_score(lost_item, found_item)
-
-    # Regular item matching logic
-    scores = []
-    total_weight = 0
-
-    # Type match bonus (only reached if same type)
-    scores.append(0.3)
-    total_weight += 0.3
-
-    # Enhanced name similarity with better handling
-    lost_name = safe_lower(lost_item.item_name)
-    found_name = safe_lower(found_item.item_name)
-
-    if lost_name and found_name:
-        # Direct similarity
-        name_similarity = SequenceMatcher(None, lost_name, found_name).ratio()
-
-        # Keyword-based similarity for better matching
-        lost_keywords = set(lost_name.split())
-        found_keywords = set(found_name.split())
-        keyword_overlap = len(lost_keywords.intersection(found_keywords))
-        keyword_score = min(1.0, keyword_overlap / max(len(lost_keywords), len(found_keywords), 1))
-
-        # Combine both scores
-        combined_name_score = max(name_similarity, keyword_score)
-        scores.append(combined_name_score * 0.25)
-        total_weight += 0.25
-    elif lost_name or found_name:
-        # Partial credit if only one has a name
-        scores.append(0.1)
-        total_weight += 0.1
-
-    # Enhanced description similarity
-    lost_desc = safe_lower(lost_item.description)
-    found_desc = safe_lower(found_item.description)
-
-    if lost_desc and found_desc:
-        desc_similarity = SequenceMatcher(None, lost_desc, found_desc).ratio()
-
-        # Extract color keywords for better matching
-        colors = ['black', 'white', 'red', 'blue', 'green', 'yellow', 'orange', 'purple', 'pink', 'brown', 'gray', 'grey']
-        lost_colors = [c for c in colors if c in lost_desc]
-        found_colors = [c for c in colors if c in found_desc]
-        color_match = 1.0 if lost_colors and found_colors and set(lost_colors).intersection(set(found_colors)) else 0.0
-
-        combined_desc_score = max(desc_similarity, color_match * 0.8)
-        scores.append(combined_desc_score * 0.2)
-        total_weight += 0.2
-    elif lost_desc or found_desc:
-        scores.append(0.05)
-        total_weight += 0.05
-
-    # Improved location similarity
-    lost_location = safe_lower(lost_item.place_lost)
-    found_location = safe_lower(found_item.place_found)
-
-    if lost_location and found_location:
-        location_similarity = SequenceMatcher(None, lost_location, found_location).ratio()
-
-        # Location keywords matching
-        location_keywords = ['tennis', 'court', 'gym', 'pool', 'restaurant', 'lobby', 'parking', 'clubhouse']
-        lost_loc_keywords = [k for k in location_keywords if k in lost_location]
-        found_loc_keywords = [k for k in location_keywords if k in found_location]
-        location_keyword_match = 1.0 if lost_loc_keywords and found_loc_keywords and set(lost_loc_keywords).intersection(set(found_loc_keywords)) else 0.0
-
-        combined_location_score = max(location_similarity, location_keyword_match)
-        scores.append(combined_location_score * 0.15)
-        total_weight += 0.15
-    elif lost_location or found_location:
-        scores.append(0.05)
-        total_weight += 0.05
-
-    # Improved time difference score with longer window
-    time_diff = abs((lost_item.date_reported - found_item.date_reported).total_seconds())
-    time_score = max(0, 1 - (time_diff / (14 * 24 * 3600)))  # Decay after 14 days
-    scores.append(time_score * 0.1)
-    total_weight += 0.1
-
-    # Normalize score based on available data
-    if total_weight > 0:
-        final_score = sum(scores) / total_weight
-        return min(1.0, final_score)
-    else:
-        return 0.0
-
-
-def calculate_card_match_score(lost_item, found_item):
-    """Simplified matching algorithm for card type items - only compares card numbers."""
-    # Card number matching - ONLY factor for cards
-    lost_card = safe_lower(lost_item.card_last_four or "")
-    found_card = safe_lower(found_item.card_last_four or "")
-
-    if lost_card and found_card:
-        # Exact match only
-        if lost_card == found_card:
-            return 1.0  # Perfect match
-        else:
-            return 0.0  # No match
-    else:
-        # If either card number is missing, no match
-        return 0.0
-
-def get_match_reasons(lost_item, found_item):
-    """Return human-readable reasons for a match with improved explanations."""
-    reasons = []
-
-    if lost_item.type != found_item.type:
-        return ["Different item types (no valid match)"]
-
-    reasons.append(f"Matching type: {lost_item.type}")
-
-    # Special handling for card type items
-    if lost_item.type == 'card':
-        return get_card_match_reasons(lost_item, found_item)
-
-    # Regular item matching reasons
-    # Enhanced name matching reasons
-    lost_name = safe_lower(lost_item.item_name)
-    found_name = safe_lower(found_item.item_name)
-
-    if lost_name and found_name:
-        name_ratio = SequenceMatcher(None, lost_name, found_name).ratio()
-        if name_ratio > 0.6:
-            reasons.append(f"Similar item names ({name_ratio:.0%} match)")
-        elif name_ratio > 0.3:
-            reasons.append(f"Some name similarity ({name_ratio:.0%} match)")
-
-        # Check for keyword matches
-        lost_keywords = set(lost_name.split())
-        found_keywords = set(found_name.split())
-        common_keywords = lost_keywords.intersection(found_keywords)
-        if common_keywords:
-            reasons.append(f"Common keywords: {', '.join(list(common_keywords)[:3])}")
-
-    # Enhanced description matching reasons
-    lost_desc = safe_lower(lost_item.description)
-    found_desc = safe_lower(found_item.description)
-
-    if lost_desc and found_desc:
-        desc_ratio = SequenceMatcher(None, lost_desc, found_desc).ratio()
-        if desc_ratio > 0.5:
-            reasons.append(f"Similar descriptions ({desc_ratio:.0%} match)")
-        elif desc_ratio > 0.2:
-            reasons.append(f"Some description similarity ({desc_ratio:.0%} match)")
-
-        # Color matching
-        colors = ['black', 'white', 'red', 'blue', 'green', 'yellow', 'orange', 'purple', 'pink', 'brown', 'gray', 'grey']
-        lost_colors = [c for c in colors if c in lost_desc]
-        found_colors = [c for c in colors if c in found_desc]
-        common_colors = set(lost_colors).intersection(set(found_colors))
-        if common_colors:
-            reasons.append(f"Matching colors: {', '.join(common_colors)}")
-
-    # Enhanced location matching reasons
-    lost_location = safe_lower(lost_item.place_lost)
-    found_location = safe_lower(found_item.place_found)
-
-    if lost_location and found_location:
-        loc_ratio = SequenceMatcher(None, lost_location, found_location).ratio()
-        if loc_ratio > 0.6:
-            reasons.append(f"Similar locations ({loc_ratio:.0%} match)")
-        elif loc_ratio > 0.3:
-            reasons.append(f"Some location similarity ({loc_ratio:.0%} match)")
-
-        # Location keyword matching
-        location_keywords = ['tennis', 'court', 'gym', 'pool', 'restaurant', 'lobby', 'parking', 'clubhouse']
-        lost_loc_keywords = [k for k in location_keywords if k in lost_location]
-        found_loc_keywords = [k for k in location_keywords if k in found_location]
-        common_loc_keywords = set(lost_loc_keywords).intersection(set(found_loc_keywords))
-        if common_loc_keywords:
-            reasons.append(f"Location context: {', '.join(common_loc_keywords)}")
-
-    # Time-based reasons with better granularity
-    time_diff = abs((lost_item.date_reported - found_item.date_reported).total_seconds())
-    if time_diff < 2 * 3600:  # Within 2 hours
-        minutes = int(time_diff / 60)
-        reasons.append(f"Reported within {minutes} minute{'s' if minutes != 1 else ''} of each other")
-    elif time_diff < 24 * 3600:  # Within 24 hours
-        hours = int(time_diff / 3600)
-        reasons.append(f"Reported within {hours} hour{'s' if hours != 1 else ''} of each other")
-    elif time_diff < 7 * 24 * 3600:  # Within a week
-        days = int(time_diff / (24 * 3600))
-        reasons.append(f"Reported within {days} day{'s' if days != 1 else ''} of each other")
-    elif time_diff < 14 * 24 * 3600:  # Within two weeks
-        reasons.append("Reported within 2 weeks of each other")
-
-    # If no specific reasons found but items match, add a generic reason
-    if len(reasons) <= 1:  # Only the type matching reason
-        reasons.append("Potential match based on available information")
-
-    return reasons
-
-
-def get_card_match_reasons(lost_item, found_item):
-    """Simplified match reasons for card type items - only card number comparison."""
-    reasons = []
-    reasons.append("Matching type: card")
-
-    # Card number matching - only factor for cards
-    lost_card = safe_lower(lost_item.card_last_four or "")
-    found_card = safe_lower(found_item.card_last_four or "")
-
-    if lost_card and found_card:
-        if lost_card == found_card:
-            reasons.append(f"Exact card number match: {lost_card}")
-        else:
-            reasons.append("Different card numbers")
-    else:
-        reasons.append("Missing card number information")
-
-    return reasons
-
-
 # --- Lost Item ViewSet ---
 class LostItemViewSet(viewsets.ModelViewSet):
     queryset = LostItem.objects.select_related('reported_by').order_by('-date_reported')
     serializer_class = LostItemSerializer
     permission_classes = [IsAuthenticated, IsStaffOrReadOnly]
+    pagination_class = KeysetPagination.ordered_by('-date_reported', '-id')
 
     def perform_create(self, serializer):
-        lost_item = serializer.save(
-            reported_by=self.request.user,
-            tracking_id=f"LI-{uuid.uuid4().hex[:8].upper()}"
-        )
-        logger.info(f"Lost item reported: {lost_item.tracking_id} by user {self.request.user}")
-
-        # Auto-print receipt for lost item
-        if SystemSettings.get_setting('auto_print_lost_receipt', 'true').lower() == 'true':
-            from .PackagePrinter import PackagePrinter
-            printer = PackagePrinter()
-            # We need to create a print method for lost items
-            printer.print_lost_receipt(lost_item)
-
-        days_back = int(SystemSettings.get_setting('match_days_back', 7))
-        similarity_threshold = float(SystemSettings.get_setting('lost_match_threshold', 0.6))
-        recent_found_items = FoundItem.objects.filter(
-            status='found',
-            date_reported__gte=timezone.now() - timezone.timedelta(days=days_back)
-        )
-
-        matches = []
-        recipients = []
-        for found_item in recent_found_items:
-            score = calculate_match_score(lost_item, found_item)
-            if score >= similarity_threshold:
-                match_data = {
-                    'lost_item': LostItemSerializer(lost_item).data,
-                    'found_item': FoundItemSerializer(found_item).data,
-                    'match_score': round(score * 100, 2),
-                    'match_reasons': get_match_reasons(lost_item, found_item)
-                }
-                matches.append(match_data)
-                recipients.append(lost_item.reporter_email)
-
-                if lost_item.reporter_email:
-                    logger.info(f"Sending match notification for lost item {lost_item.tracking_id} to {lost_item.reporter_email}")
-                    threading.Thread(
-                        target=send_match_notification,
-                        args=(lost_item, [match_data]),
-                        daemon=True
-                    ).start()
-
-        matches.sort(key=lambda x: x['match_score'], reverse=True)
-        self.matches = matches
-        self.recipients = recipients
-
-        # Send acknowledgment email if email provided
-        if lost_item.reporter_email:
-            threading.Thread(
-                target=send_report_acknowledgment,
-                args=(lost_item,),
-                daemon=True
-            ).start()
+        # Only the item and its job are written in the request; printing, matching
+        # and emails run in the job once the transaction commits
+        with transaction.atomic(), defer_match_refresh():
+            lost_item = serializer.save(
+                reported_by=self.request.user,
+                tracking_id=f"LI-{uuid.uuid4().hex[:8].upper()}"
+            )
+            self.job = enqueue_match_job(lost_item)
+        logger.info(f"Lost item reported: {lost_item.tracking_id} by user {self.request.user}, job {self.job.pk}")
 
     def create(self, request, *args, **kwargs):
         response = super().create(request, *args, **kwargs)
-        if hasattr(self, 'matches') and self.matches:
-            # Clean recipients: remove None/empty and force str
-            valid_recipients = [str(r) for r in getattr(self, 'recipients', []) if r]
-
-            if valid_recipients:
-                response.data['acknowledgment'] = f"Potential matches found and emails sent to: {', '.join(set(valid_recipients))}"
-            else:
-                response.data['acknowledgment'] = "Potential matches found, but no valid email recipients."
-        else:
-            response.data['acknowledgment'] = "Acknowledgment email sent to reporter."
+        response.data['job_id'] = str(self.job.pk)
+        response.data['acknowledgment'] = (
+            "Lost item recorded. Receipt printing, matching and email notifications are queued."
+        )
         return response
 
     def get_queryset(self):
@@ -621,83 +367,71 @@ class FoundItemViewSet(viewsets.ModelViewSet):
     queryset = FoundItem.objects.select_related('reported_by').order_by('-date_reported')
     serializer_class = FoundItemSerializer
     permission_classes = [IsAuthenticated, IsStaffOrReadOnly]
+    pagination_class = KeysetPagination.ordered_by('-date_reported', '-id')
 
     def perform_create(self, serializer):
-        found_item = serializer.save(reported_by=self.request.user,
-        status="found" # Ensure status is set to 'found' on creation
-        )
-        PackagePrinter().print_found_receipt(found_item)
-
-        similarity_threshold = float(SystemSettings.get_setting('found_match_threshold', 0.5))
-        recent_lost_items = LostItem.objects.filter(status='pending')
-
-        matches_sent = []
-        recipients = []
-        for lost_item in recent_lost_items:
-            score = calculate_match_score(lost_item, found_item)
-            if score >= similarity_threshold:
-                match_data = {
-                    'lost_item': LostItemSerializer(lost_item).data,
-                    'found_item': FoundItemSerializer(found_item).data,
-                    'match_score': round(score * 100, 2),
-                    'match_reasons': get_match_reasons(lost_item, found_item),
-                    'sent_to': lost_item.reporter_email
-                }
-                if lost_item.reporter_email:
-                    send_match_notification(lost_item, [match_data])
-                matches_sent.append(match_data)
-                recipients.append(lost_item.reporter_email)
-
-        self.matches_sent = matches_sent
-        self.recipients = recipients
+        with transaction.atomic(), defer_match_refresh():
+            found_item = serializer.save(reported_by=self.request.user,
+            status="found" # Ensure status is set to 'found' on creation
+            )
+            self.job = enqueue_match_job(found_item)
 
     def create(self, request, *args, **kwargs):
         response = super().create(request, *args, **kwargs)
-
-        if hasattr(self, 'matches_sent') and self.matches_sent:
-            # ✅ Clean recipients: remove None/empty and force str
-            valid_recipients = [str(r) for r in getattr(self, 'recipients', []) if r]
-
-            if valid_recipients:
-                response.data['acknowledgment'] = (
-                    f"Potential matches found and emails sent to: {', '.join(set(valid_recipients))}"
-                )
-            else:
-                response.data['acknowledgment'] = "Potential matches found, but no valid email recipients."
-        else:
-            response.data['acknowledgment'] = "Acknowledgment email sent to reporter."
-
+        response.data['job_id'] = str(self.job.pk)
+        response.data['acknowledgment'] = (
+            "Found item recorded. Receipt printing, matching and email notifications are queued."
+        )
         return response
 
     
     @action(detail=False, methods=['get'], url_path='generate_matches')
     def generate_matches(self, request):
-        similarity_threshold = float(SystemSettings.get_setting('generate_match_threshold', 0.5))
-        tracking_id = request.query_params.get('tracking_id')
+        """
+        Ranked stored matches above generate_match_threshold, one page at a time.
 
-        lost_items = LostItem.objects.filter(status='pending')
-        found_items = FoundItem.objects.filter(status='found')  # Only match against available items
+        ?limit= keeps the best N matches overall and ?per_lost_item= the best N per lost
+        item; both are selected with bounded heaps. Reasons are only loaded for the page
+        returned (?page=, ?page_size=).
+        """
+        similarity_threshold = SystemSettings.snapshot().generate_match_threshold
+        tracking_id = request.query_params.get('tracking_id')
+        try:
+            limit = _positive_int_param(request, 'limit')
+            per_lost_item = _positive_int_param(request, 'per_lost_item')
+        except ValueError:
+            return Response(
+                {"error": "limit and per_lost_item must be positive integers"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
+        # Stored matches are kept current as items change; stream just the ranking columns
+        potential_matches = open_matches().filter(score__gte=similarity_threshold)
         if tracking_id:
-            lost_items = lost_items.filter(tracking_id=tracking_id) | lost_items.none()
-            found_items = found_items.filter(tracking_id=tracking_id) | found_items.none()
-
-        matches = []
-        for lost in lost_items:
-            for found in found_items:
-                if lost.type != found.type:  # ✅ enforce type matching
-                    continue
-                score = calculate_match_score(lost, found)
-                if score >= similarity_threshold:
-                    matches.append({
-                        'lost_item_id': lost.id,
-                        'found_item_id': found.id,
-                        'match_score': round(score * 100, 2),
-                        'match_reasons': get_match_reasons(lost, found)
-                    })
-
-        matches.sort(key=lambda x: x['match_score'], reverse=True)
-        return Response({'matches': matches})
+            potential_matches = potential_matches.filter(lost_item__tracking_id=tracking_id)
+        rows = potential_matches.order_by().values_list('pk', 'lost_item_id', 'found_item_id', 'score')
+        ranked = select_top_matches(rows.iterator(), limit=limit, per_lost_item=per_lost_item)
+
+        paginator = MatchPagination()
+        page = paginator.paginate_queryset(ranked, request, view=self)
+        stored = PotentialMatch.objects.in_bulk([row[0] for row in page])
+        # A refresh may have dropped a row since it was ranked; leave it out of the page
+        matches = [
+            {
+                'lost_item_id': stored[pk].lost_item_id,
+                'found_item_id': stored[pk].found_item_id,
+                'match_score': stored[pk].match_score,
+                'match_reasons': stored[pk].reasons
+            }
+            for pk, _, _, _ in page
+            if pk in stored
+        ]
+        return Response({
+            'count': paginator.page.paginator.count,
+            'next': paginator.get_next_link(),
+            'previous': paginator.get_previous_link(),
+            'matches': matches,
+        })
 
     @action(detail=False, methods=['get'], url_path='match_details')
     def match_details(self, request):
@@ -713,15 +447,15 @@ class FoundItemViewSet(viewsets.ModelViewSet):
         except (LostItem.DoesNotExist, FoundItem.DoesNotExist):
             return Response({"error": "Invalid item IDs"}, status=status.HTTP_404_NOT_FOUND)
 
-        score = calculate_match_score(lost_item, found_item)
-        if score == 0:
+        match = PotentialMatch.objects.filter(lost_item=lost_item, found_item=found_item).first()
+        if match is None or match.score == 0:
             return Response({"error": "No match between these items"}, status=status.HTTP_400_BAD_REQUEST)
 
         match_data = {
             'lost_item': LostItemSerializer(lost_item).data,
             'found_item': FoundItemSerializer(found_item).data,
-            'match_score': round(score * 100, 2),
-            'match_reasons': get_match_reasons(lost_item, found_item)
+            'match_score': match.match_score,
+            'match_reasons': match.reasons
         }
         return Response(match_data)
 
@@ -739,18 +473,16 @@ class FoundItemViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        lost_items = None
-        found_items = None
+        potential_matches = open_matches()
 
         # Case 1: Looks like a LostItem tracking_id
         if tracking_id.startswith("LI-"):
-            lost_items = LostItem.objects.filter(tracking_id=tracking_id)
-            if not lost_items.exists():
+            if not LostItem.objects.filter(tracking_id=tracking_id).exists():
                 return Response(
                     {"error": f"No LostItem found for tracking_id={tracking_id}"},
                     status=status.HTTP_404_NOT_FOUND
                 )
-            found_items = FoundItem.objects.filter(status='found')  # Only match against available items
+            potential_matches = potential_matches.filter(lost_item__tracking_id=tracking_id)
 
         else:
             # Case 2: Must be a FoundItem.id (integer)
@@ -762,31 +494,25 @@ class FoundItemViewSet(viewsets.ModelViewSet):
                         {"error": f"Item {tracking_id} is not available for matching (status: {found_item.status})"},
                         status=status.HTTP_400_BAD_REQUEST
                     )
-                found_items = [found_item]
-                lost_items = LostItem.objects.filter(status='pending')
+                potential_matches = potential_matches.filter(found_item=found_item)
             except (ValueError, FoundItem.DoesNotExist):
                 return Response(
                     {"error": f"No LostItem or FoundItem found for tracking_id={tracking_id}"},
                     status=status.HTTP_404_NOT_FOUND
                 )
 
-        similarity_threshold = float(SystemSettings.get_setting('print_match_threshold', 0.5))
+        similarity_threshold = SystemSettings.snapshot().print_match_threshold
         matches = []
 
-        for lost in lost_items:
-            for found in found_items:
-                if lost.type != found.type:
-                    continue
-                score = calculate_match_score(lost, found)
-                if score >= similarity_threshold:
-                    match_data = {
-                        "lost_item": LostItemSerializer(lost).data,
-                        "found_item": FoundItemSerializer(found).data,
-                        "match_score": round(score * 100, 2),
-                        "match_reasons": get_match_reasons(lost, found),
-                    }
-                    matches.append(match_data)
-                    PackagePrinter().print_match_receipt(match_data)
+        for match in potential_matches.filter(score__gte=similarity_threshold):
+            match_data = {
+                "lost_item": LostItemSerializer(match.lost_item).data,
+                "found_item": FoundItemSerializer(match.found_item).data,
+                "match_score": match.match_score,
+                "match_reasons": match.reasons,
+            }
+            matches.append(match_data)
+            PackagePrinter().print_match_receipt(match_data)
 
         if not matches:
             return Response(
@@ -885,6 +611,7 @@ class PickupLogViewSet(ReportMixin, viewsets.ModelViewSet):
     queryset = PickupLog.objects.all().order_by('-pickup_date')
     serializer_class = PickupLogSerializer
     permission_classes = [IsAuthenticated, IsStaffOrReadOnly]
+    pagination_class = KeysetPagination.ordered_by('-pickup_date', '-id')
 
     def perform_create(self, serializer):
         item = serializer.validated_data['item']
@@ -911,7 +638,8 @@ class PickupLogViewSet(ReportMixin, viewsets.ModelViewSet):
         if time_frame:
             now = timezone.now()
             if time_frame == 'today':
-                queryset = queryset.filter(pickup_date__date=now.date())
+                day_start = timezone.localtime(now).replace(hour=0, minute=0, second=0, microsecond=0)
+                queryset = queryset.filter(pickup_date__gte=day_start, pickup_date__lt=day_start + timedelta(days=1))
             elif time_frame == 'week':
                 queryset = queryset.filter(pickup_date__gte=now - timedelta(days=7))
             elif time_frame == 'month':
@@ -975,4 +703,81 @@ class SystemSettingsViewSet(viewsets.ModelViewSet):
 
         setting = SystemSettings.set_setting(key, str(value), description)
         serializer = self.get_serializer(setting)
-        return Response(serializer.data)
\ No newline at end of file
+        return Response(serializer.data)
+
+    @action(detail=False, methods=['get', 'put'], url_path='bulk')
+    def bulk(self, request):
+        """
+        GET every setting, typed, with its default and description; PUT
+        {"settings": {key: value, ...}} to validate and save many at once.
+        Nothing is saved unless every value is valid.
+        """
+        if request.method == 'PUT':
+            changes = request.data.get('settings') if isinstance(request.data, dict) else None
+            if not isinstance(changes, dict) or not changes:
+                return Response({"error": "settings must be an object of key: value pairs"},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+            raw_values, errors = {}, {}
+            for key, value in changes.items():
+                setting = SETTINGS_REGISTRY.get(key)
+                if value is None or isinstance(value, (dict, list)):
+                    errors[key] = "value must be a string, number or boolean"
+                    continue
+                raw = setting_to_raw(value)
+                if setting:
+                    try:
+                        setting.parse(raw)
+                    except ValueError as e:
+                        errors[key] = str(e)
+                        continue
+                raw_values[key] = raw
+            if errors:
+                return Response({"errors": errors}, status=status.HTTP_400_BAD_REQUEST)
+
+            with transaction.atomic():
+                existing = SystemSettings.objects.select_for_update().in_bulk(list(raw_values), field_name='key')
+                for key, raw in raw_values.items():
+                    setting = existing.get(key)
+                    if setting is None:
+                        registered = SETTINGS_REGISTRY.get(key)
+                        SystemSettings.objects.create(
+                            key=key, value=raw, description=registered.description if registered else ''
+                        )
+                    elif setting.value != raw:
+                        setting.value = raw
+                        setting.save(update_fields=['value', 'updated_at'])
+
+        return Response({"settings": self._bulk_settings()})
+
+    def _bulk_settings(self):
+        rows = SystemSettings.objects.in_bulk(field_name='key')
+        config = SystemSettings.snapshot()
+        settings_list = []
+        for setting in SETTINGS:
+            row = rows.pop(setting.key, None)
+            settings_list.append({
+                "key": setting.key,
+                "value": config[setting.key],
+                "type": setting.type_name,
+                "default": setting.parse(setting.default),
+                "description": row.description if row and row.description else setting.description,
+                "updated_at": row.updated_at if row else None,
+            })
+        for key, row in sorted(rows.items()):
+            settings_list.append({
+                "key": key,
+                "value": row.value,
+                "type": "str",
+                "default": None,
+                "description": row.description,
+                "updated_at": row.updated_at,
+            })
+        return settings_list
+
+
+class MatchJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """Poll the background job started when a lost or found item is reported"""
+    queryset = MatchJob.objects.all()
+    serializer_class = MatchJobSerializer
+    permission_classes = [IsAuthenticated]
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Package, AppSettings, PackageHistory
+from .models import Package, AppSettings, PackageHistory, ShelfOccupancy
 
 @admin.register(Package)
 class PackageAdmin(admin.ModelAdmin):
@@ -66,4 +66,16 @@ class PackageHistoryAdmin(admin.ModelAdmin):
     list_filter = ('action', 'old_status', 'new_status', 'timestamp')
     search_fields = ('package__code', 'performed_by', 'notes')
     readonly_fields = ('timestamp',)
-    ordering = ('-timestamp',)
\ No newline at end of file
+    ordering = ('-timestamp',)
+
+
+@admin.register(ShelfOccupancy)
+class ShelfOccupancyAdmin(admin.ModelAdmin):
+    list_display = ('prefix', 'occupied_count', 'sequence', 'updated_at')
+    readonly_fields = ('prefix', 'sequence', 'updated_at')
+    exclude = ('bitmap',)
+    ordering = ('prefix',)
+
+    def has_delete_permission(self, request, obj=None):
+        # The row holds the prefix's code sequence; recreating it would reissue codes
+        return False
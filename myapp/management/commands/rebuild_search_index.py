@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from myapp.models import Package, PackageSearchGram, package_search_grams
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the package search index from the current packages'
+
+    def handle(self, *args, **options):
+        count = 0
+        with transaction.atomic():
+            PackageSearchGram.objects.all().delete()
+            grams = []
+            for package in Package.objects.iterator():
+                grams.extend(
+                    PackageSearchGram(gram=gram, package_id=package.pk, weight=weight)
+                    for gram, weight in package_search_grams(package).items()
+                )
+                if len(grams) >= 5000:
+                    count += len(PackageSearchGram.objects.bulk_create(grams))
+                    grams = []
+            count += len(PackageSearchGram.objects.bulk_create(grams))
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Indexed {count} search grams')
+        )
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from myapp.models import ShelfOccupancy
+
+
+class Command(BaseCommand):
+    help = 'Recompute the shelf occupancy bitmaps from the pending packages'
+
+    def handle(self, *args, **options):
+        ShelfOccupancy.rebuild()
+        occupied = sum(occupancy.occupied_count() for occupancy in ShelfOccupancy.objects.all())
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt shelf occupancy: {occupied} shelves occupied')
+        )
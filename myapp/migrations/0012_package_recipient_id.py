@@ -0,0 +1,38 @@
+from django.db import migrations, models
+
+
+def recipient_id_field():
+    return models.CharField(
+        blank=True, help_text='Recipient ID (max 6 characters, e.g., kwe45, k1234s)', max_length=6, null=True
+    )
+
+
+def add_missing_column(apps, schema_editor):
+    # 0010 shipped without this AddField, so the column exists only where it was added by
+    # hand; add it everywhere else
+    Package = apps.get_model('myapp', 'Package')
+    table = Package._meta.db_table
+    with schema_editor.connection.cursor() as cursor:
+        columns = {column.name for column in schema_editor.connection.introspection.get_table_description(cursor, table)}
+    if 'recipient_id' not in columns:
+        field = recipient_id_field()
+        field.set_attributes_from_name('recipient_id')
+        schema_editor.add_field(Package, field)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0011_package_recipient_id_alter_package_recipient_phone'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddField(model_name='package', name='recipient_id', field=recipient_id_field()),
+            ],
+            database_operations=[
+                migrations.RunPython(add_missing_column, migrations.RunPython.noop),
+            ],
+        ),
+    ]
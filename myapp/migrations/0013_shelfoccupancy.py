@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:16
+
+import re
+from django.db import migrations, models
+
+
+# Frozen copies of the myapp.models shelf bitmap helpers as of this migration
+MAX_SHELF_NUMBER = 200
+SHELF_RE = re.compile(r'^(\D+|\d)(\d+)$')
+
+
+def shelf_bitmaps(shelves):
+    bitmaps = {}
+    for shelf in shelves:
+        match = SHELF_RE.match(shelf or '')
+        if match and 1 <= int(match.group(2)) <= MAX_SHELF_NUMBER:
+            prefix, number = match.group(1), int(match.group(2))
+            bitmaps[prefix] = bitmaps.get(prefix, 0) | 1 << (number - 1)
+    return bitmaps
+
+
+def bitmap_bytes(bits):
+    return bits.to_bytes((MAX_SHELF_NUMBER + 7) // 8, 'little')
+
+
+def populate_shelf_occupancy(apps, schema_editor):
+    Package = apps.get_model('myapp', 'Package')
+    ShelfOccupancy = apps.get_model('myapp', 'ShelfOccupancy')
+    shelves = Package.objects.filter(status='pending').exclude(shelf=None).values_list('shelf', flat=True)
+    ShelfOccupancy.objects.bulk_create([
+        ShelfOccupancy(prefix=prefix, bitmap=bitmap_bytes(bits))
+        for prefix, bits in shelf_bitmaps(shelves).items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0012_package_recipient_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShelfOccupancy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('prefix', models.CharField(max_length=5, unique=True)),
+                ('bitmap', models.BinaryField(default=bytes)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Shelf Occupancy',
+                'verbose_name_plural': 'Shelf Occupancy',
+            },
+        ),
+        migrations.RunPython(populate_shelf_occupancy, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0013_shelfoccupancy'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shelfoccupancy',
+            name='sequence',
+            field=models.PositiveBigIntegerField(default=0, help_text='Number of package codes issued for this prefix'),
+        ),
+    ]
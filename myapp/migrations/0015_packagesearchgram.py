@@ -0,0 +1,76 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:24
+
+import re
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Frozen copy of myapp.models.package_search_grams as of this migration
+SEARCH_FIELD_WEIGHTS = {
+    'code': 5,
+    'recipient_name': 4,
+    'recipient_phone': 4,
+    'recipient_id': 4,
+    'dropped_by': 2,
+    'picked_by': 2,
+    'description': 1,
+}
+SEARCH_DESCRIPTION_CHARS = 255
+SEARCH_WORD_RE = re.compile(r'\w+')
+
+
+def text_grams(text):
+    grams = set()
+    for word in SEARCH_WORD_RE.findall((text or '').lower()):
+        grams.update(word[i:i + 3] for i in range(len(word) - 2))
+    return grams
+
+
+def package_search_grams(package):
+    weights = {}
+    for field, weight in SEARCH_FIELD_WEIGHTS.items():
+        text = getattr(package, field)
+        if field == 'description' and text:
+            text = text[:SEARCH_DESCRIPTION_CHARS]
+        for gram in text_grams(text):
+            if weights.get(gram, 0) < weight:
+                weights[gram] = weight
+    return weights
+
+
+def populate_search_grams(apps, schema_editor):
+    Package = apps.get_model('myapp', 'Package')
+    PackageSearchGram = apps.get_model('myapp', 'PackageSearchGram')
+    grams = []
+    for package in Package.objects.iterator():
+        grams.extend(
+            PackageSearchGram(gram=gram, package_id=package.pk, weight=weight)
+            for gram, weight in package_search_grams(package).items()
+        )
+        if len(grams) >= 5000:
+            PackageSearchGram.objects.bulk_create(grams)
+            grams = []
+    PackageSearchGram.objects.bulk_create(grams)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0014_shelfoccupancy_sequence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PackageSearchGram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('gram', models.CharField(max_length=3)),
+                ('weight', models.PositiveSmallIntegerField(default=1)),
+                ('package', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_grams', to='myapp.package')),
+            ],
+            options={
+                'unique_together': {('gram', 'package')},
+            },
+        ),
+        migrations.RunPython(populate_search_grams, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:27
+
+import re
+from django.db import migrations, models
+
+
+# Frozen copy of users.identifiers.normalize_phone as of this migration
+def normalize_phone(value):
+    if not isinstance(value, str):
+        return None
+    return re.sub(r'\D', '', value)[-9:] or None
+
+
+# Frozen copy of users.identifiers.normalize_member_id as of this migration
+def normalize_member_id(value):
+    if not isinstance(value, str):
+        return None
+    return re.sub(r'\s', '', value).upper() or None
+
+
+PHONE_FIELDS = ('recipient_phone', 'dropper_phone', 'picker_phone')
+MEMBER_FIELDS = ('recipient_id', 'dropper_id', 'picker_id')
+
+
+def populate_lookup_keys(apps, schema_editor):
+    Package = apps.get_model('myapp', 'Package')
+    for package in Package.objects.only(*PHONE_FIELDS, *MEMBER_FIELDS).iterator():
+        keys = {f'{field}_key': normalize_phone(getattr(package, field)) for field in PHONE_FIELDS}
+        keys.update({f'{field}_key': normalize_member_id(getattr(package, field)) for field in MEMBER_FIELDS})
+        if any(keys.values()):
+            Package.objects.filter(pk=package.pk).update(**keys)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0015_packagesearchgram'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='package',
+            name='dropper_id_key',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=6, null=True),
+        ),
+        migrations.AddField(
+            model_name='package',
+            name='dropper_phone_key',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=9, null=True),
+        ),
+        migrations.AddField(
+            model_name='package',
+            name='picker_id_key',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=6, null=True),
+        ),
+        migrations.AddField(
+            model_name='package',
+            name='picker_phone_key',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=9, null=True),
+        ),
+        migrations.AddField(
+            model_name='package',
+            name='recipient_id_key',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=6, null=True),
+        ),
+        migrations.AddField(
+            model_name='package',
+            name='recipient_phone_key',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=9, null=True),
+        ),
+        migrations.RunPython(populate_lookup_keys, migrations.RunPython.noop),
+    ]
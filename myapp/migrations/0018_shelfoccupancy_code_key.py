@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:35
+
+import hashlib
+import myapp.models
+from django.conf import settings
+from django.db import migrations, models
+
+
+def keep_issued_permutations(apps, schema_editor):
+    # Codes issued so far were permuted with a key derived from SECRET_KEY; store that key
+    # on the existing rows so their next codes continue the same permutation
+    ShelfOccupancy = apps.get_model('myapp', 'ShelfOccupancy')
+    for occupancy in ShelfOccupancy.objects.all():
+        digest = hashlib.sha256(f"package-code:{occupancy.prefix}:{settings.SECRET_KEY}".encode()).digest()
+        occupancy.code_key = digest[:16]
+        occupancy.save(update_fields=['code_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0017_hot_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shelfoccupancy',
+            name='code_key',
+            field=models.BinaryField(default=myapp.models.new_code_key, max_length=16),
+        ),
+        migrations.RunPython(keep_issued_permutations, migrations.RunPython.noop),
+    ]
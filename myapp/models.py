@@ -1,35 +1,122 @@
 # models.py
-from django.db import models
+from django.conf import settings as django_settings
+from django.db import connection, models, transaction
+from django.db.models import Count, Sum
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.utils import timezone
-import random
+from functools import lru_cache
+from users.identifiers import normalize_member_id, normalize_phone
+import math
+import re
+import secrets
 import string
+import threading
+import time
 
 MAX_SHELF_NUMBER = 200
+# A shelf is its letter prefix followed by its number, e.g. 'A12'
+SHELF_RE = re.compile(r'^(\D+|\d)(\d+)$')
 
-# --- Random suffix for code generation ---
-def generate_random_suffix(k=5):
-    return ''.join(random.choices(string.ascii_uppercase + string.digits, k=k))
+# --- Package code suffixes: a letter then five base-36 characters ---
+# Old codes used five random characters, so the longer suffix can never reproduce one
+CODE_CHARS = string.digits + string.ascii_uppercase
+CODE_TAIL = 36 ** 5
+CODE_SPACE = 26 * CODE_TAIL
+# Each prefix keeps its own permutation key, so codes do not depend on SECRET_KEY
+CODE_KEY_BYTES = 16
+
+# --- Shelf bitmaps: bit n of a letter's bitmap set means shelf n+1 is taken ---
+def split_shelf(shelf):
+    """(prefix, number) of a shelf such as 'A12', or None when it is not a valid shelf"""
+    match = SHELF_RE.match(shelf or '')
+    if not match or not 1 <= int(match.group(2)) <= MAX_SHELF_NUMBER:
+        return None
+    return match.group(1), int(match.group(2))
+
+def shelf_bitmaps(shelves):
+    """Occupancy bits per prefix for an iterable of occupied shelves"""
+    bitmaps = {}
+    for shelf in shelves:
+        parts = split_shelf(shelf)
+        if parts:
+            bitmaps[parts[0]] = bitmaps.get(parts[0], 0) | 1 << (parts[1] - 1)
+    return bitmaps
+
+def bitmap_bytes(bits):
+    return bits.to_bytes((MAX_SHELF_NUMBER + 7) // 8, 'little')
+
+# --- Search grams: every three-character run of each word, weighted by field ---
+SEARCH_FIELD_WEIGHTS = {
+    'code': 5,
+    'recipient_name': 4,
+    'recipient_phone': 4,
+    'recipient_id': 4,
+    'dropped_by': 2,
+    'picked_by': 2,
+    'description': 1,
+}
+# Only the start of long descriptions is indexed
+SEARCH_DESCRIPTION_CHARS = 255
+SEARCH_WORD_RE = re.compile(r'\w+')
+
+def text_grams(text):
+    """Lowercase trigrams of each word in text; words shorter than three characters have none"""
+    grams = set()
+    for word in SEARCH_WORD_RE.findall((text or '').lower()):
+        grams.update(word[i:i + 3] for i in range(len(word) - 2))
+    return grams
+
+def package_search_grams(package):
+    """{gram: weight} for a package, keeping the heaviest field a gram appears in"""
+    weights = {}
+    for field, weight in SEARCH_FIELD_WEIGHTS.items():
+        text = getattr(package, field)
+        if field == 'description' and text:
+            text = text[:SEARCH_DESCRIPTION_CHARS]
+        for gram in text_grams(text):
+            if weights.get(gram, 0) < weight:
+                weights[gram] = weight
+    return weights
 
 # --- Get next available shelf for a given letter prefix ---
 def get_letter_based_shelf(letter):
-    prefix = letter.upper()
-    existing_shelves = set(
-        Package.objects.filter(status=Package.PENDING, shelf__startswith=prefix)
-        .values_list('shelf', flat=True)
-    )
-    for i in range(1, MAX_SHELF_NUMBER + 1):
-        shelf = f"{prefix}{i}"
-        if shelf not in existing_shelves:
-            return shelf
-    return None  # All shelves used for that letter
+    return ShelfOccupancy.allocate(letter)[0]
+
+def new_code_key():
+    """Random key for a new prefix's code permutation"""
+    return secrets.token_bytes(CODE_KEY_BYTES)
+
+@lru_cache(maxsize=None)
+def _code_permutation(key):
+    """Multiplier and offset of the code permutation for a prefix's stored key"""
+    multiplier = int.from_bytes(key[:8], 'big') % CODE_SPACE
+    while math.gcd(multiplier, CODE_SPACE) != 1:
+        multiplier += 1
+    return multiplier, int.from_bytes(key[8:16], 'big') % CODE_SPACE
+
+def code_suffix(key, sequence):
+    """
+    Suffix for the n-th code of a prefix with code key `key`. n -> a*n + b (mod CODE_SPACE)
+    with a coprime to CODE_SPACE is a bijection, so distinct sequence numbers give distinct
+    suffixes while consecutive packages still get unrelated-looking codes.
+    """
+    multiplier, offset = _code_permutation(bytes(key))
+    head, tail = divmod((multiplier * sequence + offset) % CODE_SPACE, CODE_TAIL)
+    chars = []
+    for _ in range(5):
+        tail, digit = divmod(tail, 36)
+        chars.append(CODE_CHARS[digit])
+    return string.ascii_uppercase[head] + ''.join(reversed(chars))
 
 # --- Generate package code prefixed with shelf ---
-def generate_package_code(shelf):
-    while True:
-        suffix = generate_random_suffix(5)
-        code = f"{shelf}{suffix}"
-        if not Package.objects.filter(code=code).exists():
-            return code
+def generate_package_code(shelf, prefix, suffix):
+    """
+    Code for a package from the suffix ShelfOccupancy.allocate handed out. Unique without
+    checking the table: a shelf always belongs to its prefix and each prefix's suffixes
+    are handed out once. A package without a shelf uses the never-allocated shelf number 0.
+    """
+    return f"{shelf or f'{prefix}0'}{suffix}"
 
 class Package(models.Model):
     PACKAGE = 'package'
@@ -69,26 +156,328 @@ class Package(models.Model):
 
     shelf = models.CharField(max_length=10, blank=True, null=True, editable=False)
 
+    # Normalised phone numbers and member IDs for exact, indexed person lookups
+    recipient_phone_key = models.CharField(max_length=9, blank=True, null=True, db_index=True, editable=False)
+    dropper_phone_key = models.CharField(max_length=9, blank=True, null=True, db_index=True, editable=False)
+    picker_phone_key = models.CharField(max_length=9, blank=True, null=True, db_index=True, editable=False)
+    recipient_id_key = models.CharField(max_length=6, blank=True, null=True, db_index=True, editable=False)
+    dropper_id_key = models.CharField(max_length=6, blank=True, null=True, db_index=True, editable=False)
+    picker_id_key = models.CharField(max_length=6, blank=True, null=True, db_index=True, editable=False)
+
+    # Lookup key field -> (raw field, normaliser)
+    LOOKUP_KEYS = {
+        'recipient_phone_key': ('recipient_phone', normalize_phone),
+        'dropper_phone_key': ('dropper_phone', normalize_phone),
+        'picker_phone_key': ('picker_phone', normalize_phone),
+        'recipient_id_key': ('recipient_id', normalize_member_id),
+        'dropper_id_key': ('dropper_id', normalize_member_id),
+        'picker_id_key': ('picker_id', normalize_member_id),
+    }
+
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Pending/picked lists ordered by age, and pickups within a time range
+            models.Index(fields=['status', 'created_at'], name='package_status_created_idx'),
+            models.Index(fields=['status', 'picked_at'], name='package_status_picked_idx'),
+            models.Index(fields=['created_at'], name='package_created_idx'),
+            models.Index(fields=['picked_at'], name='package_picked_idx'),
+        ]
 
     def save(self, *args, **kwargs):
         is_new = self.pk is None
+        self.set_lookup_keys()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | {
+                key for key, (field, _) in self.LOOKUP_KEYS.items() if field in update_fields
+            }
+
+        # The shelf bitmap and the package row change in one transaction
+        with transaction.atomic():
+            if self.status == self.PENDING and not (self.shelf and self.code):
+                prefix = self.shelf_prefix()
+                # One locked update of the letter's row takes both the shelf and the code number.
+                # A package that already has its code is only retrying for a shelf, and must
+                # not use up another sequence number
+                shelf, suffix = ShelfOccupancy.allocate(
+                    prefix, take_shelf=not self.shelf, take_sequence=not self.code
+                )
+                if not self.shelf:
+                    self.shelf = shelf
+                if not self.code:
+                    self.code = generate_package_code(self.shelf, prefix, suffix)
+            elif self.status == self.PICKED:
+                if not is_new:
+                    # Free the shelf the stored row still holds; locking the row stops two
+                    # concurrent picks from both releasing it
+                    stored = Package.objects.select_for_update().filter(pk=self.pk).values_list('status', 'shelf').first()
+                    if stored and stored[0] == self.PENDING and stored[1]:
+                        ShelfOccupancy.release(stored[1])
+                self.shelf = None
 
-        if self.status == self.PENDING:
-            if not self.shelf:
-                first_letter = self.recipient_name.strip()[0].upper() if self.recipient_name else 'X'
-                self.shelf = get_letter_based_shelf(first_letter)
-            if not self.code:
-                self.code = generate_package_code(self.shelf)
-        elif self.status == self.PICKED:
-            self.shelf = None
+            super().save(*args, **kwargs)
 
-        super().save(*args, **kwargs)
+            update_fields = kwargs.get('update_fields')
+            if update_fields is None or set(update_fields) & SEARCH_FIELD_WEIGHTS.keys():
+                PackageSearchGram.index_packages([self])
 
     def __str__(self):
         return f"{self.code} - {self.recipient_name} ({self.status})"
 
+    def set_lookup_keys(self):
+        for key, (field, normalize) in self.LOOKUP_KEYS.items():
+            setattr(self, key, normalize(getattr(self, field)))
+
+    @classmethod
+    def lookup_key_values(cls, values):
+        """Lookup keys to store alongside raw field values, e.g. for a queryset update"""
+        return {
+            key: normalize(values[field])
+            for key, (field, normalize) in cls.LOOKUP_KEYS.items() if field in values
+        }
+
+    def shelf_prefix(self):
+        """Letter the package is shelved and numbered under"""
+        parts = split_shelf(self.shelf)
+        if parts:
+            return parts[0]
+        return self.recipient_name.strip()[0].upper() if self.recipient_name else 'X'
+
+    @classmethod
+    def bulk_create_pending(cls, packages):
+        """
+        Save a batch of new pending packages with a single INSERT.
+
+        Shelves and codes are allocated with one locked update per letter instead of one per
+        package. Returns the packages with their primary keys set.
+        """
+        by_prefix = {}
+        for package in packages:
+            package.status = cls.PENDING
+            package.set_lookup_keys()
+            by_prefix.setdefault(package.shelf_prefix(), []).append(package)
+
+        with transaction.atomic():
+            # Letters are locked in a fixed order so two batches cannot deadlock
+            for prefix in sorted(by_prefix):
+                group = by_prefix[prefix]
+                allocations = ShelfOccupancy.allocate_many(prefix, len(group))
+                for package, (shelf, suffix) in zip(group, allocations):
+                    package.shelf = shelf
+                    package.code = generate_package_code(shelf, prefix, suffix)
+            created = cls.objects.bulk_create(packages)
+
+            # Backends that cannot return inserted ids (MySQL) leave pk unset
+            if any(package.pk is None for package in created):
+                ids = dict(cls.objects.filter(code__in=[p.code for p in created]).values_list('code', 'id'))
+                for package in created:
+                    package.pk = ids[package.code]
+            PackageSearchGram.index_packages(created)
+        return created
+
+    @classmethod
+    def pick_many(cls, packages, **picker):
+        """
+        Mark pending packages picked with a single UPDATE and free their shelves.
+
+        picker holds picked_by, picker_phone and picker_id. The caller should hold the rows
+        locked (select_for_update) after checking they are all pending.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            ShelfOccupancy.release_many([package.shelf for package in packages if package.shelf])
+            cls.objects.filter(pk__in=[package.pk for package in packages]).update(
+                status=cls.PICKED, shelf=None, picked_at=now, updated_at=now,
+                **picker, **cls.lookup_key_values(picker)
+            )
+            for package in packages:
+                for field, value in {**picker, **cls.lookup_key_values(picker)}.items():
+                    setattr(package, field, value)
+                package.status = cls.PICKED
+                package.shelf = None
+                package.picked_at = package.updated_at = now
+            if 'picked_by' in picker:
+                PackageSearchGram.index_packages(packages)
+        return packages
+
+
+class PackageSearchGram(models.Model):
+    """
+    Trigram index over the searchable package fields, so a search is an indexed lookup
+    of the query's trigrams instead of OR'ed icontains scans. One row per gram and
+    package, weighted by the most important field the gram appears in.
+    """
+    gram = models.CharField(max_length=3)
+    package = models.ForeignKey(Package, on_delete=models.CASCADE, related_name='search_grams')
+    weight = models.PositiveSmallIntegerField(default=1)
+
+    class Meta:
+        unique_together = ('gram', 'package')
+
+    def __str__(self):
+        return f"{self.gram} -> {self.package_id}"
+
+    @classmethod
+    def index_packages(cls, packages):
+        """Replace the index entries of saved packages with their current grams"""
+        cls.objects.filter(package__in=[package.pk for package in packages]).delete()
+        cls.objects.bulk_create([
+            cls(gram=gram, package_id=package.pk, weight=weight)
+            for package in packages
+            for gram, weight in package_search_grams(package).items()
+        ], batch_size=1000)
+
+    @classmethod
+    def search(cls, query, queryset=None, limit=20):
+        """
+        Packages containing every trigram of the query, best ranked first, each with a
+        `search_rank` attribute (summed field weight of the matched grams). Queries with
+        no word of three or more characters match code, shelf or recipient ID prefixes.
+        """
+        queryset = Package.objects.all() if queryset is None else queryset
+        grams = text_grams(query)
+        if not grams:
+            query = query.strip()
+            if not query:
+                return []
+            packages = list(queryset.filter(
+                models.Q(code__istartswith=query) | models.Q(shelf__iexact=query) |
+                models.Q(recipient_id__istartswith=query)
+            ).order_by('-created_at')[:limit])
+            for package in packages:
+                package.search_rank = 0
+            return packages
+
+        ranked = list(
+            cls.objects.filter(gram__in=grams, package__in=queryset)
+            .values('package')
+            .annotate(hits=Count('id'), rank=Sum('weight'))
+            .filter(hits=len(grams))
+            .order_by('-rank', '-package')
+            .values_list('package', 'rank')[:limit]
+        )
+        packages = queryset.in_bulk([package_id for package_id, _ in ranked])
+        results = []
+        for package_id, rank in ranked:
+            package = packages[package_id]
+            package.search_rank = rank
+            results.append(package)
+        return results
+
+
+class ShelfOccupancy(models.Model):
+    """
+    Which shelves of one letter are taken, as a bitmap: bit n set means shelf n+1 holds a
+    pending package.
+
+    Allocating and releasing lock the letter's row, so concurrent desk clerks are handed
+    different shelves, and finding the lowest free shelf is a couple of integer
+    operations instead of a scan of the pending packages.
+
+    The row also counts the codes issued for the letter and holds the key their suffixes
+    are permuted with; `sequence` must never go backwards and `code_key` must never
+    change, or package codes would repeat.
+    """
+    prefix = models.CharField(max_length=5, unique=True)
+    bitmap = models.BinaryField(default=bytes)
+    sequence = models.PositiveBigIntegerField(default=0, help_text='Number of package codes issued for this prefix')
+    code_key = models.BinaryField(max_length=CODE_KEY_BYTES, default=new_code_key)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Shelf Occupancy'
+        verbose_name_plural = 'Shelf Occupancy'
+
+    def __str__(self):
+        return f"{self.prefix}: {self.occupied_count()}/{MAX_SHELF_NUMBER} shelves occupied"
+
+    @property
+    def bits(self):
+        return int.from_bytes(bytes(self.bitmap), 'little')
+
+    @bits.setter
+    def bits(self, value):
+        self.bitmap = bitmap_bytes(value)
+
+    def occupied_count(self):
+        return bin(self.bits).count('1')
+
+    @classmethod
+    def _locked(cls, prefix):
+        occupancy, _ = cls.objects.select_for_update().get_or_create(prefix=prefix)
+        return occupancy
+
+    @classmethod
+    def allocate(cls, letter, take_shelf=True, take_sequence=True):
+        """
+        Take the lowest free shelf and the next code suffix for a letter.
+
+        Returns (shelf, suffix); shelf is None when all are in use or take_shelf is False,
+        and suffix is None when take_sequence is False.
+        """
+        return cls.allocate_many(letter, 1, take_shelf, take_sequence)[0]
+
+    @classmethod
+    def allocate_many(cls, letter, count, take_shelf=True, take_sequence=True):
+        """(shelf, suffix) for each of count packages of a letter, lowest free shelves first"""
+        prefix = letter.upper()
+        allocations = []
+        with transaction.atomic():
+            occupancy = cls._locked(prefix)
+            bits = occupancy.bits
+            free = ~bits & ((1 << MAX_SHELF_NUMBER) - 1) if take_shelf else 0
+            for i in range(count):
+                shelf = None
+                if free:  # Otherwise all shelves used for that letter
+                    lowest = free & -free
+                    free ^= lowest
+                    bits |= lowest
+                    shelf = f"{prefix}{lowest.bit_length()}"
+                suffix = code_suffix(occupancy.code_key, occupancy.sequence + i) if take_sequence else None
+                allocations.append((shelf, suffix))
+            occupancy.bits = bits
+            if take_sequence:
+                occupancy.sequence += count
+            occupancy.save(update_fields=['bitmap', 'sequence', 'updated_at'])
+        return allocations
+
+    @classmethod
+    def release(cls, shelf):
+        """Mark a shelf free again"""
+        cls.release_many([shelf])
+
+    @classmethod
+    def release_many(cls, shelves):
+        """Mark shelves free again with one locked update per letter"""
+        bitmaps = shelf_bitmaps(shelves)
+        with transaction.atomic():
+            for prefix in sorted(bitmaps):
+                occupancy = cls._locked(prefix)
+                occupancy.bits = occupancy.bits & ~bitmaps[prefix]
+                occupancy.save(update_fields=['bitmap', 'updated_at'])
+
+    @classmethod
+    def rebuild(cls):
+        """Recompute every bitmap from the pending packages; code sequences are kept"""
+        with transaction.atomic():
+            bitmaps = shelf_bitmaps(
+                Package.objects.filter(status=Package.PENDING).exclude(shelf=None).values_list('shelf', flat=True)
+            )
+            for occupancy in cls.objects.select_for_update():
+                occupancy.bits = bitmaps.pop(occupancy.prefix, 0)
+                occupancy.save(update_fields=['bitmap', 'updated_at'])
+            for prefix, bits in bitmaps.items():
+                occupancy = cls(prefix=prefix)
+                occupancy.bits = bits
+                occupancy.save()
+
+
+@receiver(post_delete, sender=Package)
+def release_deleted_package_shelf(sender, instance, **kwargs):
+    if instance.status == Package.PENDING and instance.shelf:
+        ShelfOccupancy.release(instance.shelf)
+
 
 class AppSettings(models.Model):
     """
@@ -131,10 +520,64 @@ class AppSettings(models.Model):
         })
         return settings
 
+    @classmethod
+    def get_cached(cls):
+        """
+        The singleton settings from this process's cache; treat it as read-only.
+
+        The row is read once per process and dropped whenever it is saved or deleted.
+        Edits made by another process are noticed within SYSTEM_SETTINGS_CACHE_SECONDS.
+        Use get_settings() for an instance that is going to be modified.
+        """
+        return _app_settings_cache.get()
+
+    @classmethod
+    def invalidate_cache(cls):
+        """Drop this process's cached settings so the next read reloads them"""
+        _app_settings_cache.invalidate()
+
     def __str__(self):
         return "Application Settings"
 
 
+class _AppSettingsCache:
+    """Process-local copy of the AppSettings row, checked against updated_at at most every few seconds"""
+
+    def __init__(self):
+        # Re-entrant: get_settings() may create the row, and its post_save invalidates
+        self.lock = threading.RLock()
+        self.instance = None
+        self.checked_at = 0.0
+
+    def invalidate(self):
+        with self.lock:
+            self.instance = None
+
+    def get(self):
+        now = time.monotonic()
+        interval = getattr(django_settings, 'SYSTEM_SETTINGS_CACHE_SECONDS', 5)
+        with self.lock:
+            instance = self.instance
+            if instance is not None:
+                # Inside a transaction the row may be rolled back without a signal, so always check it
+                if now - self.checked_at < interval and not connection.in_atomic_block:
+                    return instance
+                if AppSettings.objects.filter(pk=instance.pk, updated_at=instance.updated_at).exists():
+                    self.checked_at = now
+                    return instance
+            self.instance = AppSettings.get_settings()
+            self.checked_at = now
+            return self.instance
+
+
+_app_settings_cache = _AppSettingsCache()
+
+
+@receiver([post_save, post_delete], sender=AppSettings)
+def invalidate_app_settings_cache(sender, **kwargs):
+    _app_settings_cache.invalidate()
+
+
 class PackageHistory(models.Model):
     """
     Track package status changes and actions
@@ -2,6 +2,9 @@ from rest_framework import serializers
 from .models import Package, AppSettings
 from django.utils import timezone
 
+# Largest number of packages one bulk request may create or pick
+MAX_BULK_PACKAGES = 100
+
 
 class PackageSerializer(serializers.ModelSerializer):
 
@@ -9,7 +12,7 @@ class PackageSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Package
-        fields = '__all__'
+        exclude = tuple(Package.LOOKUP_KEYS)
         read_only_fields = ('code', 'created_at', 'updated_at', 'shelf', 'picked_at')
 
     def get_package_type(self, obj):
@@ -110,6 +113,23 @@ class PickPackageSerializer(serializers.ModelSerializer):
         return instance
 
 
+class BulkPickSerializer(PickPackageSerializer):
+    """Picker details plus the ids and/or codes of the packages they are collecting"""
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False, max_length=MAX_BULK_PACKAGES)
+    codes = serializers.ListField(child=serializers.CharField(), required=False, max_length=MAX_BULK_PACKAGES)
+
+    class Meta(PickPackageSerializer.Meta):
+        fields = ['ids', 'codes', 'picked_by', 'picker_phone', 'picker_id']
+
+    def validate(self, data):
+        data = super().validate(data)
+        if not data.get('ids') and not data.get('codes'):
+            raise serializers.ValidationError("Provide the ids or codes of the packages to pick.")
+        if len(data.get('ids', [])) + len(data.get('codes', [])) > MAX_BULK_PACKAGES:
+            raise serializers.ValidationError(f"At most {MAX_BULK_PACKAGES} packages can be picked at once.")
+        return data
+
+
 class AppSettingsSerializer(serializers.ModelSerializer):
     class Meta:
         model = AppSettings
@@ -1,8 +1,16 @@
-from django.test import TestCase
+import re
+from unittest import mock
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework.test import APITestCase
 from rest_framework import status
-from .models import Package
+from extensions.models import SecurityKey
+from lostfound.models import LostItem
+from users.models import User
+from .models import Package, AppSettings, PackageHistory, ShelfOccupancy, MAX_SHELF_NUMBER, code_suffix
+from django.utils import timezone
 
 
 class PackagePickTestCase(APITestCase):
@@ -74,3 +82,324 @@ class PackagePickTestCase(APITestCase):
 
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertIn('already picked', str(response.data))
+
+
+class ShelfOccupancyTestCase(TestCase):
+    def create_package(self, recipient_name='Alice'):
+        return Package.objects.create(description='Box', recipient_name=recipient_name, dropped_by='Courier')
+
+    def test_lowest_free_shelf_allocated_and_released(self):
+        first, second, third = (self.create_package() for _ in range(3))
+        self.assertEqual([first.shelf, second.shelf, third.shelf], ['A1', 'A2', 'A3'])
+        self.assertEqual(self.create_package('bob').shelf, 'B1')
+
+        second.status = Package.PICKED
+        second.save()
+        self.assertIsNone(second.shelf)
+        self.assertEqual(self.create_package().shelf, 'A2')
+
+        third.delete()
+        self.assertEqual(self.create_package().shelf, 'A3')
+        self.assertEqual(ShelfOccupancy.objects.get(prefix='A').occupied_count(), 3)
+
+    def test_picking_twice_releases_once(self):
+        package = self.create_package()
+        stale = Package.objects.get(pk=package.pk)
+        package.status = Package.PICKED
+        package.save()
+        newer = self.create_package()
+        self.assertEqual(newer.shelf, 'A1')
+
+        stale.status = Package.PICKED
+        stale.save()
+        self.assertEqual(self.create_package().shelf, 'A2')
+
+    def test_full_letter_gets_no_shelf(self):
+        occupancy = ShelfOccupancy(prefix='Z')
+        occupancy.bits = (1 << MAX_SHELF_NUMBER) - 1
+        occupancy.save()
+        self.assertIsNone(self.create_package('Zed').shelf)
+
+    def test_saving_shelfless_package_keeps_sequence(self):
+        occupancy = ShelfOccupancy(prefix='Z')
+        occupancy.bits = (1 << MAX_SHELF_NUMBER) - 1
+        occupancy.save()
+        package = self.create_package('Zed')
+        code = package.code
+        for _ in range(3):
+            package.description = 'Edited'
+            package.save()
+        self.assertEqual(package.code, code)
+        self.assertEqual(ShelfOccupancy.objects.get(prefix='Z').sequence, 1)
+
+        ShelfOccupancy.release('Z7')
+        package.save()
+        self.assertEqual(package.shelf, 'Z7')
+        self.assertEqual(package.code, code)
+        self.assertEqual(ShelfOccupancy.objects.get(prefix='Z').sequence, 1)
+
+    def test_codes_unique_without_lookups(self):
+        suffixes = {code_suffix(b'fixed key bytes!', n) for n in range(20000)}
+        self.assertEqual(len(suffixes), 20000)
+        self.assertTrue(all(re.fullmatch(r'[A-Z][0-9A-Z]{5}', suffix) for suffix in suffixes))
+
+        self.create_package()
+        with CaptureQueriesContext(connection) as queries:
+            package = self.create_package()
+        package_queries = [q['sql'] for q in queries.captured_queries if '"myapp_package"' in q['sql']]
+        self.assertEqual(len(package_queries), 1)
+        self.assertTrue(package_queries[0].startswith('INSERT'))
+        occupancy = ShelfOccupancy.objects.get(prefix='A')
+        self.assertEqual(package.code, f"A2{code_suffix(occupancy.code_key, 1)}")
+        self.assertEqual(occupancy.sequence, 2)
+
+    def test_codes_independent_of_secret_key(self):
+        self.create_package()
+        key = bytes(ShelfOccupancy.objects.get(prefix='A').code_key)
+        with override_settings(SECRET_KEY='rotated-secret'):
+            package = self.create_package()
+        self.assertEqual(package.code, f"A2{code_suffix(key, 1)}")
+
+    def test_rebuild_matches_pending_packages(self):
+        packages = [self.create_package() for _ in range(3)]
+        packages[0].status = Package.PICKED
+        packages[0].save()
+        ShelfOccupancy.objects.update(bitmap=b'')
+        ShelfOccupancy.rebuild()
+        self.assertEqual(ShelfOccupancy.objects.get(prefix='A').bits, 0b110)
+
+
+class BulkPackageIntakeTestCase(APITestCase):
+    def setUp(self):
+        user = User.objects.create_user(username='desk', password='pw', role=User.Role.RECEPTION)
+        self.client.force_authenticate(user=user)
+        self.url = reverse('package-bulk')
+
+    def package_data(self, recipient_name, **extra):
+        return {
+            'description': 'Parcel',
+            'recipient_name': recipient_name,
+            'recipient_id': 'k1234',
+            'dropped_by': 'Courier',
+            'dropper_id': 'c1',
+            **extra
+        }
+
+    @mock.patch('myapp.views.PackagePrinter')
+    def test_batch_created_with_shelves_history_and_one_print_job(self, printer_class):
+        Package.objects.create(**self.package_data('Anna'))
+        names = ['Alice', 'bob', 'Amos', 'Ben']
+
+        with mock.patch('myapp.views.Thread') as thread_class, \
+                self.captureOnCommitCallbacks(execute=True) as callbacks:
+            response = self.client.post(self.url, {'packages': [self.package_data(n) for n in names]}, format='json')
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(thread_class.call_count, 1)
+        batch = thread_class.call_args.kwargs['args'][0]
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['count'], 4)
+        self.assertEqual([p['shelf'] for p in response.data['packages']], ['A2', 'B1', 'A3', 'B2'])
+        self.assertEqual([p['code'] for p in batch], [p['code'] for p in response.data['packages']])
+        self.assertEqual(Package.objects.count(), 5)
+        self.assertEqual(PackageHistory.objects.filter(action='created').count(), 4)
+        self.assertEqual(ShelfOccupancy.objects.get(prefix='A').sequence, 3)
+
+    def test_invalid_entry_rejects_whole_batch(self):
+        response = self.client.post(self.url, {'packages': [
+            self.package_data('Alice'),
+            self.package_data('Bob', dropper_id=''),
+        ]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(list(response.data['errors']), [1])
+        self.assertFalse(Package.objects.exists())
+
+
+class BulkPickTestCase(APITestCase):
+    def setUp(self):
+        user = User.objects.create_user(username='desk', password='pw', role=User.Role.RECEPTION)
+        self.client.force_authenticate(user=user)
+        self.url = reverse('package-bulk-pick')
+        self.packages = [
+            Package.objects.create(description='Box', recipient_name=name, recipient_id='k1', dropped_by='Courier')
+            for name in ['Alice', 'Amos', 'Bob']
+        ]
+
+    def test_picks_all_and_frees_shelves(self):
+        alice, amos, bob = self.packages
+        response = self.client.post(self.url, {
+            'ids': [alice.pk, bob.pk], 'codes': [amos.code], 'picked_by': 'Alice', 'picker_id': 'k1'
+        }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 3)
+        self.assertFalse(Package.objects.filter(status=Package.PENDING).exists())
+        self.assertEqual(set(Package.objects.values_list('picked_by', 'picker_id', 'shelf')), {('Alice', 'k1', None)})
+        self.assertEqual(PackageHistory.objects.filter(action='picked').count(), 3)
+        self.assertEqual([o.bits for o in ShelfOccupancy.objects.order_by('prefix')], [0, 0])
+
+    def test_rejects_whole_batch_when_one_is_picked_or_missing(self):
+        alice, amos, bob = self.packages
+        amos.status = Package.PICKED
+        amos.save()
+
+        response = self.client.post(self.url, {'ids': [alice.pk, amos.pk], 'picked_by': 'Alice'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['codes'], [amos.code])
+
+        response = self.client.post(self.url, {'codes': [bob.code, 'NOPE'], 'picked_by': 'Bob'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(response.data['missing'], ['NOPE'])
+        self.assertEqual(Package.objects.filter(status=Package.PENDING).count(), 2)
+
+    def test_picker_details_validated(self):
+        response = self.client.post(self.url, {'ids': [self.packages[0].pk]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(self.url, {'picked_by': 'Alice'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class PackageSearchTestCase(APITestCase):
+    def setUp(self):
+        user = User.objects.create_user(username='desk', password='pw', role=User.Role.RECEPTION)
+        self.client.force_authenticate(user=user)
+        self.url = reverse('package-search')
+
+    def create_package(self, recipient_name, description='Box', **extra):
+        return Package.objects.create(
+            description=description, recipient_name=recipient_name, dropped_by='Courier', **extra
+        )
+
+    def search(self, query, **params):
+        response = self.client.get(self.url, {'q': query, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [result['id'] for result in response.data['results']]
+
+    def test_partial_name_and_phone_ranked(self):
+        jonathan = self.create_package('Jonathan Mwangi', recipient_phone='0712345678')
+        described = self.create_package('Alice', description='Books for Jonathan')
+        self.create_package('Peter Otieno')
+
+        self.assertEqual(self.search('jonat'), [jonathan.pk, described.pk])
+        self.assertEqual(self.search('2345'), [jonathan.pk])
+        self.assertEqual(self.search('jonathan mwa'), [jonathan.pk])
+        self.assertEqual(self.search(jonathan.code[:2]), [jonathan.pk])
+
+    def test_index_follows_edits_and_picks(self):
+        package = self.create_package('Grace')
+        package.recipient_name = 'Wanjiru'
+        package.save()
+        self.assertEqual(self.search('grace'), [])
+        self.assertEqual(self.search('wanji'), [package.pk])
+
+        Package.pick_many([package], picked_by='Kamau')
+        self.assertEqual(self.search('kamau'), [package.pk])
+        self.assertEqual(self.search('kamau', status='pending'), [])
+
+
+class PackageListPaginationTestCase(APITestCase):
+    def setUp(self):
+        user = User.objects.create_user(username='staff', password='pw', role=User.Role.STAFF)
+        self.client.force_authenticate(user=user)
+        self.url = reverse('package-list')
+        created_at = timezone.now()
+        # Pairs share a created_at, so pages have to break ties on id
+        for i in range(7):
+            Package.objects.create(
+                description=f'Box {i}', recipient_name='Jane', dropped_by='Courier',
+                created_at=created_at - timezone.timedelta(minutes=i // 2),
+            )
+        self.expected = list(Package.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+
+    def test_cursor_pages_cover_every_package_once(self):
+        seen = []
+        url = f'{self.url}?page_size=3'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen.extend(package['id'] for package in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(seen, self.expected)
+
+    def test_bare_list_with_link_header(self):
+        response = self.client.get(self.url, {'page_size': 5, 'envelope': 'false'})
+        self.assertEqual([package['id'] for package in response.data], self.expected[:5])
+        next_url = re.fullmatch(r'<(.+)>; rel="next"', response['Link']).group(1)
+
+        response = self.client.get(next_url)
+        self.assertEqual([package['id'] for package in response.data], self.expected[5:])
+        self.assertNotIn('Link', response)
+
+    def test_page_query_does_not_depend_on_depth(self):
+        first = self.client.get(self.url, {'page_size': 2})
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(first.data['next'])
+        (select,) = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('SELECT') and '"myapp_package"' in q['sql']]
+        self.assertNotIn('OFFSET', select.upper())
+        self.assertIn('LIMIT 3', select.upper())
+
+
+class PersonLookupTestCase(APITestCase):
+    def setUp(self):
+        user = User.objects.create_user(username='desk', password='pw', role=User.Role.RECEPTION)
+        self.client.force_authenticate(user=user)
+        self.url = reverse('person-lookup')
+
+    def lookup(self, identifier):
+        response = self.client.get(self.url, {'identifier': identifier})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_finds_everything_for_phone_and_member_id(self):
+        pending = Package.objects.create(
+            description='Box', recipient_name='Alice', recipient_phone='0712345678', dropped_by='Courier'
+        )
+        by_id = Package.objects.create(description='Box', recipient_name='Alice', recipient_id='k1234', dropped_by='Courier')
+        picked = Package.objects.create(description='Box', recipient_name='Bob', recipient_phone='0799999999', dropped_by='Courier')
+        Package.pick_many([picked], picked_by='Alice', picker_phone='+254 712 345 678')
+        lost = LostItem.objects.create(type=LostItem.CARD, card_last_four='1111', reporter_phone='712-345-678')
+        key = SecurityKey.objects.create(key_id='K1', location='Gym', status='checked-out', current_holder_phone='254712345678')
+
+        data = self.lookup('0712 345 678')
+        self.assertEqual(data['phone_key'], '712345678')
+        self.assertEqual([p['id'] for p in data['pending_packages']], [pending.pk])
+        self.assertEqual([p['id'] for p in data['pickups']], [picked.pk])
+        self.assertEqual([i['id'] for i in data['open_lost_reports']], [lost.pk])
+        self.assertEqual([k['id'] for k in data['key_checkouts']], [key.pk])
+        self.assertNotIn('recipient_phone_key', data['pending_packages'][0])
+
+        data = self.lookup(' K1234 ')
+        self.assertIsNone(data['phone_key'])
+        self.assertEqual([p['id'] for p in data['pending_packages']], [by_id.pk])
+        self.assertEqual(data['key_checkouts'], [])
+
+    def test_blank_identifier_rejected(self):
+        response = self.client.get(self.url, {'identifier': '  '})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@mock.patch('myapp.models.connection', mock.Mock(in_atomic_block=False))
+class AppSettingsCacheTestCase(TestCase):
+    def setUp(self):
+        AppSettings.invalidate_cache()
+
+    def test_settings_read_once_per_process(self):
+        settings = AppSettings.get_cached()
+        with self.assertNumQueries(0):
+            self.assertIs(AppSettings.get_cached(), settings)
+
+    def test_save_invalidates_cache(self):
+        AppSettings.get_cached()
+        settings = AppSettings.get_settings()
+        settings.max_reprint_attempts = 5
+        settings.save()
+        self.assertEqual(AppSettings.get_cached().max_reprint_attempts, 5)
+
+    def test_changes_from_other_processes_seen_after_interval(self):
+        settings = AppSettings.get_cached()
+        # A queryset update sends no signals, like a write from another process
+        AppSettings.objects.filter(pk=settings.pk).update(enable_reprint=False, updated_at=timezone.now())
+        with self.assertNumQueries(0):
+            self.assertTrue(AppSettings.get_cached().enable_reprint)
+        with self.settings(SYSTEM_SETTINGS_CACHE_SECONDS=0):
+            self.assertFalse(AppSettings.get_cached().enable_reprint)
@@ -1,11 +1,12 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import PackageViewSet, AppSettingsViewSet
+from .views import PackageViewSet, AppSettingsViewSet, PersonLookupView
 
 router = DefaultRouter()
 router.register(r'packages', PackageViewSet, basename='package')
 router.register(r'settings', AppSettingsViewSet, basename='settings')
 
 urlpatterns = [
+    path('lookup/', PersonLookupView.as_view(), name='person-lookup'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
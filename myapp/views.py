@@ -2,17 +2,27 @@
 from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter
-from .models import Package, AppSettings, PackageHistory
-from .serializers import PackageSerializer, PickPackageSerializer, AppSettingsSerializer
+from .models import Package, AppSettings, PackageHistory, PackageSearchGram
+from .serializers import (
+    PackageSerializer, PickPackageSerializer, BulkPickSerializer, AppSettingsSerializer, MAX_BULK_PACKAGES
+)
 from .printer_service import PackagePrinter
 from threading import Thread
 import logging
+from users.identifiers import lookup_keys
+from users.pagination import KeysetPagination
 from users.permissions import IsAdmin, IsStaff, IsReception
+from lostfound.models import LostItem
+from lostfound.serializers import LostItemSerializer
+from extensions.models import SecurityKey
+from extensions.serializers import SecurityKeyListSerializer
 import csv
 from django.http import HttpResponse
 from datetime import datetime, timedelta
+from django.db import transaction
 from django.db.models import Count, Q
 from django.utils import timezone
 
@@ -27,6 +37,7 @@ class PackageViewSet(viewsets.ModelViewSet):
         'dropped_by', 'picked_by', 'shelf'
     ]
     filterset_fields = ['status', 'type', 'shelf']
+    pagination_class = KeysetPagination.ordered_by('-created_at', '-id')
 
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -39,8 +50,9 @@ class PackageViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(status=Package.PICKED)
 
         if time_range == 'today':
-            today = datetime.now().date()
-            queryset = queryset.filter(picked_at__date=today)
+            # A range rather than picked_at__date, so the picked_at index can be used
+            day_start = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+            queryset = queryset.filter(picked_at__gte=day_start, picked_at__lt=day_start + timedelta(days=1))
         elif time_range == 'week':
             week_ago = datetime.now() - timedelta(days=7)
             queryset = queryset.filter(picked_at__gte=week_ago)
@@ -80,6 +92,78 @@ class PackageViewSet(viewsets.ModelViewSet):
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=False, methods=['post'], url_path='bulk-pick', serializer_class=BulkPickSerializer)
+    def bulk_pick(self, request):
+        """
+        Mark several packages picked by the same person, e.g. a member collecting all their
+        parcels. Either every listed package is picked or, if any is missing or already
+        picked, none is.
+        """
+        serializer = BulkPickSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        ids = serializer.validated_data.pop('ids', [])
+        codes = serializer.validated_data.pop('codes', [])
+        picker = serializer.validated_data
+
+        with transaction.atomic():
+            packages = list(
+                Package.objects.select_for_update().filter(Q(pk__in=ids) | Q(code__in=codes)).order_by('pk')
+            )
+            missing = sorted(set(ids) - {p.pk for p in packages}) + sorted(set(codes) - {p.code for p in packages})
+            if missing:
+                return Response(
+                    {'error': 'Packages not found', 'missing': missing},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            already_picked = [p.code for p in packages if p.status != Package.PENDING]
+            if already_picked:
+                return Response(
+                    {'error': 'Packages already picked', 'codes': already_picked},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            Package.pick_many(packages, **picker)
+            PackageHistory.objects.bulk_create([
+                PackageHistory(
+                    package=package,
+                    action='picked',
+                    old_status=Package.PENDING,
+                    new_status=Package.PICKED,
+                    performed_by=picker.get('picked_by', ''),
+                    notes=f"Picked by {picker.get('picked_by', '')} with ID {picker.get('picker_id', '')}"
+                )
+                for package in packages
+            ])
+
+        return Response(
+            {'count': len(packages), 'packages': PackageSerializer(packages, many=True).data},
+            status=status.HTTP_200_OK
+        )
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """
+        Ranked search over code, recipient, dropper, picker and description using the
+        package search index. Accepts the same status/type/shelf filters as the list.
+        """
+        query = request.query_params.get('q', '')
+        try:
+            limit = min(int(request.query_params.get('limit', 20)), 100)
+        except ValueError:
+            return Response({'error': 'limit must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+        if not query.strip():
+            return Response({'error': 'Provide a search query as q'}, status=status.HTTP_400_BAD_REQUEST)
+
+        packages = PackageSearchGram.search(query, self.filter_queryset(self.get_queryset()), limit=max(limit, 1))
+        results = []
+        for package in packages:
+            data = PackageSerializer(package).data
+            data['rank'] = package.search_rank
+            results.append(data)
+        return Response({'count': len(results), 'results': results})
+
     @action(detail=False, methods=['get'])
     def stats(self, request):
         pending_count = Package.objects.filter(status=Package.PENDING).count()
@@ -145,9 +229,9 @@ class PackageViewSet(viewsets.ModelViewSet):
         })
 
     def get_permissions(self):
-        if self.action in ['create', 'update', 'partial_update', 'destroy']:
+        if self.action in ['create', 'bulk', 'update', 'partial_update', 'destroy']:
             permission_classes = [IsAdmin | IsReception | IsStaff]
-        elif self.action in ['pick']:
+        elif self.action in ['pick', 'bulk_pick', 'search']:
             permission_classes = [IsStaff | IsReception]
         elif self.action in ['export']:
             permission_classes = [IsAdmin | IsStaff]
@@ -166,38 +250,13 @@ class PackageViewSet(viewsets.ModelViewSet):
                 package = serializer.save()
 
                 # Log history
-                dropper_info = request.data.get('dropped_by', 'Unknown')
-                if request.data.get('dropper_id'):
-                    dropper_info += f" (Member: {request.data.get('dropper_id')})"
-                elif request.data.get('dropper_phone'):
-                    dropper_info += f" (Phone: {request.data.get('dropper_phone')})"
+                PackageHistory.objects.create(**self._created_history(package, request.data))
 
-                PackageHistory.objects.create(
-                    package=package,
-                    action='created',
-                    new_status=Package.PENDING,
-                    performed_by=getattr(request.user, 'username', 'System'),
-                    notes=f"Package created by {dropper_info}"
-                )
-
-                settings = AppSettings.get_settings()
+                settings = AppSettings.get_cached()
                 if settings.auto_print_on_create:
-                    print_data = {
-                        'code': package.code,
-                        'type': package.get_type_display(),
-                        'description': package.description,
-                        'recipient_name': package.recipient_name,
-                        'recipient_phone': package.recipient_phone,
-                        'recipient_id': package.recipient_id,
-                        'dropped_by': package.dropped_by,
-                        'dropper_phone': package.dropper_phone,
-                        'dropper_id': package.dropper_id,
-                        'shelf': package.shelf
-                    }
-
                     print_thread = Thread(
                         target=self._print_receipt,
-                        args=(print_data,),
+                        args=(self._print_data(package),),
                         daemon=True
                     )
                     print_thread.start()
@@ -213,6 +272,51 @@ class PackageViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Create a batch of packages from one courier drop-off.
+
+        Expects {"packages": [...]} with each entry shaped like a single create. Nothing is
+        saved unless every entry is valid; shelves, codes, packages and history rows are
+        written in one transaction and the receipts are printed by one background job.
+        """
+        items = request.data.get('packages') if isinstance(request.data, dict) else None
+        if not isinstance(items, list) or not items:
+            return Response(
+                {'error': 'Provide a non-empty list of packages under "packages"'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(items) > MAX_BULK_PACKAGES:
+            return Response(
+                {'error': f'At most {MAX_BULK_PACKAGES} packages can be created at once'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        serializer = PackageSerializer(data=items, many=True)
+        if not serializer.is_valid():
+            return Response({'errors': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        settings = AppSettings.get_cached()
+        with transaction.atomic():
+            packages = Package.bulk_create_pending([Package(**data) for data in serializer.validated_data])
+            PackageHistory.objects.bulk_create([
+                PackageHistory(**self._created_history(package, item))
+                for package, item in zip(packages, items)
+            ])
+            if settings.auto_print_on_create:
+                print_batch = [self._print_data(package) for package in packages]
+                transaction.on_commit(lambda: Thread(
+                    target=self._print_receipts,
+                    args=(print_batch,),
+                    daemon=True
+                ).start())
+
+        return Response(
+            {'count': len(packages), 'packages': PackageSerializer(packages, many=True).data},
+            status=status.HTTP_201_CREATED
+        )
+
     def update(self, request, *args, **kwargs):
         """Override update to log package edits"""
         partial = kwargs.pop('partial', False)
@@ -270,7 +374,7 @@ class PackageViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'])
     def reprint(self, request, pk=None):
         package = self.get_object()
-        settings = AppSettings.get_settings()
+        settings = AppSettings.get_cached()
 
         if not settings.enable_reprint:
             return Response(
@@ -293,18 +397,7 @@ class PackageViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
 
-        print_data = {
-            'code': package.code,
-            'type': package.get_type_display(),
-            'description': package.description,
-            'recipient_name': package.recipient_name,
-            'recipient_phone': package.recipient_phone,
-            'recipient_id': package.recipient_id,
-            'dropped_by': package.dropped_by,
-            'dropper_phone': package.dropper_phone,
-            'dropper_id': package.dropper_id,
-            'shelf': package.shelf
-        }
+        print_data = self._print_data(package)
 
         # Check for recent edits
         recent_edit = PackageHistory.objects.filter(
@@ -348,7 +441,7 @@ class PackageViewSet(viewsets.ModelViewSet):
     def history(self, request, pk=None):
         package = self.get_object()
         history = package.history.all()
-        settings = AppSettings.get_settings()
+        settings = AppSettings.get_cached()
 
         # Count reprint attempts
         reprint_count = PackageHistory.objects.filter(
@@ -377,9 +470,44 @@ class PackageViewSet(viewsets.ModelViewSet):
             }
         })
 
+    def _created_history(self, package, data):
+        """PackageHistory fields for a newly created package"""
+        dropper_info = data.get('dropped_by', 'Unknown')
+        if data.get('dropper_id'):
+            dropper_info += f" (Member: {data.get('dropper_id')})"
+        elif data.get('dropper_phone'):
+            dropper_info += f" (Phone: {data.get('dropper_phone')})"
+
+        return {
+            'package': package,
+            'action': 'created',
+            'new_status': Package.PENDING,
+            'performed_by': getattr(self.request.user, 'username', 'System'),
+            'notes': f"Package created by {dropper_info}"
+        }
+
+    def _print_data(self, package):
+        return {
+            'code': package.code,
+            'type': package.get_type_display(),
+            'description': package.description,
+            'recipient_name': package.recipient_name,
+            'recipient_phone': package.recipient_phone,
+            'recipient_id': package.recipient_id,
+            'dropped_by': package.dropped_by,
+            'dropper_phone': package.dropper_phone,
+            'dropper_id': package.dropper_id,
+            'shelf': package.shelf
+        }
+
+    def _print_receipts(self, batch):
+        """Print a bulk intake's receipts one after another on a single worker"""
+        for package_data in batch:
+            self._print_receipt(package_data)
+
     def _print_receipt(self, package_data):
         try:
-            settings = AppSettings.get_settings()
+            settings = AppSettings.get_cached()
             printer = PackagePrinter(ip=settings.printer_ip, port=settings.printer_port, enable_qr=settings.enable_qr_codes)
             if not printer.print_label_receipt(package_data):
                 logger.error(f"Failed to print label receipt for package {package_data['code']} - printer connection or configuration issue")
@@ -389,6 +517,57 @@ class PackageViewSet(viewsets.ModelViewSet):
             logger.error(f"Exception during printing for package {package_data['code']}: {e}")
 
 
+class PersonLookupView(APIView):
+    """
+    Everything the desk holds for one person, given their phone number or member ID:
+    pending packages, recent pickups, open lost reports and keys they have checked out.
+    Every query is an exact match on an indexed lookup key.
+    """
+    permission_classes = [IsStaff | IsReception]
+    # Most recent pickups returned
+    PICKUP_LIMIT = 20
+
+    def get(self, request):
+        identifier = request.query_params.get('identifier', '')
+        phone_key, member_key = lookup_keys(identifier)
+        if not phone_key and not member_key:
+            return Response(
+                {'error': 'Provide a phone number or member ID as identifier'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        def matching(**keys):
+            # Q(pk__in=[]) matches nothing, for a key the identifier does not provide
+            query = Q(pk__in=[])
+            for field, value in keys.items():
+                if value:
+                    query |= Q(**{field: value})
+            return query
+
+        pending = Package.objects.filter(
+            matching(recipient_phone_key=phone_key, recipient_id_key=member_key), status=Package.PENDING
+        )
+        pickups = Package.objects.filter(
+            matching(picker_phone_key=phone_key, picker_id_key=member_key), status=Package.PICKED
+        ).order_by('-picked_at')[:self.PICKUP_LIMIT]
+        lost_reports = LostItem.objects.filter(
+            matching(reporter_phone_key=phone_key, reporter_member_key=member_key), status=LostItem.PENDING
+        ).order_by('-date_reported')
+        key_checkouts = SecurityKeyListSerializer.with_recent_history(SecurityKey.objects.filter(
+            matching(current_holder_phone_key=phone_key), status='checked-out'
+        ).order_by('-checkout_time'))
+
+        return Response({
+            'identifier': identifier,
+            'phone_key': phone_key,
+            'member_key': member_key,
+            'pending_packages': PackageSerializer(pending, many=True).data,
+            'pickups': PackageSerializer(pickups, many=True).data,
+            'open_lost_reports': LostItemSerializer(lost_reports, many=True).data,
+            'key_checkouts': SecurityKeyListSerializer(key_checkouts, many=True).data,
+        })
+
+
 class AppSettingsViewSet(viewsets.ModelViewSet):
     queryset = AppSettings.objects.all()
     serializer_class = AppSettingsSerializer
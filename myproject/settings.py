@@ -149,6 +149,41 @@ PRINTER_IP = "192.168."
 PRINTER_PORT = 9100
 PRINTER_ENABLED = True  # Set to False to disable printing for testing
 
+# Lost & found SystemSettings and the package desk AppSettings are cached per process;
+# this is how long another process's change can go unnoticed before the cache checks
+# the database again
+SYSTEM_SETTINGS_CACHE_SECONDS = 5
+
+# The web server process reruns requeued lost & found match jobs, and jobs left running
+# by a process that exited, this often. 0 turns the sweep off; `manage.py
+# run_match_jobs` then has to be scheduled instead
+MATCH_JOB_SWEEP_SECONDS = 60
+
+# Audit EventLog rows are queued in memory and written in batches by a background
+# thread: at most AUDIT_LOG_BATCH_SIZE rows per INSERT, at least every AUDIT_LOG_FLUSH_MS.
+# Events beyond AUDIT_LOG_QUEUE_SIZE waiting rows are dropped and counted
+AUDIT_LOG_QUEUE_SIZE = 10000
+AUDIT_LOG_BATCH_SIZE = 200
+AUDIT_LOG_FLUSH_MS = 500
+
+# How requests are audited: the first matching path prefix wins. 'skip' logs nothing,
+# 'full' logs every read as its own event and 'summary' keeps one event per user, path
+# and AUDIT_READ_SUMMARY_SECONDS window with a request count. Logins, logouts and
+# writes are always logged in full outside 'skip' paths.
+AUDIT_PATH_RULES = [
+    ('/admin/', 'skip'),
+    ('/static/', 'skip'),
+    # Reading the audit trail is itself audited request by request
+    ('/api/auth/event-logs/', 'full'),
+]
+AUDIT_READ_MODE = 'summary'
+AUDIT_READ_SUMMARY_SECONDS = 60
+
+# `manage.py archive_event_logs` moves EventLog rows older than AUDIT_RETENTION_DAYS
+# into one gzipped JSON-lines file per month under AUDIT_ARCHIVE_DIR
+AUDIT_ARCHIVE_DIR = BASE_DIR / 'audit_archive'
+AUDIT_RETENTION_DAYS = 90
+
 # Logging configuration
 LOGGING = {
     'version': 1,
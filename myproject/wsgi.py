@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'myproject.settings')
 
 application = get_wsgi_application()
+
+# Retry lost & found match jobs that failed or were cut off by a restart
+from lostfound.jobs import start_job_sweeper  # noqa: E402
+
+start_job_sweeper()
@@ -0,0 +1,75 @@
+"""
+Rolling archive of old audit EventLog rows.
+
+Rows older than the retention window are appended, oldest first, to one gzipped
+JSON-lines file per month (`eventlog-YYYY-MM.jsonl.gz`, local time) and then deleted
+from the table, a batch at a time. Each batch is written and synced before its rows are
+deleted, so an interrupted run loses nothing; at worst its last batch is archived twice
+and readers should keep the first line per `id`. Appending to an existing month adds a
+gzip member, which `gzip.open` reads back as one stream.
+"""
+import gzip
+import json
+import os
+from collections import defaultdict
+from datetime import timedelta
+from pathlib import Path
+from django.conf import settings
+from django.utils import timezone
+from .models import EventLog
+
+
+def archive_cutoff(days=None):
+    days = days if days is not None else getattr(settings, 'AUDIT_RETENTION_DAYS', 90)
+    return timezone.now() - timedelta(days=days)
+
+
+def archive_path(output_dir, month):
+    return Path(output_dir) / f'eventlog-{month}.jsonl.gz'
+
+
+def event_record(event):
+    return {
+        'id': event.pk,
+        'timestamp': event.timestamp.isoformat(),
+        'user_id': event.user_id,
+        'username': event.user.username if event.user else None,
+        'action': event.action,
+        'ip_address': event.ip_address,
+        'user_agent': event.user_agent,
+        'object_type': event.object_type,
+        'object_id': event.object_id,
+        'metadata': event.metadata,
+    }
+
+
+def archive_events(before, output_dir=None, batch_size=1000, dry_run=False):
+    """
+    Move events with timestamp < before into the monthly archive files; returns
+    {month: events archived}. With dry_run nothing is written or deleted.
+    """
+    output_dir = Path(output_dir or getattr(settings, 'AUDIT_ARCHIVE_DIR'))
+    old_events = EventLog.objects.filter(timestamp__lt=before).select_related('user').order_by('timestamp', 'id')
+    counts = defaultdict(int)
+
+    if dry_run:
+        for timestamp in old_events.values_list('timestamp', flat=True).iterator():
+            counts[timezone.localtime(timestamp).strftime('%Y-%m')] += 1
+        return dict(counts)
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    while True:
+        batch = list(old_events[:batch_size])
+        if not batch:
+            return dict(counts)
+        by_month = defaultdict(list)
+        for event in batch:
+            by_month[timezone.localtime(event.timestamp).strftime('%Y-%m')].append(event_record(event))
+        for month, records in by_month.items():
+            with open(archive_path(output_dir, month), 'ab') as raw:
+                with gzip.GzipFile(fileobj=raw, mode='wb') as archive:
+                    archive.write(''.join(json.dumps(record) + '\n' for record in records).encode())
+                raw.flush()
+                os.fsync(raw.fileno())
+            counts[month] += len(records)
+        EventLog.objects.filter(pk__in=[event.pk for event in batch]).delete()
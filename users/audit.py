@@ -0,0 +1,247 @@
+"""
+Background writer for the audit EventLog rows recorded by AuditMiddleware.
+
+Requests only put an event on a bounded in-process queue; a daemon thread writes the
+queued events with bulk_create once AUDIT_LOG_BATCH_SIZE of them are waiting or
+AUDIT_LOG_FLUSH_MS has passed. When the database falls behind and the queue is full,
+new events are dropped rather than slowing requests down, and counted in stats().
+Whatever is still queued when the process exits is written by an atexit hook.
+
+AuditPolicy decides how much of a request is kept. Logins, logouts and writes are
+always logged in full. Reads are, by default, only counted per user, method, path and
+AUDIT_READ_SUMMARY_SECONDS window, and each window becomes one ACCESS row carrying the
+count once it has closed.
+"""
+import atexit
+import json
+import logging
+import queue
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from .models import EventLog
+
+logger = logging.getLogger(__name__)
+
+SENSITIVE_FIELDS = ['password', 'token', 'secret']
+
+
+def safe_request_data(body):
+    """Request body parsed as JSON with sensitive fields redacted, or {} when it is not JSON"""
+    try:
+        if body:
+            data = json.loads(body)
+            # Redact sensitive fields
+            for field in SENSITIVE_FIELDS:
+                if field in data:
+                    data[field] = '*****'
+            return data
+    except:
+        return {}
+    return {}
+
+
+class AuditPolicy:
+    """
+    How a request is audited, from AUDIT_PATH_RULES: (path prefix, mode) pairs where the
+    first matching prefix wins. 'skip' drops every request under the prefix; 'full' and
+    'summary' set how reads are kept there. Reads under no rule use AUDIT_READ_MODE.
+    """
+    FULL = 'full'
+    SUMMARY = 'summary'
+    SKIP = 'skip'
+    MODES = (FULL, SUMMARY, SKIP)
+
+    def __init__(self, rules=None, read_mode=None):
+        self.rules = list(rules if rules is not None else getattr(settings, 'AUDIT_PATH_RULES', []))
+        self.read_mode = read_mode or getattr(settings, 'AUDIT_READ_MODE', self.SUMMARY)
+        for prefix, mode in [*self.rules, ('AUDIT_READ_MODE', self.read_mode)]:
+            if mode not in self.MODES:
+                raise ImproperlyConfigured(f"Unknown audit mode {mode!r} for {prefix}, expected one of {self.MODES}")
+
+    def mode(self, path, action):
+        read_mode = self.read_mode
+        for prefix, mode in self.rules:
+            if path.startswith(prefix):
+                if mode == self.SKIP:
+                    return self.SKIP
+                read_mode = mode
+                break
+        if action != EventLog.ActionTypes.ACCESS:
+            return self.FULL
+        return read_mode
+
+
+class AuditLogWriter:
+    def __init__(self, max_queue=None, batch_size=None, flush_ms=None, summary_seconds=None, start_thread=True):
+        self.max_queue = max_queue or getattr(settings, 'AUDIT_LOG_QUEUE_SIZE', 10000)
+        self.batch_size = batch_size or getattr(settings, 'AUDIT_LOG_BATCH_SIZE', 200)
+        self.flush_interval = (flush_ms or getattr(settings, 'AUDIT_LOG_FLUSH_MS', 500)) / 1000
+        self.summary_seconds = summary_seconds or getattr(settings, 'AUDIT_READ_SUMMARY_SECONDS', 60)
+        self.start_thread = start_thread
+        self.queue = queue.Queue(maxsize=self.max_queue)
+        self.lock = threading.Lock()
+        self.thread = None
+        self.stopping = threading.Event()
+        # (user_id, method, path, window start) -> [count, ip_address, user_agent]
+        self.read_counts = {}
+        self.counters = {
+            'queued': 0, 'written': 0, 'dropped': 0, 'failed': 0, 'batches': 0, 'max_depth': 0,
+            'reads_counted': 0, 'summaries': 0,
+        }
+
+    def submit(self, body=None, **fields):
+        """
+        Queue one EventLog; returns False if it was dropped because the queue is full.
+
+        body is the raw request body; it is parsed into metadata['data'] by the writer
+        thread instead of on the request.
+        """
+        self._ensure_thread()
+        try:
+            self.queue.put_nowait((fields, body))
+        except queue.Full:
+            with self.lock:
+                self.counters['dropped'] += 1
+                dropped = self.counters['dropped']
+            if dropped == 1 or dropped % 1000 == 0:
+                logger.warning(f"Audit log queue full ({self.max_queue} events), {dropped} events dropped so far")
+            return False
+        with self.lock:
+            self.counters['queued'] += 1
+            self.counters['max_depth'] = max(self.counters['max_depth'], self.queue.qsize())
+        return True
+
+    def count_read(self, user_id, method, path, ip_address, user_agent, timestamp):
+        """Add a read to its per-user, per-path window instead of queueing an event for it"""
+        window_start = int(timestamp.timestamp()) // self.summary_seconds * self.summary_seconds
+        key = (user_id, method, path, window_start)
+        with self.lock:
+            entry = self.read_counts.get(key)
+            if entry is None:
+                self.read_counts[key] = [1, ip_address, user_agent]
+            else:
+                entry[0] += 1
+                entry[1], entry[2] = ip_address, user_agent
+            self.counters['reads_counted'] += 1
+        self._ensure_thread()
+
+    def stats(self):
+        """Counters since start plus the current queue depth, for monitoring back-pressure"""
+        with self.lock:
+            stats = dict(self.counters)
+            stats['open_read_windows'] = len(self.read_counts)
+        stats.update({
+            'depth': self.queue.qsize(),
+            'capacity': self.max_queue,
+            'batch_size': self.batch_size,
+            'flush_ms': int(self.flush_interval * 1000),
+            'read_summary_seconds': self.summary_seconds,
+            'running': bool(self.thread and self.thread.is_alive()),
+        })
+        return stats
+
+    def flush(self, include_open_windows=False):
+        """
+        Write everything queued so far, and the read summaries of closed windows, from the
+        calling thread; returns the number of rows written.
+        """
+        written = self._write(self._take_summaries(include_open_windows))
+        while True:
+            batch = self._take(block=False)
+            if not batch:
+                return written
+            written += self._write(batch)
+
+    def shutdown(self, timeout=5):
+        """Stop the writer thread and write whatever is still queued or counted"""
+        self.stopping.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+        return self.flush(include_open_windows=True)
+
+    def _ensure_thread(self):
+        if not self.start_thread or (self.thread is not None and self.thread.is_alive()):
+            return
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.stopping.clear()
+                self.thread = threading.Thread(target=self._run, name='audit-log-writer', daemon=True)
+                self.thread.start()
+
+    def _run(self):
+        try:
+            while not self.stopping.is_set():
+                batch = self._take(block=True) + self._take_summaries()
+                if batch:
+                    self._write(batch)
+        finally:
+            connection.close()
+
+    def _take(self, block):
+        """Up to batch_size queued events, waiting at most flush_interval for the batch to fill"""
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            try:
+                if block:
+                    batch.append(self.queue.get(timeout=max(deadline - time.monotonic(), 0.001)))
+                else:
+                    batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+            if block and time.monotonic() >= deadline:
+                break
+        return batch
+
+    def _take_summaries(self, include_open_windows=False):
+        """One ACCESS event per read window that has closed (or every window)"""
+        current_window = int(time.time()) // self.summary_seconds * self.summary_seconds
+        with self.lock:
+            keys = [key for key in self.read_counts if include_open_windows or key[3] < current_window]
+            windows = [(key, self.read_counts.pop(key)) for key in keys]
+            self.counters['summaries'] += len(windows)
+        return [
+            ({
+                'user_id': user_id,
+                'action': EventLog.ActionTypes.ACCESS,
+                'ip_address': ip_address,
+                'user_agent': user_agent,
+                'timestamp': datetime.fromtimestamp(window_start, tz=dt_timezone.utc),
+                'metadata': {
+                    'method': method,
+                    'path': path,
+                    'query_params': {},
+                    'count': count,
+                    'window_seconds': self.summary_seconds,
+                },
+            }, None)
+            for (user_id, method, path, window_start), (count, ip_address, user_agent) in windows
+        ]
+
+    def _write(self, batch):
+        if not batch:
+            return 0
+        events = []
+        for fields, body in batch:
+            metadata = dict(fields.pop('metadata', {}))
+            metadata['data'] = safe_request_data(body)
+            events.append(EventLog(metadata=metadata, **fields))
+        try:
+            EventLog.objects.bulk_create(events)
+        except Exception:
+            logger.exception(f"Failed to write {len(events)} audit log events")
+            with self.lock:
+                self.counters['failed'] += len(events)
+            return 0
+        with self.lock:
+            self.counters['written'] += len(events)
+            self.counters['batches'] += 1
+        return len(events)
+
+
+audit_writer = AuditLogWriter()
+atexit.register(audit_writer.shutdown)
@@ -0,0 +1,35 @@
+"""
+Lookup keys for the phone numbers and member IDs typed in at the desk.
+
+The same phone is written as 0712 345 678, +254712345678 or 712345678 and the same
+member ID as k1234 or K1234. Models keep these keys in indexed columns next to the raw
+values so all of one person's records can be found with exact index lookups.
+"""
+import re
+
+# Trailing digits kept from a phone number, which drops country and trunk prefixes
+PHONE_KEY_DIGITS = 9
+# Fewer digits than this in a looked-up identifier is not treated as a phone number
+PHONE_LOOKUP_MIN_DIGITS = 7
+
+
+def normalize_phone(value):
+    """Last PHONE_KEY_DIGITS digits of a phone number, or None when it has no digits"""
+    if not isinstance(value, str):
+        return None
+    return re.sub(r'\D', '', value)[-PHONE_KEY_DIGITS:] or None
+
+
+def normalize_member_id(value):
+    """Member ID without whitespace, upper-cased, or None when blank"""
+    if not isinstance(value, str):
+        return None
+    return re.sub(r'\s', '', value).upper() or None
+
+
+def lookup_keys(identifier):
+    """(phone_key, member_key) to search for an identifier that may be either"""
+    phone_key = normalize_phone(identifier)
+    if phone_key and len(re.sub(r'\D', '', identifier)) < PHONE_LOOKUP_MIN_DIGITS:
+        phone_key = None
+    return phone_key, normalize_member_id(identifier)
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from users.archive import archive_cutoff, archive_events
+
+
+class Command(BaseCommand):
+    help = 'Move audit events older than the retention window into monthly gzipped JSON-lines files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None,
+                            help='Keep this many days of events in the table (default AUDIT_RETENTION_DAYS)')
+        parser.add_argument('--output-dir', default=None,
+                            help='Directory for the archive files (default AUDIT_ARCHIVE_DIR)')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Events written and deleted per batch')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only count the events that would be archived')
+
+    def handle(self, *args, **options):
+        counts = archive_events(
+            archive_cutoff(options['days']),
+            output_dir=options['output_dir'],
+            batch_size=options['batch_size'],
+            dry_run=options['dry_run'],
+        )
+        for month, count in sorted(counts.items()):
+            self.stdout.write(f'{month}: {count} events')
+        verb = 'Would archive' if options['dry_run'] else 'Archived'
+        self.stdout.write(
+            self.style.SUCCESS(f'{verb} {sum(counts.values())} audit events')
+        )
@@ -1,27 +1,40 @@
 #  for event logs. record every event done by any user in the system 
+from django.utils import timezone
 from django.utils.deprecation import MiddlewareMixin
+from . import audit
 from .models import EventLog
-import json
 
 class AuditMiddleware(MiddlewareMixin):
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.policy = audit.AuditPolicy()
+
     def process_request(self, request):
-        # Skip logging for certain paths
-        if request.path.startswith('/admin/') or request.path.startswith('/static/'):
-            return None
-            
         if request.user.is_authenticated:
             action = self._determine_action(request)
-            
-            EventLog.objects.create(
-                user=request.user,
+            # Skip, count or fully log the request according to AUDIT_PATH_RULES
+            mode = self.policy.mode(request.path, action)
+            if mode == audit.AuditPolicy.SKIP:
+                return None
+            if mode == audit.AuditPolicy.SUMMARY:
+                audit.audit_writer.count_read(
+                    request.user.pk, request.method, request.path, self._get_client_ip(request),
+                    request.META.get('HTTP_USER_AGENT', ''), timezone.now()
+                )
+                return None
+
+            # Written in batches by the audit writer thread, which also parses the body
+            audit.audit_writer.submit(
+                body=self._get_request_body(request),
+                user_id=request.user.pk,
                 action=action,
                 ip_address=self._get_client_ip(request),
                 user_agent=request.META.get('HTTP_USER_AGENT', ''),
+                timestamp=timezone.now(),
                 metadata={
                     'method': request.method,
                     'path': request.path,
                     'query_params': dict(request.GET),
-                    'data': self._get_safe_request_data(request)
                 }
             )
     
@@ -43,15 +56,11 @@ class AuditMiddleware(MiddlewareMixin):
         x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
         return x_forwarded_for.split(',')[0] if x_forwarded_for else request.META.get('REMOTE_ADDR')
     
-    def _get_safe_request_data(self, request):
+    def _get_request_body(self, request):
+        # A multipart upload is never valid JSON, so there is no need to keep a copy of it
+        if request.content_type == 'multipart/form-data':
+            return None
         try:
-            if request.body:
-                data = json.loads(request.body)
-                # Redact sensitive fields
-                for field in ['password', 'token', 'secret']:
-                    if field in data:
-                        data[field] = '*****'
-                return data
-        except:
-            return {}
-        return {}
\ No newline at end of file
+            return request.body
+        except Exception:
+            return None
\ No newline at end of file
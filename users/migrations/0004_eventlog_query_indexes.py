@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_hot_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='eventlog',
+            index=models.Index(fields=['user', 'timestamp'], name='eventlog_user_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='eventlog',
+            index=models.Index(fields=['action', 'timestamp'], name='eventlog_action_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='eventlog',
+            index=models.Index(fields=['object_type', 'object_id', 'timestamp'], name='eventlog_object_time_idx'),
+        ),
+    ]
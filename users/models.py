@@ -43,7 +43,15 @@ class EventLog(models.Model):
     object_type = models.CharField(max_length=100, null=True, blank=True)
     object_id = models.CharField(max_length=100, null=True, blank=True)
     metadata = models.JSONField(default=dict, blank=True)
-    timestamp = models.DateTimeField(default=timezone.now)
+    timestamp = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        # The audit query API filters on one of these and pages by (timestamp, id)
+        indexes = [
+            models.Index(fields=['user', 'timestamp'], name='eventlog_user_time_idx'),
+            models.Index(fields=['action', 'timestamp'], name='eventlog_action_time_idx'),
+            models.Index(fields=['object_type', 'object_id', 'timestamp'], name='eventlog_object_time_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username if self.user else 'System'} - {self.get_action_display()} at {self.timestamp}"
@@ -0,0 +1,110 @@
+"""
+Keyset (seek) pagination for large, append-mostly tables.
+
+Pages are ordered by `ordering`, whose last field must be unique, and the cursor is the
+ordering values of the last row served. The next page is read with a WHERE clause that
+seeks past those values on an index instead of an OFFSET, so every page costs the same
+however deep into the table it is. Pages only go forwards.
+
+Responses are {"next": url, "results": [...]}. Clients written for the old unpaginated
+endpoints can pass `?envelope=false` to get the page as a bare list, with the next page
+in a `Link: <url>; rel="next"` header instead. That list is still only one page, so
+such clients have to follow the Link header to see every row; returning the whole
+table would bring back the cost pagination removes.
+"""
+import base64
+import json
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    ordering = ('-id',)
+    page_size = 100
+    max_page_size = 500
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    envelope_query_param = 'envelope'
+    invalid_cursor_message = 'Invalid cursor'
+
+    @classmethod
+    def ordered_by(cls, *ordering):
+        """Subclass paging by `ordering`, e.g. KeysetPagination.ordered_by('-created_at', '-id')"""
+        return type(cls.__name__, (cls,), {'ordering': ordering})
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.envelope = request.query_params.get(self.envelope_query_param, '').lower() not in ('false', '0', 'no')
+        fields = [name.lstrip('-') for name in self.ordering]
+        queryset = queryset.order_by(*self.ordering)
+
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded:
+            queryset = queryset.filter(self.seek(queryset.model, self.decode_cursor(encoded, len(fields))))
+
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        self.next_values = [getattr(rows[-1], name) for name in fields] if self.has_next else None
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def seek(self, model, values):
+        """Rows strictly after `values` in `ordering`: (a, b) after (x, y) is a > x OR (a = x AND b > y)"""
+        condition = Q()
+        equal = {}
+        for name, value in zip(self.ordering, values):
+            field = name.lstrip('-')
+            try:
+                value = model._meta.get_field('id' if field == 'pk' else field).to_python(value)
+            except DjangoValidationError:
+                raise NotFound(self.invalid_cursor_message)
+            lookup = 'lt' if name.startswith('-') else 'gt'
+            condition |= Q(**equal, **{f'{field}__{lookup}': value})
+            equal[field] = value
+        return condition
+
+    def encode_cursor(self, values):
+        raw = json.dumps([value.isoformat() if hasattr(value, 'isoformat') else value for value in values])
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, encoded, length):
+        try:
+            values = json.loads(base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4)))
+        except (ValueError, TypeError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != length:
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_values))
+
+    def get_paginated_response(self, data):
+        next_link = self.get_next_link()
+        if not self.envelope:
+            return Response(data, headers={'Link': f'<{next_link}>; rel="next"'} if next_link else None)
+        return Response({'next': next_link, 'results': data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -1,3 +1,205 @@
-from django.test import TestCase
+import gzip
+import json
+import tempfile
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+from unittest import mock
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.test import TestCase, RequestFactory, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from .audit import AuditLogWriter, AuditPolicy
+from .middleware import AuditMiddleware
+from .models import User, EventLog
 
-# Create your tests here.
+
+class AuditLogWriterTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='desk', password='pw')
+        self.writer = AuditLogWriter(max_queue=3, batch_size=2, start_thread=False)
+        patcher = mock.patch('users.audit.audit_writer', self.writer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.middleware = AuditMiddleware(lambda request: None)
+
+    def request(self, method, path, data=None, **extra):
+        factory = RequestFactory()
+        request = getattr(factory, method)(path, data, content_type='application/json', **extra) if data \
+            else getattr(factory, method)(path, **extra)
+        request.user = self.user
+        self.middleware.process_request(request)
+
+    def test_events_are_queued_then_written_in_batches(self):
+        with self.assertNumQueries(0):
+            self.request('delete', '/api/packages/1/', HTTP_USER_AGENT='tests')
+            self.request('post', '/api/packages/', {'description': 'Box', 'password': 'hunter2'})
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.writer.flush(), 2)
+
+        delete_event, post_event = EventLog.objects.order_by('timestamp')
+        self.assertEqual(delete_event.action, EventLog.ActionTypes.DELETE)
+        self.assertEqual(delete_event.user, self.user)
+        self.assertEqual(delete_event.user_agent, 'tests')
+        self.assertEqual(delete_event.metadata, {'method': 'DELETE', 'path': '/api/packages/1/', 'query_params': {}, 'data': {}})
+        self.assertEqual(post_event.action, EventLog.ActionTypes.CREATE)
+        self.assertEqual(post_event.metadata['data'], {'description': 'Box', 'password': '*****'})
+
+    def test_reads_summarised_per_user_path_and_window(self):
+        now = datetime(2026, 1, 5, 9, 30, 20, tzinfo=dt_timezone.utc)
+        with mock.patch('users.middleware.timezone.now', return_value=now):
+            for _ in range(3):
+                self.request('get', '/api/packages/', HTTP_USER_AGENT='poller')
+            self.request('get', '/api/items/stats/')
+            self.request('get', '/api/auth/event-logs/')
+            self.request('post', '/admin/users/user/add/', {'username': 'x'})
+        self.assertEqual(self.writer.stats()['depth'], 1)
+
+        # Read windows are written once they have closed
+        with mock.patch('users.audit.time.time', return_value=now.timestamp()):
+            self.assertEqual(self.writer.flush(), 1)
+        with mock.patch('users.audit.time.time', return_value=now.timestamp() + 60):
+            self.assertEqual(self.writer.flush(), 2)
+
+        audited = EventLog.objects.get(metadata__path='/api/auth/event-logs/')
+        self.assertNotIn('count', audited.metadata)
+        summary = EventLog.objects.get(metadata__path='/api/packages/')
+        self.assertEqual(summary.action, EventLog.ActionTypes.ACCESS)
+        self.assertEqual((summary.metadata['count'], summary.metadata['window_seconds']), (3, 60))
+        self.assertEqual(summary.timestamp, now.replace(second=0))
+        self.assertEqual(summary.user_agent, 'poller')
+        self.assertEqual(EventLog.objects.get(metadata__path='/api/items/stats/').metadata['count'], 1)
+        self.assertFalse(EventLog.objects.filter(metadata__path__startswith='/admin/').exists())
+
+    @override_settings(AUDIT_PATH_RULES=[('/api/', 'bogus')])
+    def test_unknown_mode_rejected(self):
+        with self.assertRaises(ImproperlyConfigured):
+            AuditPolicy()
+
+    def test_full_queue_drops_and_counts(self):
+        for _ in range(5):
+            self.request('put', '/api/packages/1/')
+        stats = self.writer.stats()
+        self.assertEqual((stats['queued'], stats['dropped'], stats['depth']), (3, 2, 3))
+
+        self.assertEqual(self.writer.shutdown(), 3)
+        self.assertEqual(self.writer.stats()['written'], 3)
+        self.assertEqual(EventLog.objects.count(), 3)
+
+    def test_background_thread_flushes(self):
+        writer = AuditLogWriter(batch_size=10, flush_ms=10)
+        with mock.patch.object(writer, '_write', wraps=lambda batch: len(batch)) as write:
+            writer.submit(user_id=self.user.pk, action=EventLog.ActionTypes.ACCESS, metadata={})
+            writer.shutdown()
+        self.assertFalse(writer.stats()['running'])
+        self.assertEqual(sum(len(call.args[0]) for call in write.call_args_list), 1)
+
+
+class EventLogQueryTestCase(APITestCase):
+    def setUp(self):
+        patcher = mock.patch('users.audit.audit_writer', AuditLogWriter(start_thread=False))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.admin = User.objects.create_user(username='admin', password='pw', role=User.Role.ADMIN)
+        self.desk = User.objects.create_user(username='desk', password='pw', role=User.Role.RECEPTION)
+        self.client.force_authenticate(self.admin)
+        self.start = datetime(2026, 3, 1, 8, 0, tzinfo=dt_timezone.utc)
+        # Two events share each timestamp so pages have to break ties on id
+        for i in range(10):
+            EventLog.objects.create(
+                user=self.desk if i % 2 else self.admin,
+                action=EventLog.ActionTypes.UPDATE if i % 3 else EventLog.ActionTypes.CREATE,
+                object_type='Package', object_id=str(i),
+                timestamp=self.start + timedelta(minutes=i // 2),
+            )
+        self.url = reverse('event-log-list')
+
+    def test_pages_follow_cursor_without_gaps_or_repeats(self):
+        seen = []
+        url = f'{self.url}?page_size=3'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.data['results']), 3)
+            seen.extend(response.data['results'])
+            url = response.data['next']
+        expected = list(EventLog.objects.order_by('-timestamp', '-id').values_list('id', flat=True))
+        self.assertEqual([event['id'] for event in seen], expected)
+
+    def test_filters(self):
+        response = self.client.get(self.url, {'user': self.desk.pk, 'action': 'update'})
+        self.assertEqual(
+            sorted(int(event['object_id']) for event in response.data['results']), [1, 5, 7]
+        )
+        response = self.client.get(self.url, {'object_type': 'Package', 'object_id': '4'})
+        self.assertEqual([event['object_id'] for event in response.data['results']], ['4'])
+        response = self.client.get(self.url, {
+            'since': (self.start + timedelta(minutes=1)).isoformat(),
+            'until': (self.start + timedelta(minutes=3)).isoformat(),
+        })
+        self.assertEqual(
+            sorted(int(event['object_id']) for event in response.data['results']), [2, 3, 4, 5]
+        )
+        self.assertIsNone(response.data['next'])
+
+    def test_bad_parameters_rejected(self):
+        self.assertEqual(self.client.get(self.url, {'since': 'yesterday'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'action': 'EXPLODE'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'cursor': 'not-a-cursor'}).status_code, 404)
+
+    def test_admin_only(self):
+        self.client.force_authenticate(self.desk)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+
+class EventLogArchiveTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='desk', password='pw')
+        self.now = timezone.now()
+        self.old = [
+            EventLog.objects.create(user=self.user, action=EventLog.ActionTypes.LOGIN,
+                                    timestamp=datetime(2026, 1, 31, 23, 0, tzinfo=dt_timezone.utc)),
+            EventLog.objects.create(user=self.user, action=EventLog.ActionTypes.UPDATE, object_type='Package',
+                                    object_id='7', metadata={'path': '/api/packages/7/'},
+                                    timestamp=datetime(2026, 2, 1, 1, 0, tzinfo=dt_timezone.utc)),
+            EventLog.objects.create(action=EventLog.ActionTypes.SYSTEM,
+                                    timestamp=datetime(2026, 2, 3, 1, 0, tzinfo=dt_timezone.utc)),
+        ]
+        self.recent = EventLog.objects.create(user=self.user, action=EventLog.ActionTypes.LOGOUT, timestamp=self.now)
+        self.output_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.output_dir.cleanup)
+
+    def archive(self, *args):
+        out = StringIO()
+        with mock.patch('users.archive.timezone.now', return_value=datetime(2026, 6, 1, tzinfo=dt_timezone.utc)):
+            call_command('archive_event_logs', '--days', '30', '--output-dir', self.output_dir.name,
+                         '--batch-size', '2', *args, stdout=out)
+        return out.getvalue()
+
+    def read_month(self, month):
+        with gzip.open(f'{self.output_dir.name}/eventlog-{month}.jsonl.gz', 'rt') as archive:
+            return [json.loads(line) for line in archive]
+
+    def test_dry_run_only_counts(self):
+        output = self.archive('--dry-run')
+        self.assertIn('Would archive 3 audit events', output)
+        self.assertEqual(EventLog.objects.count(), 4)
+
+    def test_old_events_moved_to_monthly_files(self):
+        self.assertIn('Archived 3 audit events', self.archive())
+        self.assertEqual(list(EventLog.objects.all()), [self.recent])
+
+        january, february = self.read_month('2026-01'), self.read_month('2026-02')
+        self.assertEqual([record['id'] for record in january], [self.old[0].pk])
+        self.assertEqual([record['id'] for record in february], [self.old[1].pk, self.old[2].pk])
+        self.assertEqual(february[0]['username'], 'desk')
+        self.assertEqual(february[0]['metadata'], {'path': '/api/packages/7/'})
+        self.assertEqual(february[1]['user_id'], None)
+
+        # A later run appends to the month's file
+        EventLog.objects.create(action=EventLog.ActionTypes.SYSTEM,
+                                timestamp=datetime(2026, 2, 20, tzinfo=dt_timezone.utc))
+        self.archive()
+        self.assertEqual(len(self.read_month('2026-02')), 3)
@@ -4,7 +4,8 @@ from .views import (
     UserListView,
     UserDetailView,
     LoginView,
-    LogoutView,EventLogListView
+    LogoutView,EventLogListView,
+    AuditLogStatsView
 )
 
 urlpatterns = [
@@ -14,5 +15,6 @@ urlpatterns = [
     path('login/', LoginView.as_view(), name='login'),
     path('logout/', LogoutView.as_view(), name='logout'),
     path('event-logs/', EventLogListView.as_view(), name='event-log-list'),
+    path('event-logs/stats/', AuditLogStatsView.as_view(), name='audit-log-stats'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
 ]
\ No newline at end of file
@@ -7,13 +7,74 @@ from .models import User, EventLog
 from .serializers import UserSerializer, AdminUserSerializer, LoginSerializer
 from .permissions import IsAdmin, IsStaff, IsReception, IsOwnerOrAdmin
 from rest_framework import generics
+from rest_framework.exceptions import ValidationError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from datetime import datetime, time
 from .models import EventLog
 from .serializers import EventLogSerializer
+from .pagination import KeysetPagination
+from . import audit
+
+
+def parse_time_bound(name, value):
+    """Aware datetime for an ISO date or datetime query parameter; a bare date means its midnight"""
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValidationError({name: f"Expected an ISO date or datetime, got {value!r}"})
+        moment = datetime.combine(day, time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
 
 class EventLogListView(generics.ListAPIView):
-    queryset = EventLog.objects.all().order_by('-timestamp')
+    """
+    Audit events, newest first, a page at a time.
+
+    Filters: user (id), action (comma separated), object_type, object_id, and a time
+    window of since (inclusive) and until (exclusive). Follow `next` for older events.
+    Events moved out by `archive_event_logs` are in the archive files, not here.
+    """
+    queryset = EventLog.objects.all()
     serializer_class = EventLogSerializer
     permission_classes = [IsAdmin]
+    pagination_class = KeysetPagination.ordered_by('-timestamp', '-id')
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        params = self.request.query_params
+
+        user = params.get('user')
+        if user:
+            if not user.isdigit():
+                raise ValidationError({'user': "Expected a user id"})
+            queryset = queryset.filter(user_id=int(user))
+        action = params.get('action')
+        if action:
+            actions = [value.strip().upper() for value in action.split(',') if value.strip()]
+            unknown = sorted(set(actions) - set(EventLog.ActionTypes.values))
+            if unknown:
+                raise ValidationError({'action': f"Unknown actions: {', '.join(unknown)}"})
+            queryset = queryset.filter(action__in=actions)
+        for field in ('object_type', 'object_id'):
+            if params.get(field):
+                queryset = queryset.filter(**{field: params[field]})
+        if params.get('since'):
+            queryset = queryset.filter(timestamp__gte=parse_time_bound('since', params['since']))
+        if params.get('until'):
+            queryset = queryset.filter(timestamp__lt=parse_time_bound('until', params['until']))
+        return queryset
+
+
+class AuditLogStatsView(APIView):
+    """Queue depth, written/dropped counts and settings of this process's audit log writer"""
+    permission_classes = [IsAdmin]
+
+    def get(self, request):
+        return Response(audit.audit_writer.stats())
     
 class UserListView(generics.ListCreateAPIView):
     queryset = User.objects.all()